@@ -3,7 +3,8 @@ import pandas as pd
 from datetime import datetime, timedelta, timezone
 import plotly.express as px
 import logging
-from utils.data_fetcher import fetch_space_force_news, fetch_space_force_events, NEWS_SOURCES
+from utils.data_fetcher import NEWS_SOURCES
+from utils.dataset_store import get_dataset_snapshot, is_refresh_in_progress
 from utils.data_processor import (
     filter_events_by_date,
     filter_events_by_category,
@@ -13,20 +14,24 @@ from utils.data_processor import (
     prepare_timeline_data
 )
 from utils.notification_manager import init_notification_state, check_new_events, get_notification_settings
-from utils.timezone_utils import init_timezone_state, add_timezone_selector, convert_timezone
+from utils.timezone_utils import init_timezone_state, add_timezone_selector, convert_timezone, format_datetime
 from utils.event_analyzer import (
     generate_event_stats,
     create_detailed_timeline,
     generate_event_heatmap,
     analyze_category_trends
 )
+from utils.event_aggregates import should_use_aggregates, compute_aggregates, should_run_in_background, submit_analysis
 from utils.category_manager import render_category_manager
-from utils.ai_briefing import generate_briefing
+from utils.event_feed import render_event_feed
+from utils.ai_briefing import BriefingService
+from utils.db import get_feed_health, get_feed_run_stats
+from utils.fallback_illustrations import build_fallback_assets
 from typing import List, Dict
 import json
-import html
 from utils.browser_storage import load_dashboard_settings, save_dashboard_settings
 from utils.performance_monitor import monitor_performance, optimize_cache
+from utils.metrics import timed, inc, registry, start_metrics_server, METRICS_PORT, METRICS_HOST
 from dotenv import load_dotenv
 import os
 
@@ -77,345 +82,510 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# Monitor and optimize performance
-memory_usage = monitor_performance()
-if memory_usage:
-    logger.info(f"Current memory usage: RSS={memory_usage['rss']:.2f}MB, VMS={memory_usage['vms']:.2f}MB")
-
-# Optimize cache periodically
-optimize_cache()
-
-# Load custom CSS
-with open('assets/style.css') as f:
-    st.markdown(f'<style>{f.read()}</style>', unsafe_allow_html=True)
-
-# Initialize session state
-if 'last_refresh' not in st.session_state:
-    st.session_state.last_refresh = datetime.now()
-
-# Initialize notification state
-init_notification_state()
-
-# Initialize timezone state
-init_timezone_state()
-
-# Fetch data first
-with st.spinner("Fetching latest Space Force updates..."):
-    news_items = fetch_space_force_news()
-    events = fetch_space_force_events()
-
-    # Check for new events and show notification
-    new_events = check_new_events(events + news_items)
-    if new_events:
-        st.success(f"🔔 {len(new_events)} new events available!")
-
-# Header
-st.title("🚀 Space Force Events")
-
-# Sidebar
-st.sidebar.header("Dashboard Controls")
-
-# Search box with saved value
-search_query = st.sidebar.text_input(
-    "🔍 Search events",
-    value=st.session_state.get('search_box', ''),
-    key="search_box",
-    on_change=lambda: save_dashboard_settings({
-        **load_dashboard_settings(),
-        'search_query': st.session_state.search_box
-    })
-)
-
-# Timezone selector with saved preference
-add_timezone_selector()
-
-# Notification settings with saved preferences
-notification_settings = get_notification_settings()
-
-# Auto-refresh toggle with saved state
-auto_refresh = st.sidebar.checkbox(
-    "Auto-refresh (5 min)",
-    value=st.session_state.get('auto_refresh', True),
-    key="auto_refresh",
-    on_change=lambda: save_dashboard_settings({
-        **load_dashboard_settings(),
-        'auto_refresh': st.session_state.auto_refresh
-    })
-)
-
-if auto_refresh and (datetime.now() - st.session_state.last_refresh) > timedelta(minutes=5):
-    st.rerun()
-    st.session_state.last_refresh = datetime.now()
-
-# Category Management
-render_category_manager()
-
-# Date filter with saved range
-st.sidebar.subheader("Date Range")
-settings = load_dashboard_settings()
-current_date = datetime.now().date()
-
-start_date_input = st.sidebar.date_input(
-    "Start date",
-    value=datetime.fromisoformat(settings['date_range']['start_date']).date(),
-    max_value=current_date,
-    key="start_date",
-    on_change=lambda: save_dashboard_settings({
-        **load_dashboard_settings(),
-        'date_range': {
-            'start_date': st.session_state.start_date.isoformat(),
-            'end_date': st.session_state.end_date.isoformat()
-        }
-    })
-)
-
-end_date_input = st.sidebar.date_input(
-    "End date",
-    value=datetime.fromisoformat(settings['date_range']['end_date']).date(),
-    min_value=start_date_input,
-    max_value=current_date,
-    key="end_date",
-    on_change=lambda: save_dashboard_settings({
-        **load_dashboard_settings(),
-        'date_range': {
-            'start_date': st.session_state.start_date.isoformat(),
-            'end_date': st.session_state.end_date.isoformat()
-        }
-    })
-)
-
-# Category filter with saved selection
-categories = ["All"] + get_event_categories(news_items + events)
-selected_category = st.sidebar.selectbox(
-    "Filter by Category",
-    categories,
-    index=categories.index(settings['selected_category']) if settings['selected_category'] in categories else 0,
-    key="selected_category",
-    on_change=lambda: save_dashboard_settings({
-        **load_dashboard_settings(),
-        'selected_category': st.session_state.selected_category
-    })
-)
-
-# Section visibility and order controls with saved state
-st.sidebar.markdown("---")
-st.sidebar.subheader("Sub-Section Controls")
-section_controls = st.sidebar.container()
-
-with section_controls:
-    st.markdown("##### Visibility")
-
-    # Batch update section visibility
-    visibility_updates = {}
-    for section_id, section in st.session_state.dashboard_sections.items():
-        visibility_updates[section_id] = st.checkbox(
-            f"Show {section['title']}",
-            value=section['visible'],
-            key=f"visible_{section_id}"
-        )
-
-    # Only update if changes detected
-    if any(visibility_updates[sid] != section['visible']
-           for sid, section in st.session_state.dashboard_sections.items()):
-        for section_id, is_visible in visibility_updates.items():
-            st.session_state.dashboard_sections[section_id]['visible'] = is_visible
-        save_dashboard_settings({
+# Timed as one call so runs that end in st.stop, st.rerun or an exception
+# are recorded too. Fragment reruns skip it and are timed by their own
+# fragment_render_seconds.
+@timed('page_render_seconds')
+def render_page():
+    """Render the whole dashboard for one script run"""
+    inc('page_runs_total')
+
+    # Monitor and optimize performance
+    memory_usage = monitor_performance()
+    if memory_usage:
+        logger.info(f"Current memory usage: RSS={memory_usage['rss']:.2f}MB, VMS={memory_usage['vms']:.2f}MB")
+
+    # Optimize cache periodically
+    optimize_cache()
+
+    # Load custom CSS
+    with open('assets/style.css') as f:
+        st.markdown(f'<style>{f.read()}</style>', unsafe_allow_html=True)
+
+    @st.cache_resource
+    def prepare_static_assets():
+        """Build the fallback illustration assets once per process"""
+        return build_fallback_assets()
+
+    prepare_static_assets()
+
+    @st.cache_resource
+    def start_metrics_endpoint():
+        """Serve the Prometheus endpoint once per process when METRICS_PORT is set"""
+        return start_metrics_server(METRICS_PORT)
+
+    start_metrics_endpoint()
+
+    # Initialize session state
+    if 'last_refresh' not in st.session_state:
+        st.session_state.last_refresh = datetime.now()
+
+    # Initialize notification state
+    init_notification_state()
+
+    # Initialize timezone state
+    init_timezone_state()
+
+    # Fetch data first
+    with st.spinner("Loading latest Space Force updates..."):
+        # Sessions share the process-wide snapshot; only the version is kept per session
+        with timed('page_stage_seconds', stage='load_dataset'):
+            dataset = get_dataset_snapshot()
+        st.session_state.dataset_version = dataset.version
+        news_items = list(dataset.news)
+        events = list(dataset.events)
+
+        # Check for new events and show notification
+        new_events = check_new_events()
+        if new_events:
+            st.toast(f"🔔 {len(new_events)} new events available!\n\n{new_events[0]['title']}")
+
+    # Header
+    st.title("🚀 Space Force Events")
+
+    @st.fragment(run_every=timedelta(seconds=30))
+    @timed('fragment_render_seconds', fragment='dataset_freshness')
+    def render_dataset_freshness():
+        """Show when ingestion last stored an item and swap in a newer snapshot once it is published"""
+        # Also revalidates: a stale snapshot starts a background refresh here, so
+        # an idle page keeps reloading data without waiting for a full rerun
+        current = get_dataset_snapshot()
+        if current.version != st.session_state.dataset_version:
+            st.rerun()
+
+        # A refresh that found nothing new still republishes the snapshot, so its
+        # own age says nothing about whether ingestion is storing anything
+        data_age = dataset.data_age_seconds()
+        updated = f"Newest item stored {int(data_age // 60)} min ago" if data_age is not None else "No items stored yet"
+        status = "🔄 refreshing in background" if is_refresh_in_progress() else "✅ up to date"
+        st.caption(f"🛰️ {updated} · {status}")
+
+    render_dataset_freshness()
+
+    # Sidebar
+    st.sidebar.header("Dashboard Controls")
+
+    # Search box with saved value
+    search_query = st.sidebar.text_input(
+        "🔍 Search events",
+        value=st.session_state.get('search_box', ''),
+        key="search_box",
+        on_change=lambda: save_dashboard_settings({
             **load_dashboard_settings(),
-            'dashboard_sections': st.session_state.dashboard_sections
+            'search_query': st.session_state.search_box
         })
+    )
 
+    # Timezone selector with saved preference
+    add_timezone_selector()
 
-    st.markdown("##### Section Order")
-    st.markdown("Drag sections to reorder:")
+    # Notification settings with saved preferences
+    notification_settings = get_notification_settings()
 
-    ordered_sections = sorted(
-        st.session_state.dashboard_sections.items(),
-        key=lambda x: x[1]['order']
+    # Auto-refresh toggle with saved state
+    auto_refresh = st.sidebar.checkbox(
+        "Auto-refresh (5 min)",
+        value=st.session_state.get('auto_refresh', True),
+        key="auto_refresh",
+        on_change=lambda: save_dashboard_settings({
+            **load_dashboard_settings(),
+            'auto_refresh': st.session_state.auto_refresh
+        })
     )
 
-    for i, (section_id, section) in enumerate(ordered_sections):
-        col1, col2 = st.columns([0.2, 0.8])
-        with col1:
-            if i > 0:
-                if st.button("↑", key=f"up_{section_id}"):
-                    prev_section = ordered_sections[i-1][0]
-                    current_order = section['order']
-                    st.session_state.dashboard_sections[section_id]['order'] = st.session_state.dashboard_sections[prev_section]['order']
-                    st.session_state.dashboard_sections[prev_section]['order'] = current_order
-                    save_dashboard_settings({
-                        **load_dashboard_settings(),
-                        'dashboard_sections': st.session_state.dashboard_sections
-                    })
-                    st.rerun()
-        with col2:
-            st.markdown(section['title'])
+    if auto_refresh and (datetime.now() - st.session_state.last_refresh) > timedelta(minutes=5):
+        st.rerun()
+        st.session_state.last_refresh = datetime.now()
 
+    # Category Management
+    render_category_manager()
 
+    # Date filter with saved range
+    st.sidebar.subheader("Date Range")
+    settings = load_dashboard_settings()
+    current_date = datetime.now().date()
+
+    start_date_input = st.sidebar.date_input(
+        "Start date",
+        value=datetime.fromisoformat(settings['date_range']['start_date']).date(),
+        max_value=current_date,
+        key="start_date",
+        on_change=lambda: save_dashboard_settings({
+            **load_dashboard_settings(),
+            'date_range': {
+                'start_date': st.session_state.start_date.isoformat(),
+                'end_date': st.session_state.end_date.isoformat()
+            }
+        })
+    )
 
-# RSS Feed Management
-st.sidebar.markdown("---")
-st.sidebar.subheader("RSS Feed Management")
+    end_date_input = st.sidebar.date_input(
+        "End date",
+        value=datetime.fromisoformat(settings['date_range']['end_date']).date(),
+        min_value=start_date_input,
+        max_value=current_date,
+        key="end_date",
+        on_change=lambda: save_dashboard_settings({
+            **load_dashboard_settings(),
+            'date_range': {
+                'start_date': st.session_state.start_date.isoformat(),
+                'end_date': st.session_state.end_date.isoformat()
+            }
+        })
+    )
 
-# Display current feeds
-st.sidebar.caption("Currently Monitored Feeds:")
-for category, sources in NEWS_SOURCES.items():
-    with st.sidebar.expander(f"📑 {category}"):
-        for source in sources:
-            st.write(f"• {source['name']}")
+    # Category filter with saved selection
+    categories = ["All"] + get_event_categories(news_items + events)
+    selected_category = st.sidebar.selectbox(
+        "Filter by Category",
+        categories,
+        index=categories.index(settings['selected_category']) if settings['selected_category'] in categories else 0,
+        key="selected_category",
+        on_change=lambda: save_dashboard_settings({
+            **load_dashboard_settings(),
+            'selected_category': st.session_state.selected_category
+        })
+    )
 
-# Add new RSS feed
-new_feed_name = st.sidebar.text_input("Feed Name", key="new_feed_name")
-new_feed_url = st.sidebar.text_input("Feed URL", key="new_feed_url")
-new_feed_category = st.sidebar.selectbox(
-    "Feed Category",
-    ["Military Space", "Space Industry", "Space Science", "Official Updates", "Defense Updates", "Space Technology"]
-)
+    # Section visibility and order controls with saved state
+    st.sidebar.markdown("---")
+    st.sidebar.subheader("Sub-Section Controls")
+    section_controls = st.sidebar.container()
+
+    with section_controls:
+        st.markdown("##### Visibility")
+
+        # Batch update section visibility
+        visibility_updates = {}
+        for section_id, section in st.session_state.dashboard_sections.items():
+            visibility_updates[section_id] = st.checkbox(
+                f"Show {section['title']}",
+                value=section['visible'],
+                key=f"visible_{section_id}"
+            )
 
-if st.sidebar.button("Add Feed"):
-    st.sidebar.info("Feature coming soon: Add custom RSS feeds")
+        # Only update if changes detected
+        if any(visibility_updates[sid] != section['visible']
+               for sid, section in st.session_state.dashboard_sections.items()):
+            for section_id, is_visible in visibility_updates.items():
+                st.session_state.dashboard_sections[section_id]['visible'] = is_visible
+            save_dashboard_settings({
+                **load_dashboard_settings(),
+                'dashboard_sections': st.session_state.dashboard_sections
+            })
 
-# Convert date inputs to datetime for filtering
-start_datetime = datetime.combine(start_date_input, datetime.min.time())
-end_datetime = datetime.combine(end_date_input, datetime.max.time())
 
-# Filter data
-filtered_items = news_items + events
-filtered_items = filter_events_by_date(filtered_items, start_datetime, end_datetime)
-filtered_items = filter_events_by_category(filtered_items, selected_category)
-if search_query:
-    filtered_items = search_events(filtered_items, search_query)
+        st.markdown("##### Section Order")
+        st.markdown("Drag sections to reorder:")
 
-# Tabs for different views
-tab1, tab2 = st.tabs(["📊 Dashboard", "📈 Detailed Analysis"])
+        ordered_sections = sorted(
+            st.session_state.dashboard_sections.items(),
+            key=lambda x: x[1]['order']
+        )
 
-with tab1:
-    # Get visible sections in correct order
-    visible_sections = sorted(
-        [(section_id, section) for section_id, section in st.session_state.dashboard_sections.items() if section['visible']],
-        key=lambda x: x[1]['order']
-    )
+        for i, (section_id, section) in enumerate(ordered_sections):
+            col1, col2 = st.columns([0.2, 0.8])
+            with col1:
+                if i > 0:
+                    if st.button("↑", key=f"up_{section_id}"):
+                        prev_section = ordered_sections[i-1][0]
+                        current_order = section['order']
+                        st.session_state.dashboard_sections[section_id]['order'] = st.session_state.dashboard_sections[prev_section]['order']
+                        st.session_state.dashboard_sections[prev_section]['order'] = current_order
+                        save_dashboard_settings({
+                            **load_dashboard_settings(),
+                            'dashboard_sections': st.session_state.dashboard_sections
+                        })
+                        st.rerun()
+            with col2:
+                st.markdown(section['title'])
+
+
+
+    @st.cache_data(ttl=60, show_spinner=False)
+    def load_feed_health():
+        """Get each feed's circuit breaker state, keyed by feed name"""
+        return {row['name']: row for row in get_feed_health()}
+
+    def describe_feed_health(health):
+        """One-line status for a feed from its circuit breaker state"""
+        if not health or not health['consecutive_failures']:
+            return "🟢"
+        error = (health['last_error'] or "unknown error")[:80]
+        open_until = health['circuit_open_until']
+        if open_until and open_until > datetime.now(timezone.utc):
+            return f"🔴 paused until {format_datetime(open_until)} ({health['consecutive_failures']} failures: {error})"
+        return f"🟡 {health['consecutive_failures']} failed polls ({error})"
+
+    # RSS Feed Management
+    @st.fragment
+    @timed('fragment_render_seconds', fragment='feed_management')
+    def render_feed_management():
+        """Render feed management controls; typing here only reruns this fragment"""
+        st.markdown("---")
+        st.subheader("RSS Feed Management")
+
+        # Display current feeds
+        st.caption("Currently Monitored Feeds:")
+        feed_health = load_feed_health()
+        for category, sources in NEWS_SOURCES.items():
+            with st.expander(f"📑 {category}"):
+                for source in sources:
+                    st.write(f"• {source['name']} {describe_feed_health(feed_health.get(source['name']))}")
+
+        # Add new RSS feed
+        new_feed_name = st.text_input("Feed Name", key="new_feed_name")
+        new_feed_url = st.text_input("Feed URL", key="new_feed_url")
+        new_feed_category = st.selectbox(
+            "Feed Category",
+            ["Military Space", "Space Industry", "Space Science", "Official Updates", "Defense Updates", "Space Technology"]
+        )
 
-    for section_id, section in visible_sections:
-        if section_id == 'briefing' and section['visible']:
-            st.subheader(section['title'])
-            with st.spinner("Generating briefing..."):
-                briefing = generate_briefing(filtered_items)
-                st.markdown(
-                    f"""
-                    <div style='background: rgba(26, 31, 36, 0.8); padding: 1rem; border-radius: 5px; 
-                    border: 1px solid rgba(0, 242, 255, 0.2);'>
-                        {briefing}
-                    </div>
-                    """,
-                    unsafe_allow_html=True
+        if st.button("Add Feed"):
+            st.info("Feature coming soon: Add custom RSS feeds")
+
+    with st.sidebar:
+        render_feed_management()
+
+    # Convert date inputs to datetime for filtering
+    start_datetime = datetime.combine(start_date_input, datetime.min.time())
+    end_datetime = datetime.combine(end_date_input, datetime.max.time())
+
+    # Filter data
+    with timed('page_stage_seconds', stage='filter'):
+        filtered_items = news_items + events
+        filtered_items = filter_events_by_date(filtered_items, start_datetime, end_datetime)
+        filtered_items = filter_events_by_category(filtered_items, selected_category)
+        if search_query:
+            filtered_items = search_events(filtered_items, search_query)
+
+    # Section results are reused until the data or the filters change, so
+    # timezone, visibility and ordering changes only re-render
+    filter_key = (dataset.version, start_date_input, end_date_input, selected_category, search_query)
+
+    def get_section_result(section_id, key, compute):
+        """Return a section's cached result for this session, computing it on a key change"""
+        if 'section_results' not in st.session_state:
+            st.session_state.section_results = {}
+        cached = st.session_state.section_results.get(section_id)
+        if cached is None or cached[0] != key:
+            cached = (key, compute())
+            st.session_state.section_results[section_id] = cached
+        return cached[1]
+
+    def get_section_job(section_id, key, compute):
+        """Like get_section_result, but computed on an analytics worker; returns the job's future"""
+        if 'section_jobs' not in st.session_state:
+            st.session_state.section_jobs = {}
+        job = st.session_state.section_jobs.get(section_id)
+        if job is None or job[0] != key:
+            if job is not None:
+                # Superseded before it started
+                job[1].cancel()
+            job = (key, submit_analysis(compute))
+            st.session_state.section_jobs[section_id] = job
+        return job[1]
+
+    @st.cache_resource
+    def get_briefing_service():
+        """Get the process-wide briefing cache shared by all sessions"""
+        return BriefingService()
+
+    def show_briefing(state):
+        """Render a briefing state: the text so far plus a status line"""
+        if state.content:
+            # Briefings are markdown with blank lines between sections, which
+            # would end a raw HTML block early; the card is styled by its key
+            with st.container(key="briefing_card"):
+                st.markdown(state.content)
+        if state.status == 'pending' and state.content:
+            st.caption("Generating AI briefing... showing an automatic summary until it is ready")
+        elif state.status in ('pending', 'streaming'):
+            st.caption("Generating briefing...")
+        elif state.status == 'stale':
+            st.caption(f"Updating briefing for new events... (showing briefing from {format_datetime(state.created_at)})")
+        elif state.status == 'error':
+            st.warning(state.error)
+
+    # Seconds between fragment reruns while the briefing is still changing; once
+    # it settles the section is rendered once per page run and stops polling
+    BRIEFING_POLL_SECONDS = {'pending': 1, 'streaming': 1, 'stale': 5}
+
+    def render_briefing_section(title, items):
+        """Render the strategic briefing section, polling only while a briefing is being generated"""
+        st.subheader(title)
+        state = get_briefing_service().get(items)
+        interval = BRIEFING_POLL_SECONDS.get(state.status)
+        if interval is None:
+            show_briefing(state)
+            return
+        # run_every is fixed per fragment call, so the poller is declared with the
+        # pace this status needs
+        st.fragment(run_every=timedelta(seconds=interval))(render_live_briefing)(items, state.status)
+
+    @timed('fragment_render_seconds', fragment='live_briefing')
+    def render_live_briefing(items, polled_status):
+        """Show the briefing as it is now; streamed text appears on the next poll"""
+        state = get_briefing_service().get(items)
+        show_briefing(state)
+        if BRIEFING_POLL_SECONDS.get(state.status) != BRIEFING_POLL_SECONDS.get(polled_status):
+            # A full run re-declares the section, which stops or re-paces polling
+            st.rerun()
+
+    def build_timeline_figure(items):
+        """Build the dashboard timeline chart in the display timezone"""
+        timeline_data = prepare_timeline_data(items)
+        if timeline_data.empty:
+            return None
+
+        # Convert timeline dates to selected timezone
+        timeline_data['Start'] = timeline_data['Start'].apply(convert_timezone)
+        timeline_data['Finish'] = timeline_data['Finish'].apply(convert_timezone)
+
+        categories = timeline_data['Category'].unique()
+        timeline_height = calculate_timeline_height(categories)
+
+        fig = px.timeline(
+            timeline_data,
+            x_start="Start",
+            x_end="Finish",
+            y="Category",
+            color="Category",
+            hover_data=["Description"]
+        )
+        fig.update_layout(
+            showlegend=True,
+            height=timeline_height,  # Dynamic height based on categories
+            paper_bgcolor="rgba(0,0,0,0)",
+            plot_bgcolor="rgba(0,0,0,0)",
+            font_color="white",
+            xaxis=dict(
+                title=f"Date ({st.session_state.display_timezone})",
+                type='date',
+                range=[
+                    convert_timezone(start_datetime),
+                    convert_timezone(end_datetime)
+                ]
+            )
+        )
+        return fig
+
+    @st.fragment
+    @timed('fragment_render_seconds', fragment='timeline')
+    def render_timeline_section(title, items, key):
+        """Render the event timeline section"""
+        st.subheader(title)
+        fig = get_section_result(
+            'timeline',
+            (key, st.session_state.display_timezone),
+            lambda: build_timeline_figure(items)
+        )
+        if fig is not None:
+            st.plotly_chart(fig, use_container_width=True)
+        else:
+            st.info("No events available for timeline visualization.")
+
+    @st.fragment
+    @timed('fragment_render_seconds', fragment='updates_stats')
+    def render_updates_stats_section(items, key):
+        """Render the latest updates feed alongside quick stats"""
+        # Create the columns for the paired sections
+        main_col, stats_col = st.columns([2, 1])
+
+        # Updates section
+        with main_col:
+            st.subheader("📰 Latest Updates")
+            if not items:
+                st.info("No events found matching your criteria.")
+            else:
+                render_event_feed(items, new_events, reset_key=key)
+
+        # Stats section
+        with stats_col:
+            st.subheader("📊 Quick Stats")
+            if items:
+                category_counts, today_count = get_section_result(
+                    'quick_stats',
+                    # "Today's events" also rolls over at midnight without any filter change
+                    (key, current_date),
+                    lambda: (
+                        pd.DataFrame(items)['category'].value_counts(),
+                        len([i for i in items if i['date'].date() == current_date])
+                    )
                 )
+                st.bar_chart(category_counts)
 
-        elif section_id == 'timeline' and section['visible']:
-            st.subheader(section['title'])
-            timeline_data = prepare_timeline_data(filtered_items)
-            if not timeline_data.empty:
-                # Convert timeline dates to selected timezone
-                timeline_data['Start'] = timeline_data['Start'].apply(convert_timezone)
-                timeline_data['Finish'] = timeline_data['Finish'].apply(convert_timezone)
-
-                categories = timeline_data['Category'].unique()
-                timeline_height = calculate_timeline_height(categories)
-
-                fig = px.timeline(
-                    timeline_data,
-                    x_start="Start",
-                    x_end="Finish",
-                    y="Category",
-                    color="Category",
-                    hover_data=["Description"]
+                st.metric(
+                    label="Total Events",
+                    value=len(items),
+                    delta=f"{today_count} new today" if today_count > 0 else None
                 )
-                fig.update_layout(
-                    showlegend=True,
-                    height=timeline_height,  # Dynamic height based on categories
-                    paper_bgcolor="rgba(0,0,0,0)",
-                    plot_bgcolor="rgba(0,0,0,0)",
-                    font_color="white",
-                    xaxis=dict(
-                        title=f"Date ({st.session_state.display_timezone})",
-                        type='date',
-                        range=[
-                            convert_timezone(start_datetime),
-                            convert_timezone(end_datetime)
-                        ]
-                    )
-                )
-                st.plotly_chart(fig, use_container_width=True)
             else:
-                st.info("No events available for timeline visualization.")
-
-        elif section_id == 'updates_stats' and section['visible']:
-            # Create the columns for the paired sections
-            main_col, stats_col = st.columns([2, 1])
-
-            # Updates section
-            with main_col:
-                st.subheader("📰 Latest Updates")
-                if not filtered_items:
-                    st.info("No events found matching your criteria.")
-                else:
-                    for item in filtered_items:
-                        with st.container():
-                            is_new = any(new_event['title'] == item['title'] for new_event in (new_events or []))
-                            title_prefix = "🔔 NEW! " if is_new else ""
-
-                            # Sanitize text content
-                            title = html.escape(item['title'])
-                            description = html.escape(item.get('description', '')[:200]) + "..." if item.get('description') else ""
-                            category = html.escape(item['category'])
-                            has_image = 'image_url' in item and item['image_url']
-
-                            st.markdown(
-                                f"""
-                                <div class="event-card{' new-event' if is_new else ''}" id="article-{hash(item['title'])}">
-                                    <div class="event-card-header">
-                                        <h3>{title_prefix}{title}</h3>
-                                        <div class="event-card-meta">
-                                            <span>{format_date(item['date'])}</span>
-                                            <span class="category-pill">{category}</span>
-                                        </div>
-                                    </div>
-                                    <div class="event-card-content{' has-image' if has_image else ''}">
-                                        <div class="event-card-text">
-                                            <p>{description}</p>
-                                            {'<div class="event-card-link"><a href="' + item["link"] + '" target="_blank">Read more →</a></div>' if 'link' in item else ''}
-                                        </div>
-                                        {'<div class="event-card-image"><img src="' + item["image_url"] + '" class="event-image" alt="Event image" loading="lazy" /></div>' if has_image else ''}
-                                    </div>
-                                </div>
-                                """,
-                                unsafe_allow_html=True
-                            )
-
-            # Stats section
-            with stats_col:
-                st.subheader("📊 Quick Stats")
-                if filtered_items:
-                    df_counts = pd.DataFrame(filtered_items)
-                    category_counts = df_counts['category'].value_counts()
-                    st.bar_chart(category_counts)
-
-                    today_count = len([i for i in filtered_items if i['date'].date() == current_date])
-                    st.metric(
-                        label="Total Events",
-                        value=len(filtered_items),
-                        delta=f"{today_count} new today" if today_count > 0 else None
-                    )
-                else:
-                    st.info("No data available for statistics.")
+                st.info("No data available for statistics.")
+
+    def build_detailed_analysis(items):
+        """Compute the statistics and charts for the Detailed Analysis view"""
+        # Encode and count large datasets once for the statistics, trends and heatmap
+        aggregates = compute_aggregates(items) if should_use_aggregates(items) else None
+        trends_data = analyze_category_trends(items, aggregates)
+        trends_fig = None
+        if not trends_data.empty:
+            trends_fig = px.line(
+                trends_data,
+                x='date',
+                y='count',
+                color='category',
+                title="Category Trends Over Time"
+            )
+            trends_fig.update_layout(
+                height=400,
+                paper_bgcolor="rgba(0,0,0,0)",
+                plot_bgcolor="rgba(0,0,0,0)",
+                font_color="white",
+                xaxis=dict(
+                    title="Date",
+                    type='date',
+                    range=[start_datetime, end_datetime]
+                ),
+                yaxis_title="Number of Events"
+            )
 
-with tab2:
-    st.header("📈 Detailed Event Analysis")
+        return {
+            'stats': generate_event_stats(items, aggregates),
+            'timeline': create_detailed_timeline(items),
+            'heatmap': generate_event_heatmap(items, aggregates),
+            'trends': trends_fig
+        }
+
+    @st.fragment
+    @timed('fragment_render_seconds', fragment='detailed_analysis')
+    def render_detailed_analysis(items, key):
+        """Render the Detailed Analysis view"""
+        st.header("📈 Detailed Event Analysis")
+
+        if not items:
+            st.info("No events available for analysis. Try adjusting your filters.")
+            return
+
+        if should_run_in_background(items):
+            # Long date ranges are analyzed off the script thread; the page
+            # stays responsive and this view fills in when the job finishes
+            job = get_section_job('detailed_analysis', key, lambda: build_detailed_analysis(items))
+            if not job.done():
+                st.fragment(run_every=timedelta(seconds=1))(await_detailed_analysis)(job, len(items))
+                return
+            try:
+                analysis = job.result()
+            except Exception as e:
+                # Dropped so the next rerun tries again
+                st.session_state.section_jobs.pop('detailed_analysis', None)
+                st.error(f"Could not analyze events: {str(e)}")
+                return
+        else:
+            analysis = get_section_result('detailed_analysis', key, lambda: build_detailed_analysis(items))
 
-    if not filtered_items:
-        st.info("No events available for analysis. Try adjusting your filters.")
-    else:
         # Event Statistics
-        stats = generate_event_stats(filtered_items)
+        stats = analysis['stats']
         col1, col2, col3 = st.columns(3)
 
         with col1:
@@ -427,46 +597,176 @@ with tab2:
 
         # Detailed Timeline
         st.subheader("📅 Detailed Event Timeline")
-        detailed_timeline = create_detailed_timeline(filtered_items)
-        st.plotly_chart(detailed_timeline, use_container_width=True)
+        st.plotly_chart(analysis['timeline'], use_container_width=True)
 
         # Event Frequency Heatmap
         st.subheader("🗓️ Event Frequency Heatmap")
-        heatmap = generate_event_heatmap(filtered_items)
-        st.plotly_chart(heatmap, use_container_width=True)
+        st.plotly_chart(analysis['heatmap'], use_container_width=True)
 
         # Category Trends
         st.subheader("📊 Category Trends")
-        trends_data = analyze_category_trends(filtered_items)
-        if not trends_data.empty:
-            fig = px.line(
-                trends_data,
-                x='date',
-                y='count',
-                color='category',
-                title="Category Trends Over Time"
-            )
-            fig.update_layout(
-                height=400,
-                paper_bgcolor="rgba(0,0,0,0)",
-                plot_bgcolor="rgba(0,0,0,0)",
-                font_color="white",
-                xaxis=dict(
-                    title="Date",
-                    type='date',
-                    range=[start_datetime, end_datetime]
+        if analysis['trends'] is not None:
+            st.plotly_chart(analysis['trends'], use_container_width=True)
+
+    @timed('fragment_render_seconds', fragment='detailed_analysis_progress')
+    def await_detailed_analysis(job, event_count):
+        """Poll a background analysis; a full run renders it once it is done"""
+        if job.done():
+            st.rerun()
+        st.info(f"Analyzing {event_count:,} events...")
+
+    @st.cache_data(ttl=60, show_spinner=False)
+    def load_feed_run_stats(hours):
+        """Get per-feed fetch statistics for the last `hours` hours"""
+        return get_feed_run_stats(hours)
+
+    @st.fragment
+    @timed('fragment_render_seconds', fragment='ingest_health')
+    def render_ingest_health():
+        """Render per-feed latency and yield from the feed_runs table"""
+        st.subheader("🩺 Ingest Health")
+        windows = {"Last hour": 1, "Last 24 hours": 24, "Last 7 days": 168}
+        window = st.selectbox("Window", list(windows), index=1, key="ingest_health_window")
+        stats = load_feed_run_stats(windows[window])
+        if not stats:
+            st.info("No feed runs recorded in this window")
+            return
+
+        df = pd.DataFrame(stats)
+        runs = df['runs'].sum()
+        entries = df['entries'].sum()
+        changed = df['new_count'].sum() + df['updated_count'].sum()
+
+        col1, col2, col3, col4 = st.columns(4)
+        col1.metric("Feed Runs", int(runs))
+        col2.metric("Failure Rate", f"{df['failures'].sum() / runs:.0%}")
+        col3.metric("New Entries", int(df['new_count'].sum()))
+        col4.metric("Yield", f"{changed / entries:.0%}" if entries else "–")
+
+        # Yield is the share of fetched entries that were new or changed; low
+        # yield on a large, slow feed means it is worth polling less often.
+        # Skipped entries were recognized as unchanged before any processing
+        df['yield'] = ((df['new_count'] + df['updated_count']) / df['entries'].where(df['entries'] > 0)).fillna(0)
+        df['avg_kb'] = df['avg_bytes'].astype(float) / 1024
+        st.dataframe(
+            df[[
+                'feed_name', 'runs', 'failures', 'p50_ms', 'p95_ms', 'avg_fetch_ms', 'avg_parse_ms',
+                'avg_db_ms', 'avg_kb', 'entries', 'new_count', 'updated_count', 'duplicate_count', 'skipped_count',
+                'truncated_runs', 'yield'
+            ]],
+            column_config={
+                'feed_name': "Feed",
+                'runs': "Runs",
+                'failures': "Failures",
+                'p50_ms': st.column_config.NumberColumn("p50 (ms)", format="%.0f"),
+                'p95_ms': st.column_config.NumberColumn("p95 (ms)", format="%.0f"),
+                'avg_fetch_ms': st.column_config.NumberColumn("Fetch (ms)", format="%.0f"),
+                'avg_parse_ms': st.column_config.NumberColumn("Parse (ms)", format="%.0f"),
+                'avg_db_ms': st.column_config.NumberColumn("DB (ms)", format="%.0f"),
+                'avg_kb': st.column_config.NumberColumn("Size (KB)", format="%.1f"),
+                'entries': "Entries",
+                'new_count': "New",
+                'updated_count': "Updated",
+                'duplicate_count': "Duplicate",
+                'skipped_count': "Skipped",
+                'truncated_runs': st.column_config.NumberColumn(
+                    "Capped", help="Runs that stopped at FEED_MAX_ENTRIES_PER_RUN before the end of the feed"
                 ),
-                yaxis_title="Number of Events"
+                'yield': st.column_config.ProgressColumn("Yield", format="%.2f", min_value=0, max_value=1)
+            },
+            hide_index=True,
+            use_container_width=True
+        )
+
+    @st.fragment
+    @timed('fragment_render_seconds', fragment='diagnostics')
+    def render_diagnostics():
+        """Render stage latencies and counters recorded by this dashboard process"""
+        st.subheader("⏱️ Diagnostics")
+        caption = "Recorded by this dashboard process since it started; the ingestion worker keeps its own."
+        if METRICS_PORT:
+            caption += f" Prometheus endpoint: http://{METRICS_HOST}:{METRICS_PORT}/metrics"
+        st.caption(caption)
+
+        latencies = registry.histogram_summary()
+        page = next((row for row in latencies if row['metric'] == 'page_render_seconds'), None)
+        col1, col2, col3 = st.columns(3)
+        col1.metric("Memory (RSS)", f"{memory_usage['rss']:.0f} MB")
+        col2.metric("Page Runs", page['count'] if page else 0)
+        col3.metric("Page p95", f"{page['p95_ms']:.0f} ms" if page else "–")
+
+        if not latencies:
+            st.info("No timings recorded yet")
+            return
+        ms_format = "%.1f"
+        st.dataframe(
+            pd.DataFrame(latencies),
+            column_config={
+                'metric': "Metric",
+                'labels': "Labels",
+                'count': "Count",
+                'mean_ms': st.column_config.NumberColumn("Mean (ms)", format=ms_format),
+                'p50_ms': st.column_config.NumberColumn("p50 (ms)", format=ms_format),
+                'p95_ms': st.column_config.NumberColumn("p95 (ms)", format=ms_format),
+                'p99_ms': st.column_config.NumberColumn("p99 (ms)", format=ms_format),
+                'max_ms': st.column_config.NumberColumn("Max (ms)", format=ms_format)
+            },
+            hide_index=True,
+            use_container_width=True
+        )
+        st.caption("Percentiles are interpolated within latency buckets, so they are approximate.")
+
+        counters = registry.counter_summary()
+        if counters:
+            st.dataframe(
+                pd.DataFrame(counters),
+                column_config={'metric': "Metric", 'labels': "Labels", 'value': "Value"},
+                hide_index=True,
+                use_container_width=True
             )
-            st.plotly_chart(fig, use_container_width=True)
 
-# Footer
-st.markdown("---")
-st.markdown(
-    """
-    <div style='text-align: center'>
-        <small>Data refreshed at: {}</small>
-    </div>
-    """.format(format_date(datetime.now(timezone.utc))),
-    unsafe_allow_html=True
-)
\ No newline at end of file
+    # Only the selected view is computed; st.tabs would run both on every rerun
+    active_view = st.radio(
+        "View",
+        ["📊 Dashboard", "📈 Detailed Analysis", "🩺 Ingest Health", "⏱️ Diagnostics"],
+        horizontal=True,
+        key="active_view",
+        label_visibility="collapsed"
+    )
+
+    if active_view == "📊 Dashboard":
+        # Get visible sections in correct order
+        visible_sections = sorted(
+            [(section_id, section) for section_id, section in st.session_state.dashboard_sections.items() if section['visible']],
+            key=lambda x: x[1]['order']
+        )
+
+        for section_id, section in visible_sections:
+            with timed('section_render_seconds', section=section_id):
+                if section_id == 'briefing':
+                    render_briefing_section(section["title"], filtered_items)
+                elif section_id == 'timeline':
+                    render_timeline_section(section['title'], filtered_items, filter_key)
+                elif section_id == 'updates_stats':
+                    render_updates_stats_section(filtered_items, filter_key)
+    elif active_view == "📈 Detailed Analysis":
+        with timed('section_render_seconds', section='detailed_analysis'):
+            render_detailed_analysis(filtered_items, filter_key)
+    elif active_view == "🩺 Ingest Health":
+        with timed('section_render_seconds', section='ingest_health'):
+            render_ingest_health()
+    else:
+        render_diagnostics()
+
+    # Footer
+    st.markdown("---")
+    st.markdown(
+        """
+        <div style='text-align: center'>
+            <small>Data refreshed at: {}</small>
+        </div>
+        """.format(format_date(datetime.now(timezone.utc))),
+        unsafe_allow_html=True
+    )
+
+render_page()
@@ -29,4 +29,75 @@ CREATE TABLE news (
     updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
 );
 
-ALTER TABLE news ADD CONSTRAINT unique_title_source UNIQUE (title, source);
\ No newline at end of file
+ALTER TABLE news ADD CONSTRAINT unique_title_source UNIQUE (title, source);
+
+-- New-item notifications re-read the last few minutes of inserts
+CREATE INDEX idx_news_created ON news (created_at);
+CREATE INDEX idx_events_created ON events (created_at);
+
+CREATE TABLE feeds (
+    id SERIAL PRIMARY KEY,
+    name VARCHAR(255) UNIQUE NOT NULL,
+    url TEXT NOT NULL,
+    category VARCHAR(255) NOT NULL,
+    enabled BOOLEAN NOT NULL DEFAULT TRUE,
+    poll_interval_seconds INTEGER NOT NULL DEFAULT 1800,
+    next_poll_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    last_polled_at TIMESTAMP WITH TIME ZONE,
+    newest_entry_at TIMESTAMP WITH TIME ZONE,
+    lease_owner VARCHAR(255),
+    lease_expires_at TIMESTAMP WITH TIME ZONE,
+    consecutive_failures INTEGER NOT NULL DEFAULT 0,
+    circuit_open_until TIMESTAMP WITH TIME ZONE,
+    last_error TEXT,
+    last_success_at TIMESTAMP WITH TIME ZONE,
+    last_failure_at TIMESTAMP WITH TIME ZONE,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX idx_feeds_due ON feeds (next_poll_at) WHERE enabled;
+
+CREATE TABLE feed_runs (
+    run_id UUID PRIMARY KEY,
+    feed_name VARCHAR(255) NOT NULL,
+    started_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    duration_ms INTEGER,
+    fetch_ms INTEGER,
+    parse_ms INTEGER,
+    bytes INTEGER,
+    http_status SMALLINT,
+    entry_count INTEGER,
+    skipped_count INTEGER NOT NULL DEFAULT 0,
+    truncated BOOLEAN NOT NULL DEFAULT FALSE,
+    error TEXT
+);
+
+CREATE INDEX idx_feed_runs_started ON feed_runs (started_at);
+
+-- Write outcomes of each feed run, one row per batch the run's entries were
+-- saved in; a replayed batch maps to the same row and is not counted twice
+CREATE TABLE feed_run_batches (
+    run_id UUID NOT NULL,
+    batch_id CHAR(32) NOT NULL,
+    created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    db_ms INTEGER NOT NULL DEFAULT 0,
+    new_count INTEGER NOT NULL DEFAULT 0,
+    updated_count INTEGER NOT NULL DEFAULT 0,
+    duplicate_count INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (run_id, batch_id)
+);
+
+CREATE INDEX idx_feed_run_batches_created ON feed_run_batches (created_at);
+
+CREATE TABLE briefings (
+    fingerprint CHAR(64) PRIMARY KEY,
+    content TEXT NOT NULL,
+    event_keys JSONB NOT NULL,
+    event_count INTEGER NOT NULL,
+    model VARCHAR(255),
+    generation_ms INTEGER,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX idx_briefings_created ON briefings (created_at);
@@ -0,0 +1,178 @@
+import time
+import socket
+from datetime import datetime, timedelta, timezone
+import pytest
+from tenacity import wait_none
+import utils.ai_briefing as ai_briefing
+from utils.ai_briefing import BriefingService
+from utils.mock_completion_server import start_server
+
+NOW = datetime.now(timezone.utc)
+
+def events(count):
+    # No shared title words, so the prompt has a line per event
+    return [{'title': f"Contract{number} awarded to vendor{number}", 'description': "Details of the award.",
+             'category': 'Military Space', 'date': NOW - timedelta(minutes=number)}
+            for number in range(count)]
+
+@pytest.fixture
+def store(monkeypatch):
+    """Briefings persisted by this or another dashboard process"""
+    rows = {}
+
+    def save_briefing(fingerprint, content, event_keys, model, generation_ms):
+        rows[fingerprint] = {'fingerprint': fingerprint, 'content': content,
+                             'event_keys': sorted(event_keys), 'created_at': datetime.now(timezone.utc)}
+
+    monkeypatch.setattr(ai_briefing, 'get_briefing', rows.get)
+    monkeypatch.setattr(ai_briefing, 'save_briefing', save_briefing)
+    monkeypatch.setattr(ai_briefing, 'get_recent_briefings', lambda limit: list(rows.values())[-limit:])
+    return rows
+
+@pytest.fixture
+def completions(monkeypatch):
+    """Point the shared client at a local mock server streaming a word every 20 ms"""
+    server = start_server(delay=0.02)
+
+    def use(base_url):
+        monkeypatch.setattr(ai_briefing, 'OPENAI_BASE_URL', base_url)
+        monkeypatch.setattr(ai_briefing, '_client', None)
+
+    monkeypatch.delenv('OPENAI_API_KEY', raising=False)
+    # Don't wait between the client's retries of a failed request
+    monkeypatch.setattr(ai_briefing.request_briefing.retry, 'wait', wait_none())
+    use(f"http://127.0.0.1:{server.server_port}/v1")
+    yield use
+    server.shutdown()
+    server.server_close()
+
+def wait_for(service, recent, statuses, timeout=10):
+    deadline = time.monotonic() + timeout
+    while True:
+        state = service.get(recent)
+        if state.status in statuses or time.monotonic() > deadline:
+            return state
+        time.sleep(0.005)
+
+def test_briefing_goes_from_pending_through_streaming_to_ready(store, completions):
+    service = BriefingService(mode='ai')
+    recent = events(3)
+
+    assert service.get(recent) == ai_briefing.BriefingState(None, 'pending')
+    streaming = wait_for(service, recent, {'streaming', 'ready'})
+    assert streaming.status == 'streaming'
+
+    ready = wait_for(service, recent, {'ready'})
+    assert ready.content.startswith("**Situation summary:** 3 reported developments.")
+    assert ready.content.startswith(streaming.content)
+    assert len(streaming.content) < len(ready.content)
+    assert [row['content'] for row in store.values()] == [ready.content]
+
+def test_earlier_briefing_is_shown_while_a_similar_set_is_generated(store, completions):
+    service = BriefingService(mode='ai')
+    first = wait_for(service, events(4), {'ready'})
+
+    # Three new events are a material change, but the sets are still similar
+    recent = events(7)
+    stale = service.get(recent)
+    assert stale.status == 'stale'
+    assert (stale.content, stale.created_at) == (first.content, first.created_at)
+
+    updated = wait_for(service, recent, {'ready'})
+    assert updated.content.startswith("**Situation summary:** 7 reported developments.")
+    assert len(store) == 2
+
+def test_failed_briefing_is_retried_after_the_retry_interval(store, completions, monkeypatch):
+    monkeypatch.setattr(ai_briefing, 'BRIEFING_RETRY_SECONDS', 0.5)
+    # Nothing listens here, so every attempt is refused
+    with socket.socket() as unused:
+        unused.bind(('127.0.0.1', 0))
+        port = unused.getsockname()[1]
+    completions(f"http://127.0.0.1:{port}/v1")
+
+    service = BriefingService(mode='auto')
+    recent = events(3)
+    failed = wait_for(service, recent, {'error'})
+    # In auto mode the local summary stands in for the failed briefing
+    assert failed.content.startswith("**Automatic summary of 3 updates")
+    assert failed.error == ai_briefing.describe_briefing_error(ConnectionError())
+    assert service.get(recent).status == 'error'
+    assert not service.pending
+
+    server = start_server()
+    try:
+        completions(f"http://127.0.0.1:{server.server_port}/v1")
+        time.sleep(0.5)
+        assert service.get(recent).status == 'pending'
+        ready = wait_for(service, recent, {'ready'})
+        assert ready.content.startswith("**Situation summary:** 3 reported developments.")
+    finally:
+        server.shutdown()
+        server.server_close()
+
+class FakeCompose:
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, recent_events, on_delta):
+        self.calls += 1
+        return f"Briefing of {len(recent_events)} events"
+
+def persisted(store, recent, content, age):
+    event_keys = [ai_briefing.event_key(event) for event in recent]
+    fingerprint = ai_briefing.briefing_fingerprint(frozenset(event_keys))
+    store[fingerprint] = {'fingerprint': fingerprint, 'content': content, 'event_keys': event_keys,
+                          'created_at': datetime.now(timezone.utc) - age}
+    return store[fingerprint]
+
+def test_material_change_needs_enough_events_or_share_of_them():
+    previous = frozenset(str(number) for number in range(10))
+    assert not ai_briefing.is_material_change(previous, previous)
+    assert not ai_briefing.is_material_change(previous, previous | {'new'}, min_changed=3, change_ratio=0.2)
+    assert ai_briefing.is_material_change(previous, previous - {'0', '1', '2'}, min_changed=3, change_ratio=0.2)
+    # One of five is a fifth of the set
+    assert ai_briefing.is_material_change(frozenset('abcd'), frozenset('abcde'), min_changed=3, change_ratio=0.2)
+
+def test_same_event_set_reuses_its_briefing(store):
+    compose = FakeCompose()
+    service = BriefingService(compose, mode='ai')
+    recent = events(5)
+
+    assert wait_for(service, recent, {'ready'}).content == "Briefing of 5 events"
+    # Order doesn't change the fingerprint
+    assert service.get(list(reversed(recent))).status == 'ready'
+    assert compose.calls == 1
+
+def test_immaterial_change_keeps_the_briefing(store):
+    compose = FakeCompose()
+    service = BriefingService(compose, mode='ai')
+    first = wait_for(service, events(10), {'ready'})
+
+    state = service.get(events(11))
+    assert (state.status, state.content, state.created_at) == ('ready', first.content, first.created_at)
+    assert not service.pending
+    assert compose.calls == 1
+
+def test_any_change_regenerates_once_the_briefing_is_old(store):
+    old = persisted(store, events(10), "Old briefing", timedelta(hours=ai_briefing.BRIEFING_MAX_AGE_HOURS + 1))
+    compose = FakeCompose()
+    service = BriefingService(compose, mode='ai')
+
+    # The identical set is still served as it is
+    assert service.get(events(10)) == ai_briefing.BriefingState("Old briefing", 'ready', old['created_at'])
+    stale = service.get(events(11))
+    assert (stale.status, stale.content) == ('stale', "Old briefing")
+    assert wait_for(service, events(11), {'ready'}).content == "Briefing of 11 events"
+    assert compose.calls == 1
+
+def test_persisted_briefings_are_served_without_generating(store):
+    persisted(store, events(5), "Stored briefing", timedelta(minutes=5))
+    compose = FakeCompose()
+    service = BriefingService(compose, mode='ai')
+    assert service.get(events(5)).content == "Stored briefing"
+
+    # Another process stores the next set after this one has loaded its cache
+    persisted(store, events(9), "Briefing from another process", timedelta(0))
+    assert service.get(events(9)).status == 'stale'
+    assert wait_for(service, events(9), {'ready'}).content == "Briefing from another process"
+    assert compose.calls == 0
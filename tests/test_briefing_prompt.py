@@ -0,0 +1,56 @@
+from datetime import datetime, timedelta, timezone
+from utils.briefing_prompt import build_prompt_plan, cluster_events, estimate_tokens
+
+NOW = datetime.now(timezone.utc)
+
+def event(title, hours_ago=1, description="Details of the report. " * 10, category='Space Industry'):
+    return {'title': title, 'description': description, 'category': category, 'date': NOW - timedelta(hours=hours_ago)}
+
+def distinct_events(count):
+    # No shared title words, so every event is its own cluster
+    return [event(f"Contract{number} awarded to vendor{number}", hours_ago=number) for number in range(count)]
+
+def test_duplicates_are_dropped_and_related_reports_clustered():
+    clusters = cluster_events([
+        event("Falcon rocket launches GPS satellite", hours_ago=1),
+        event("Falcon rocket launches GPS satellite today", hours_ago=2),
+        event("GPS satellite reaches orbit after Falcon launch", hours_ago=3, description="Longer " * 60),
+        event("Budget hearing scheduled", hours_ago=1),
+    ])
+
+    assert len(clusters) == 2
+    launch = clusters[0]
+    # The syndicated copy is dropped; the related report joins and leads with its longer text
+    assert launch.size == 2
+    assert launch.lead['title'] == "GPS satellite reaches orbit after Falcon launch"
+    assert clusters[1].lead['title'] == "Budget hearing scheduled"
+
+def test_small_day_fits_one_prompt():
+    plan = build_prompt_plan(distinct_events(3), budget=1000, map_reduce_tokens=2000)
+
+    assert not plan.map_reduce
+    assert (plan.included, plan.omitted) == (3, 0)
+    # Newest first
+    assert plan.chunks[0].splitlines()[0].startswith("- Contract0 awarded")
+
+def test_lines_past_the_budget_are_omitted_below_the_map_reduce_threshold():
+    events = distinct_events(10)
+    plan = build_prompt_plan(events, budget=200, map_reduce_tokens=10_000)
+
+    assert not plan.map_reduce
+    assert plan.included + plan.omitted == 10
+    assert plan.omitted > 0
+    body, note = plan.chunks[0].rsplit("\n", 1)
+    assert note == f"(+{plan.omitted} lower-priority items omitted)"
+    assert sum(estimate_tokens(line) + 1 for line in body.splitlines()) <= 200
+
+def test_busy_day_is_split_into_budgeted_chunks():
+    plan = build_prompt_plan(distinct_events(40), budget=300, map_reduce_tokens=600, max_chunks=3)
+
+    assert plan.map_reduce
+    assert len(plan.chunks) == 3
+    for chunk in plan.chunks:
+        lines = [line for line in chunk.splitlines() if line.startswith("- ")]
+        assert sum(estimate_tokens(line) + 1 for line in lines) <= 300
+    assert plan.included == sum(chunk.count("\n- ") + 1 for chunk in plan.chunks)
+    assert plan.chunks[-1].endswith(f"(+{plan.omitted} lower-priority items omitted)")
@@ -0,0 +1,60 @@
+from datetime import datetime, timedelta, timezone
+import pytest
+from utils.circuit_breaker import CircuitBreaker, cooldown_seconds
+
+def expire(breaker, name):
+    """Move the feed's cooldown into the past, as if it had run out"""
+    state = breaker.states[name]
+    breaker.restore(name, state['failures'], datetime.now(timezone.utc) - timedelta(seconds=1), state['last_error'])
+
+def cooldown_left(breaker, name):
+    return (breaker.states[name]['open_until'] - datetime.now(timezone.utc)).total_seconds()
+
+def test_circuit_opens_at_the_threshold():
+    breaker = CircuitBreaker(threshold=3, base_cooldown=60)
+    breaker.record_failure('feed', "timeout")
+    breaker.record_failure('feed', "timeout")
+    assert breaker.allow('feed')
+
+    state = breaker.record_failure('feed', "HTTP 503")
+    assert not breaker.allow('feed')
+    assert state['failures'] == 3 and state['last_error'] == "HTTP 503"
+    assert cooldown_left(breaker, 'feed') == pytest.approx(60, abs=5)
+    # Other feeds are unaffected
+    assert breaker.allow('other')
+
+def test_failed_trial_reopens_with_twice_the_cooldown():
+    breaker = CircuitBreaker(threshold=2, base_cooldown=60)
+    breaker.record_failure('feed', "timeout")
+    breaker.record_failure('feed', "timeout")
+    expire(breaker, 'feed')
+
+    # Half-open: one trial poll is let through
+    assert breaker.allow('feed')
+    breaker.record_failure('feed', "timeout")
+    assert not breaker.allow('feed')
+    assert cooldown_left(breaker, 'feed') == pytest.approx(120, abs=5)
+
+def test_successful_trial_closes_the_circuit():
+    breaker = CircuitBreaker(threshold=2, base_cooldown=60)
+    breaker.record_failure('feed', "timeout")
+    breaker.record_failure('feed', "timeout")
+    expire(breaker, 'feed')
+
+    assert breaker.record_success('feed')
+    assert breaker.allow('feed')
+    assert breaker.states['feed'] == {'failures': 0, 'open_until': None, 'last_error': None}
+    # A single failure after closing doesn't reopen it
+    breaker.record_failure('feed', "timeout")
+    assert breaker.allow('feed')
+    assert not CircuitBreaker().record_success('healthy')
+
+def test_restored_open_circuit_is_honoured():
+    breaker = CircuitBreaker()
+    breaker.restore('feed', 5, datetime.now(timezone.utc) + timedelta(minutes=10), "timeout")
+    assert not breaker.allow('feed')
+
+def test_cooldown_doubles_up_to_the_maximum():
+    assert cooldown_seconds(2, base=300, threshold=3) == 0.0
+    assert [cooldown_seconds(failures, base=300, threshold=3) for failures in (3, 4, 5)] == [300, 600, 1200]
+    assert cooldown_seconds(30, base=300, threshold=3, maximum=3600) == 3600
@@ -0,0 +1,80 @@
+import io
+import pytest
+import utils.data_fetcher as data_fetcher
+from utils.circuit_breaker import CircuitBreaker
+from utils.seen_index import SeenIndex
+
+SOURCE = {'name': 'Archive', 'url': 'https://example.com/archive.xml', 'category': 'Test', 'streaming': True}
+
+def rss(count):
+    items = "".join(
+        f"<item><title>Entry {number}</title><guid>guid-{number}</guid>"
+        f"<link>https://example.com/{number}</link><pubDate>Mon, 03 Jun 2024 10:00:00 GMT</pubDate></item>"
+        for number in range(count)
+    )
+    return f"<rss version='2.0'><channel><title>Archive</title>{items}</channel></rss>".encode()
+
+class FakeResponse:
+    def __init__(self, body):
+        self.status_code = 200
+        self.headers = {}
+        self.raw = io.BytesIO(body)
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+@pytest.fixture
+def feed(monkeypatch):
+    body = {'xml': rss(7)}
+    monkeypatch.setattr(data_fetcher, 'download_feed', lambda url: FakeResponse(body['xml']))
+    monkeypatch.setattr(data_fetcher, 'check_robots_txt', lambda url: True)
+    monkeypatch.setattr(data_fetcher.rate_limiter, 'wait', lambda domain: None)
+    monkeypatch.setattr(data_fetcher, 'feed_breaker', CircuitBreaker())
+    monkeypatch.setattr(data_fetcher, 'persist_breaker_state', lambda *args: None)
+    monkeypatch.setattr(data_fetcher, 'IMAGE_PREFETCH', False)
+    monkeypatch.setattr(data_fetcher, 'FEED_MAX_ENTRIES_PER_RUN', 3)
+    monkeypatch.setattr(data_fetcher, 'PROCESS_CHUNK_SIZE', 2)
+    return body
+
+class RecordingSink:
+    def __init__(self):
+        self.items = []
+        self.runs = []
+
+    def __call__(self, items, runs):
+        self.items.extend(items)
+        self.runs.extend(runs)
+
+def titles(result):
+    return [item['title'] for item in result.items]
+
+def test_cap_counts_only_new_entries(feed, tmp_path):
+    seen = SeenIndex(str(tmp_path / "seen.sqlite3"))
+    sink = RecordingSink()
+
+    first = data_fetcher.fetch_feed_entries(SOURCE, sink, seen)
+    second = data_fetcher.fetch_feed_entries(SOURCE, sink, seen)
+    third = data_fetcher.fetch_feed_entries(SOURCE, sink, seen)
+
+    assert titles(first) == ["Entry 0", "Entry 1", "Entry 2"]
+    assert titles(second) == ["Entry 3", "Entry 4", "Entry 5"]
+    assert titles(third) == ["Entry 6"]
+    assert [run['skipped_count'] for run in sink.runs] == [0, 3, 6]
+    assert [run['truncated'] for run in sink.runs] == [True, True, False]
+
+def test_run_that_meets_the_cap_exactly_is_not_truncated(feed):
+    feed['xml'] = rss(3)
+    sink = RecordingSink()
+    data_fetcher.fetch_feed_entries(SOURCE, sink)
+    assert sink.runs[0]['truncated'] is False
+
+def test_cap_without_seen_index(feed):
+    sink = RecordingSink()
+    assert titles(data_fetcher.fetch_feed_entries(SOURCE, sink)) == ["Entry 0", "Entry 1", "Entry 2"]
+    assert len(sink.items) == 3
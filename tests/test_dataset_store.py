@@ -0,0 +1,49 @@
+import time
+from datetime import datetime, timedelta, timezone
+import pytest
+import utils.dataset_store as dataset_store
+from utils.dataset_store import get_dataset_snapshot, get_dataset_store
+
+@pytest.fixture
+def database(monkeypatch):
+    rows = {'news': [{'title': "First", 'created_at': datetime.now(timezone.utc) - timedelta(minutes=5)}]}
+    monkeypatch.setattr(dataset_store, 'get_news', lambda: list(rows['news']))
+    monkeypatch.setattr(dataset_store, 'get_events', lambda: [])
+    monkeypatch.setattr(dataset_store, 'DATASET_TTL_SECONDS', 60)
+    get_dataset_store().snapshot = None
+    return rows
+
+def wait_for_refresh():
+    deadline = time.monotonic() + 5
+    while dataset_store.is_refresh_in_progress() and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+def test_stale_snapshot_is_served_while_it_revalidates(database):
+    first = get_dataset_snapshot()
+    assert [item['title'] for item in first.news] == ["First"]
+    assert 4 <= first.data_age_seconds() / 60 < 6
+
+    database['news'].append({'title': "Second", 'created_at': datetime.now(timezone.utc)})
+    # Still fresh: no reload
+    assert get_dataset_snapshot() is first
+
+    get_dataset_store().snapshot = first._replace(published_at=first.published_at - timedelta(seconds=61))
+    assert get_dataset_snapshot().version == first.version
+    wait_for_refresh()
+
+    refreshed = get_dataset_snapshot()
+    assert refreshed.version > first.version
+    assert [item['title'] for item in refreshed.news] == ["First", "Second"]
+    assert refreshed.data_age_seconds() < 60
+
+def test_versions_are_unique_across_stores():
+    first = dataset_store.DatasetStore().publish([], [])
+    second = dataset_store.DatasetStore().publish([], [])
+    assert second.version > first.version
+
+def test_store_survives_a_cache_resource_clear(database):
+    import streamlit as st
+
+    snapshot = get_dataset_snapshot()
+    st.cache_resource.clear()
+    assert get_dataset_store().current() is snapshot
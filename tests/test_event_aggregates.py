@@ -0,0 +1,72 @@
+import random
+from datetime import datetime, timedelta, timezone
+import numpy as np
+import pandas as pd
+import pytest
+import utils.event_aggregates as event_aggregates
+from utils.event_aggregates import compute_aggregates
+from utils.event_analyzer import generate_event_stats, analyze_category_trends, generate_event_heatmap
+
+def make_events(tz, count=2000, days=120):
+    rng = random.Random(7)
+    start = datetime.now(timezone.utc).astimezone(tz) - timedelta(days=days)
+    return [
+        {
+            'date': start + timedelta(seconds=rng.randrange(days * 86400)),
+            'category': rng.choice(['Launch', 'Policy', 'Budget', 'Training']),
+            'title': f"Event {index}"
+        }
+        for index in range(count)
+    ]
+
+@pytest.fixture
+def pandas_path(monkeypatch):
+    """Keep the analyzers on the pandas path unless handed aggregates"""
+    monkeypatch.setattr(event_aggregates, 'AGGREGATE_MIN_EVENTS', 10**9)
+
+@pytest.mark.parametrize("tz", [
+    timezone.utc,
+    timezone(timedelta(hours=-5)),
+    timezone(timedelta(hours=9, minutes=30)),
+])
+def test_aggregates_match_pandas(pandas_path, tz):
+    events = make_events(tz)
+    aggregates = compute_aggregates(events)
+
+    assert generate_event_stats(events, aggregates) == generate_event_stats(events)
+
+    expected = analyze_category_trends(events)
+    actual = analyze_category_trends(events, aggregates)
+    pd.testing.assert_frame_equal(actual, expected, check_dtype=False)
+
+    np.testing.assert_array_equal(
+        generate_event_heatmap(events, aggregates).data[0].z,
+        generate_event_heatmap(events).data[0].z
+    )
+
+def test_day_and_hour_use_the_events_own_timezone():
+    eastern = timezone(timedelta(hours=-5))
+    # 23:30 on a Sunday in UTC-5 is 04:30 on Monday in UTC
+    events = [{'date': datetime(2024, 6, 2, 23, 30, tzinfo=eastern), 'category': 'Launch'}]
+    aggregates = compute_aggregates(events)
+
+    assert aggregates['weekday_hour_counts'][6, 23] == 1
+    assert generate_event_stats(events, aggregates)['busiest_day'] == datetime(2024, 6, 2).date()
+
+def test_naive_dates_are_utc():
+    events = [
+        {'date': datetime(2024, 6, 3, 1, 0), 'category': 'Launch'},
+        {'date': datetime(2024, 6, 3, 1, 0, tzinfo=timezone.utc), 'category': 'Policy'},
+    ]
+    aggregates = compute_aggregates(events)
+    assert aggregates['weekday_hour_counts'][0, 1] == 2
+
+def test_large_windows_are_analyzed_off_the_calling_thread(monkeypatch):
+    import threading
+
+    monkeypatch.setattr(event_aggregates, 'BACKGROUND_MIN_EVENTS', 3)
+    assert not event_aggregates.should_run_in_background(make_events(timezone.utc, count=2))
+    assert event_aggregates.should_run_in_background(make_events(timezone.utc, count=3))
+
+    job = event_aggregates.submit_analysis(lambda: threading.current_thread().name)
+    assert job.result(timeout=5).startswith('analytics')
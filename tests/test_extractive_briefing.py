@@ -0,0 +1,60 @@
+from datetime import datetime, timedelta, timezone
+from utils.extractive_briefing import extractive_briefing, rank_sentences, split_sentences
+
+NOW = datetime.now(timezone.utc)
+
+def event(title, description, category, hours_ago=1):
+    return {'title': title, 'description': description, 'category': category, 'date': NOW - timedelta(hours=hours_ago)}
+
+EVENTS = [
+    event("Satellite launch succeeds",
+          "The GPS satellite reached its planned orbit on Tuesday. Engineers confirmed the satellite is healthy "
+          "and deploying its solar arrays. Launch crews will now prepare the next booster for flight.",
+          'Military Space'),
+    event("Tracking radar contract awarded",
+          "A radar contract worth two billion dollars was awarded to a major vendor. The radar will track "
+          "debris and satellites in low orbit.",
+          'Military Space', hours_ago=2),
+    event("Guardians graduate", "Short.", 'Official Updates', hours_ago=3),
+]
+
+def bullets(section):
+    return [line[2:] for line in section.splitlines() if line.startswith("- ")]
+
+def test_sentences_split_on_terminal_punctuation():
+    assert split_sentences("First one here. Second &amp; last!  ") == ["First one here.", "Second & last!"]
+    assert split_sentences("Version 2.5 ships. Next") == ["Version 2.5 ships.", "Next"]
+
+def test_near_duplicate_sentences_are_not_both_picked():
+    ranked = rank_sentences([
+        "The satellite reached orbit on Tuesday morning",
+        "The satellite reached orbit on Tuesday morning again",
+        "Budget talks resume in the committee next week",
+    ])
+    assert sorted(ranked) in ([0, 2], [1, 2])
+
+def test_briefing_has_a_section_per_category_with_picked_sentences():
+    summary = extractive_briefing(EVENTS, sentences_per_category=2)
+    header, military, official = summary.split("\n\n")
+
+    assert header == "**Automatic summary of 3 updates from the last 24 hours**"
+    # Categories are ordered by how many updates they have
+    assert military.startswith("**Military Space** (2 updates)")
+    assert official.startswith("**Official Updates** (1 update)")
+
+    picked = bullets(military)
+    assert len(picked) == 2
+    # Both stories are covered before either gets a second sentence
+    assert any("radar" in sentence.lower() for sentence in picked)
+    assert any("satellite" in sentence.lower() and "radar" not in sentence.lower() for sentence in picked)
+    # Without a usable description the headline stands in
+    assert bullets(official) == ["Guardians graduate"]
+
+def test_output_is_escaped_and_deterministic():
+    events = EVENTS + [event("<b>Bold</b> claim", "", 'Space <Industry>')]
+    summary = extractive_briefing(events)
+
+    assert "&lt;b&gt;Bold&lt;/b&gt; claim" in summary
+    assert "**Space &lt;Industry&gt;** (1 update)" in summary
+    assert extractive_briefing(list(events)) == summary
+    assert extractive_briefing([]) == ""
@@ -0,0 +1,45 @@
+import io
+import xml.etree.ElementTree as ET
+import pytest
+import utils.fallback_illustrations as fallback
+from utils.fallback_illustrations import KNOWN_CATEGORIES, PATTERN_SHAPES
+
+@pytest.fixture
+def asset_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(fallback, 'FALLBACK_DIR', str(tmp_path))
+    monkeypatch.setattr(fallback, '_asset_urls', {})
+    return tmp_path
+
+@pytest.mark.parametrize("category", KNOWN_CATEGORIES + ('Other',))
+def test_svg_draws_every_shape_of_the_pattern(category):
+    pattern = fallback.get_category_pattern(category)['pattern']
+    svg = ET.fromstring(fallback.generate_fallback_svg(category))
+    background, *drawn = [element for element in svg if not element.tag.endswith('defs')]
+
+    assert background.get('fill') == "url(#bg)"
+    assert len(drawn) == len(PATTERN_SHAPES.get(pattern, PATTERN_SHAPES['default']))
+
+def test_png_matches_the_svg_viewbox_at_render_scale():
+    from PIL import Image
+
+    image = Image.open(io.BytesIO(fallback.render_fallback_png('Military Space')))
+    assert image.size == (120 * fallback.RENDER_SCALE, 90 * fallback.RENDER_SCALE)
+    assert image.mode == 'RGBA'
+
+def test_asset_name_follows_the_shapes(monkeypatch):
+    before = fallback.asset_name('Military Space')
+    monkeypatch.setitem(PATTERN_SHAPES, 'circuit', PATTERN_SHAPES['circuit'][:1])
+    assert fallback.asset_name('Military Space') != before
+
+def test_failed_render_is_retried(asset_dir, monkeypatch):
+    def broken(category):
+        raise OSError("read-only file system")
+
+    render = fallback.render_fallback_png
+    monkeypatch.setattr(fallback, 'render_fallback_png', broken)
+    assert fallback.ensure_fallback_asset('Space Science') is None
+
+    monkeypatch.setattr(fallback, 'render_fallback_png', render)
+    url = fallback.ensure_fallback_asset('Space Science')
+    assert url == fallback.FALLBACK_URL_PREFIX + fallback.asset_name('Space Science')
+    assert (asset_dir / fallback.asset_name('Space Science')).exists()
@@ -0,0 +1,79 @@
+import time
+from datetime import datetime, timedelta, timezone
+import pytest
+import utils.feed_scheduler as scheduler_module
+from utils.feed_scheduler import FeedScheduler, estimate_publish_interval, next_poll_interval, with_jitter
+
+SOURCE = {'name': 'Test Feed', 'url': 'https://example.com/feed.xml'}
+START = datetime(2024, 6, 3, tzinfo=timezone.utc)
+
+def hourly(count, start=START):
+    return [start + timedelta(hours=hour) for hour in range(count)]
+
+def test_publish_interval_is_the_median_gap():
+    dates = [START, START + timedelta(hours=1), START + timedelta(hours=2), START + timedelta(hours=10)]
+    assert estimate_publish_interval(dates) == 3600
+    assert estimate_publish_interval([START, START]) is None
+
+def test_productive_polls_move_toward_twice_the_publish_rate():
+    # Hourly feed: the target is 30 minutes, approached halfway per poll
+    assert next_poll_interval(7200, hourly(5), new_entries=2, min_interval=60, max_interval=86400) == 4500
+    # Unknown cadence: halve toward half the current interval
+    assert next_poll_interval(1200, hourly(1), new_entries=1, min_interval=60, max_interval=86400) == 900
+
+def test_empty_or_failed_polls_back_off_within_bounds():
+    assert next_poll_interval(1000, hourly(5), new_entries=0, min_interval=60, max_interval=86400) == 1500
+    assert next_poll_interval(1000, hourly(5), new_entries=3, failed=True, min_interval=60, max_interval=86400) == 1500
+    assert next_poll_interval(20000, [], new_entries=0, min_interval=60, max_interval=21600) == 21600
+    every_minute = [START + timedelta(minutes=minute) for minute in range(5)]
+    assert next_poll_interval(400, every_minute, new_entries=3, min_interval=300, max_interval=21600) == 300
+
+def test_jitter_stays_within_its_fraction():
+    samples = [with_jitter(1000, jitter=0.1) for _ in range(500)]
+    assert all(900 <= sample <= 1100 for sample in samples)
+    assert max(samples) - min(samples) > 0
+
+def test_scheduler_counts_only_entries_newer_than_the_last_poll(monkeypatch):
+    monkeypatch.setattr(scheduler_module, 'with_jitter', lambda interval: interval)
+    scheduler = FeedScheduler([SOURCE], default_interval=7200, min_interval=60, max_interval=86400)
+    assert scheduler.due_sources() == [SOURCE]
+
+    assert scheduler.record_poll(SOURCE, hourly(5)) == 4500
+    # Same entries again: nothing new, so it backs off
+    assert scheduler.record_poll(SOURCE, hourly(5)) == 6750
+    assert scheduler.due_sources() == []
+    assert scheduler.seconds_until_next_poll() == pytest.approx(6750, abs=5)
+
+def test_scheduled_poll_is_jittered():
+    scheduler = FeedScheduler([SOURCE], default_interval=1000, min_interval=60, max_interval=86400)
+    before = time.monotonic()
+    interval = scheduler.record_poll(SOURCE, [], failed=True)
+
+    delay = scheduler.states['Test Feed']['next_poll'] - before
+    assert interval == 1500
+    assert 1500 * (1 - scheduler_module.POLL_JITTER) - 1 <= delay <= 1500 * (1 + scheduler_module.POLL_JITTER) + 1
+
+def test_skipped_poll_keeps_the_interval(monkeypatch):
+    monkeypatch.setattr(scheduler_module, 'with_jitter', lambda interval: interval)
+    scheduler = FeedScheduler([SOURCE], default_interval=1000, min_interval=60, max_interval=86400)
+
+    assert scheduler.record_skip(SOURCE) == 1000
+    assert scheduler.record_skip(SOURCE) == 1000
+    assert scheduler.due_sources() == []
+    assert scheduler.seconds_until_next_poll() == pytest.approx(1000, abs=5)
+
+def test_circuit_open_feeds_are_not_backed_off_twice(monkeypatch):
+    import utils.ingest as ingest
+    from utils.data_fetcher import FeedCircuitOpenError, FeedFetchError, FeedResult
+
+    other = {'name': 'Other Feed', 'url': 'https://example.com/other.xml'}
+    monkeypatch.setattr(scheduler_module, 'with_jitter', lambda interval: interval)
+    monkeypatch.setattr(ingest, 'fetch_sources', lambda sources, sink, deadline, seen: [
+        (SOURCE, FeedResult([], []), FeedCircuitOpenError("Circuit open for Test Feed")),
+        (other, FeedResult([], []), FeedFetchError("timeout")),
+    ])
+    scheduler = FeedScheduler([SOURCE, other], default_interval=1000, min_interval=60, max_interval=86400)
+
+    ingest.poll_due_feeds(scheduler, sink=None)
+    assert scheduler.states['Test Feed']['interval'] == 1000
+    assert scheduler.states['Other Feed']['interval'] == 1500
@@ -0,0 +1,76 @@
+import io
+import itertools
+import xml.etree.ElementTree as ET
+import pytest
+from utils.feed_stream import CountingReader, iter_feed_entries
+
+RSS = b"""<?xml version="1.0"?>
+<rss version="2.0" xmlns:media="http://search.yahoo.com/mrss/">
+  <channel>
+    <title>Launches</title>
+    <item>
+      <title>First launch</title>
+      <link>https://example.com/1</link>
+      <guid>guid-1</guid>
+      <description>&lt;p&gt;Liftoff&lt;/p&gt;</description>
+      <pubDate>Mon, 03 Jun 2024 10:00:00 GMT</pubDate>
+      <enclosure url="https://example.com/1.jpg" type="image/jpeg"/>
+      <media:thumbnail url="https://example.com/1-thumb.jpg"/>
+    </item>
+    <item><title>Second launch</title><link>https://example.com/2</link></item>
+    <item><title>Third launch</title><link>https://example.com/3</link></item>
+  </channel>
+</rss>
+"""
+
+ATOM = b"""<?xml version="1.0"?>
+<feed xmlns="http://www.w3.org/2005/Atom">
+  <title>Policy</title>
+  <entry>
+    <title>New directive</title>
+    <id>urn:uuid:1</id>
+    <link rel="alternate" href="https://example.com/directive"/>
+    <link rel="enclosure" type="image/png" href="https://example.com/directive.png"/>
+    <content type="xhtml"><div xmlns="http://www.w3.org/1999/xhtml"><p>Signed <b>today</b></p></div></content>
+    <published>2024-06-03T10:00:00Z</published>
+    <updated>2024-06-04T08:00:00Z</updated>
+  </entry>
+  <entry><title>Second</title><id>urn:uuid:2</id></entry>
+</feed>
+"""
+
+def test_rss_items_are_normalized():
+    first, second, third = iter_feed_entries(io.BytesIO(RSS))
+
+    assert first['title'] == "First launch"
+    assert first['link'] == "https://example.com/1"
+    assert first['id'] == "guid-1"
+    assert first['summary'] == "<p>Liftoff</p>"
+    assert first['published'] == "Mon, 03 Jun 2024 10:00:00 GMT"
+    assert first['links'][0]['href'] == "https://example.com/1.jpg"
+    assert first['media_thumbnail'][0]['url'] == "https://example.com/1-thumb.jpg"
+    assert [second['title'], third['title']] == ["Second launch", "Third launch"]
+
+def test_atom_entries_are_normalized():
+    first, second = iter_feed_entries(io.BytesIO(ATOM))
+
+    assert first['title'] == "New directive"
+    assert first['id'] == "urn:uuid:1"
+    assert first['link'] == "https://example.com/directive"
+    assert first['summary'] == "<div><p>Signed <b>today</b></p></div>"
+    assert first['published'] == "2024-06-03T10:00:00Z"
+    assert first['updated'] == "2024-06-04T08:00:00Z"
+    assert [link['rel'] for link in first['links']] == ["alternate", "enclosure"]
+    assert second['title'] == "Second"
+
+def test_stopping_early_leaves_the_rest_unread():
+    items = b"".join(b"<item><title>Entry %d</title></item>" % number for number in range(5000))
+    reader = CountingReader(io.BytesIO(b"<rss><channel>" + items + b"</channel></rss>"))
+
+    entries = list(itertools.islice(iter_feed_entries(reader), 2))
+    assert [entry['title'] for entry in entries] == ["Entry 0", "Entry 1"]
+    assert reader.bytes_read < len(items)
+
+def test_malformed_xml_raises_parse_error():
+    with pytest.raises(ET.ParseError):
+        list(iter_feed_entries(io.BytesIO(b"<rss><channel><item><title>Broken</item>")))
@@ -0,0 +1,171 @@
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, HTTPServer
+import pytest
+import requests
+import utils.image_proxy as image_proxy_module
+from utils.image_proxy import ImageProxy, check_public_url, download_image
+
+@pytest.mark.parametrize("url", [
+    "http://127.0.0.1/a.png",
+    "http://localhost/a.png",
+    "http://10.1.2.3/a.png",
+    "http://192.168.0.10/a.png",
+    "http://169.254.169.254/latest/meta-data/",
+    "http://100.64.0.1/a.png",
+    "http://[::1]/a.png",
+    "http://[::ffff:127.0.0.1]/a.png",
+    "file:///etc/passwd",
+    "ftp://example.com/a.png",
+])
+def test_check_public_url_rejects_internal_targets(url):
+    with pytest.raises(ValueError):
+        check_public_url(url)
+
+def test_check_public_url_accepts_public_address():
+    assert check_public_url("https://93.184.216.34/image.jpg") == "93.184.216.34"
+
+class FakeResponse:
+    def __init__(self, status_code=200, headers=None, body=b""):
+        self.status_code = status_code
+        self.headers = headers or {}
+        self.body = body
+
+    @property
+    def is_redirect(self):
+        return self.status_code in (301, 302, 303, 307, 308) and 'location' in self.headers
+
+    def raise_for_status(self):
+        pass
+
+    def iter_content(self, chunk_size):
+        yield self.body
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+def test_download_image_checks_every_redirect(monkeypatch):
+    requested = []
+
+    def fake_get(session, url, address, **kwargs):
+        requested.append((url, address))
+        assert kwargs['allow_redirects'] is False
+        return FakeResponse(302, {'location': 'http://169.254.169.254/latest/meta-data/'})
+
+    monkeypatch.setattr(image_proxy_module, 'get_pinned', fake_get)
+    with pytest.raises(ValueError, match="non-public"):
+        download_image("https://93.184.216.34/image.jpg")
+    assert requested == [("https://93.184.216.34/image.jpg", "93.184.216.34")]
+
+def test_download_image_caps_redirects(monkeypatch):
+    monkeypatch.setattr(
+        image_proxy_module, 'get_pinned',
+        lambda session, url, address, **kwargs: FakeResponse(302, {'location': '/again'})
+    )
+    with pytest.raises(ValueError, match="redirects"):
+        download_image("https://93.184.216.34/image.jpg")
+
+def test_download_image_enforces_size_limit(monkeypatch):
+    monkeypatch.setattr(image_proxy_module, 'get_pinned',
+                        lambda session, url, address, **kwargs: FakeResponse(body=b"x" * 101))
+    with pytest.raises(ValueError, match="larger"):
+        download_image("https://93.184.216.34/image.jpg", max_bytes=100)
+
+def test_download_connects_to_the_checked_address(monkeypatch):
+    # The host would resolve somewhere else by the time of the download
+    monkeypatch.setattr(image_proxy_module.socket, 'getaddrinfo',
+                        lambda host, port, **kwargs: [(None, None, None, '', ('93.184.216.34', port))])
+    requested = []
+    monkeypatch.setattr(image_proxy_module, 'get_pinned',
+                        lambda session, url, address, **kwargs: requested.append(address) or FakeResponse(body=b"ok"))
+    assert download_image("https://images.example.com/a.png") == b"ok"
+    assert requested == ["93.184.216.34"]
+
+def test_pinned_request_keeps_the_hostname():
+    seen = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            seen.append((self.path, self.headers['Host']))
+            self.send_response(200)
+            self.end_headers()
+            self.wfile.write(b"image")
+
+        def log_message(self, *args):
+            pass
+
+    server = HTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        port = server.server_address[1]
+        # .invalid never resolves, so the request can only succeed through the pinned address
+        url = f"http://images.example.invalid:{port}/a.png?size=large"
+        with requests.Session() as session:
+            response = image_proxy_module.get_pinned(session, url, '127.0.0.1', timeout=5)
+        assert response.content == b"image"
+        assert seen == [("/a.png?size=large", f"images.example.invalid:{port}")]
+    finally:
+        server.shutdown()
+
+def test_pinned_https_verifies_the_original_hostname():
+    adapter = image_proxy_module.PinnedHostAdapter('images.example.com')
+    pool = adapter.poolmanager.connection_from_url("https://93.184.216.34/a.png")
+    assert pool.assert_hostname == 'images.example.com'
+    assert pool.conn_kw['server_hostname'] == 'images.example.com'
+
+def test_thumbnails_for_never_waits(tmp_path, monkeypatch):
+    proxy = ImageProxy(str(tmp_path))
+    monkeypatch.setattr(proxy, '_fetch', lambda url: time.sleep(1))
+    started = time.monotonic()
+    assert proxy.thumbnails_for(["https://93.184.216.34/a.jpg"]) == {}
+    assert time.monotonic() - started < 0.5
+
+def test_eviction_counts_files_written_by_other_processes(tmp_path):
+    dashboard = ImageProxy(str(tmp_path), max_bytes=250)
+    worker = ImageProxy(str(tmp_path), max_bytes=250)
+    dashboard._ensure_ready()
+    worker._ensure_ready()
+
+    now = time.time()
+    for age, name in enumerate(["c", "b", "a"]):
+        path = tmp_path / f"{name}{worker.extension}"
+        path.write_bytes(b"x" * 100)
+        # "a" is the least recently used
+        os.utime(path, (now - age * 10, now - age * 10))
+
+    # The dashboard has not seen the worker's files, but it must still
+    # count them when the budget is exceeded
+    with dashboard.lock:
+        dashboard.total_bytes = 300
+        dashboard._evict()
+    assert sorted(os.listdir(tmp_path)) == sorted([f"b{worker.extension}", f"c{worker.extension}"])
+
+
+def test_hits_are_written_to_disk_in_batches(tmp_path):
+    proxy = ImageProxy(str(tmp_path))
+    proxy._ensure_ready()
+    url = "https://93.184.216.34/a.jpg"
+    path = tmp_path / proxy.thumbnail_name(url)
+    path.write_bytes(b"x" * 100)
+    os.utime(path, (0, 0))
+    proxy._load_index()
+
+    # Rendering a card only marks it in memory
+    assert proxy.cached_url(url).endswith(path.name)
+    assert path.stat().st_mtime == 0
+    assert proxy.touched == {path.name}
+
+    proxy.flush_recency()
+    assert path.stat().st_mtime > 0
+    assert proxy.touched == set()
+
+    # Thumbnails deleted by another process are forgotten when flushed
+    proxy.cached_url(url)
+    path.unlink()
+    proxy.flush_recency()
+    assert proxy.cached_url(url) is None
+    assert proxy.total_bytes == 0
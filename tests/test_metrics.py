@@ -0,0 +1,67 @@
+import pytest
+import utils.metrics as metrics_module
+from utils.metrics import Histogram, MetricsRegistry, timed
+
+@pytest.fixture
+def registry(monkeypatch):
+    registry = MetricsRegistry()
+    monkeypatch.setattr(metrics_module, 'registry', registry)
+    return registry
+
+def test_quantile_interpolates_inside_the_bucket():
+    histogram = Histogram(buckets=(1.0, 2.0, 4.0))
+    for value in (0.5, 1.5, 1.5, 3.0):
+        histogram.observe(value)
+
+    assert histogram.quantile(0.25) == pytest.approx(1.0)
+    # Ranks 2 and 3 of 4 fall in the (1, 2] bucket holding two values
+    assert histogram.quantile(0.5) == pytest.approx(1.5)
+    assert histogram.quantile(0.75) == pytest.approx(2.0)
+    # Never above the largest value seen
+    assert histogram.quantile(1.0) == pytest.approx(3.0)
+
+def test_quantile_of_the_overflow_bucket_is_capped_at_the_max():
+    histogram = Histogram(buckets=(1.0,))
+    histogram.observe(5.0)
+    histogram.observe(9.0)
+
+    assert 1.0 < histogram.quantile(0.5) <= 9.0
+    assert histogram.quantile(0.99) <= 9.0
+    assert Histogram().quantile(0.5) == 0.0
+
+def test_prometheus_text_format(registry):
+    registry.inc('feed_runs_total', feed='Space "News"')
+    registry.set_gauge('spool_pending', 3)
+    for value in (0.002, 0.02, 99.0):
+        registry.observe('db_query_seconds', value, query='get_news')
+
+    lines = registry.render_prometheus().splitlines()
+
+    assert lines[:4] == [
+        '# TYPE feed_runs_total counter',
+        'feed_runs_total{feed="Space \\"News\\""} 1',
+        '# TYPE spool_pending gauge',
+        'spool_pending 3',
+    ]
+    assert lines[4] == '# TYPE db_query_seconds histogram'
+    buckets = [line for line in lines if line.startswith('db_query_seconds_bucket')]
+    assert len(buckets) == len(metrics_module.LATENCY_BUCKETS) + 1
+    assert 'db_query_seconds_bucket{query="get_news",le="0.0025"} 1' in buckets
+    assert 'db_query_seconds_bucket{query="get_news",le="0.025"} 2' in buckets
+    assert buckets[-1] == 'db_query_seconds_bucket{query="get_news",le="+Inf"} 3'
+    assert lines[-2] == 'db_query_seconds_sum{query="get_news"} 99.022000'
+    assert lines[-1] == 'db_query_seconds_count{query="get_news"} 3'
+
+class ScriptStop(BaseException):
+    """Stands in for the exception behind st.stop and st.rerun"""
+
+def test_timed_counts_errors_but_not_control_flow(registry):
+    with pytest.raises(ValueError):
+        with timed('page_render_seconds'):
+            raise ValueError("boom")
+    with pytest.raises(ScriptStop):
+        with timed('page_render_seconds'):
+            raise ScriptStop()
+
+    assert registry.histograms['page_render_seconds'][()].count == 2
+    assert registry.counters['page_render_errors_total'] == {(): 1.0}
@@ -0,0 +1,157 @@
+import time
+from datetime import datetime, timezone
+import pytest
+import utils.notification_dispatcher as dispatcher_module
+from utils.notification_dispatcher import NotificationDispatcher, InAppSink
+
+class FakeTable:
+    """News rows as another connection sees them: committed or not, recent or not"""
+
+    def __init__(self):
+        self.rows = {}
+
+    def insert(self, row_id, committed=True, recent=True):
+        self.rows[row_id] = {
+            'kind': 'news', 'id': row_id, 'title': f"Item {row_id}", 'category': 'Test',
+            'date': datetime.now(timezone.utc), 'committed': committed, 'recent': recent
+        }
+
+    def commit(self, row_id):
+        self.rows[row_id]['committed'] = True
+
+    def cursor(self):
+        return max((row_id for row_id, row in self.rows.items() if row['committed']), default=0), 0
+
+    def items_since(self, news_id, event_id, lag_seconds=0, limit=500):
+        visible = [row for row in self.rows.values() if row['committed']]
+        return sorted(
+            (row for row in visible if row['id'] > news_id or (lag_seconds and row['recent'])),
+            key=lambda row: row['id']
+        )[:limit]
+
+@pytest.fixture
+def table(monkeypatch):
+    table = FakeTable()
+    monkeypatch.setattr(dispatcher_module, 'get_ingest_cursor', table.cursor)
+    monkeypatch.setattr(dispatcher_module, 'get_items_since', table.items_since)
+    return table
+
+def announced(dispatcher):
+    batch = dispatcher.dispatch_new_items()
+    return [item['id'] for item in batch.items] if batch else []
+
+def test_rows_committed_out_of_id_order_are_announced_once(table):
+    table.insert(1)
+    dispatcher = NotificationDispatcher([InAppSink()])
+    dispatcher.start()
+
+    # Two writers: id 2 is still in flight when id 3 commits
+    table.insert(2, committed=False)
+    table.insert(3)
+    assert announced(dispatcher) == [3]
+
+    table.commit(2)
+    assert announced(dispatcher) == [2]
+    assert announced(dispatcher) == []
+
+def test_rows_from_before_start_are_not_announced(table):
+    table.insert(1)
+    table.insert(2)
+    dispatcher = NotificationDispatcher([InAppSink()])
+    dispatcher.start()
+
+    assert announced(dispatcher) == []
+
+def test_inboxes_receive_each_batch(table):
+    dispatcher = NotificationDispatcher([InAppSink()])
+    dispatcher.start()
+    inbox = dispatcher.subscribe()
+
+    table.insert(1)
+    dispatcher.dispatch_new_items()
+    assert [item['id'] for item in inbox.drain()] == [1]
+    assert inbox.drain() == []
+
+class RecordingSink(dispatcher_module.NotificationSink):
+    name = "recording"
+
+    def __init__(self, min_interval):
+        self.min_interval = min_interval
+        self.batches = []
+
+    def deliver(self, batch):
+        self.batches.append([item['id'] for item in batch.items])
+
+def test_sinks_must_implement_deliver():
+    with pytest.raises(TypeError):
+        dispatcher_module.NotificationSink()
+
+def test_outside_sinks_get_held_items_in_one_batch(table):
+    sink = RecordingSink(min_interval=0.2)
+    dispatcher = NotificationDispatcher([sink])
+    dispatcher.start()
+
+    for row_id in (1, 2, 3):
+        table.insert(row_id)
+        dispatcher.dispatch_new_items()
+    time.sleep(0.4)
+    dispatcher.executor.shutdown(wait=True)
+
+    # The first goes out at once; the rest waited out the interval together
+    assert sink.batches == [[1], [2, 3]]
+
+def test_session_inbox_holds_items_between_toasts():
+    inbox = dispatcher_module.SessionInbox(min_interval=60)
+    batch = dispatcher_module.NotificationBatch(({'id': 1},), datetime.now(timezone.utc))
+    inbox.put(batch)
+    assert [item['id'] for item in inbox.drain()] == [1]
+
+    inbox.put(batch._replace(items=({'id': 2},)))
+    inbox.put(batch._replace(items=({'id': 3},)))
+    assert inbox.drain() == []
+
+    inbox.last_drained -= 60
+    assert [item['id'] for item in inbox.drain()] == [2, 3]
+
+@pytest.mark.parametrize("environment, available", [
+    ({'DISPLAY': ':0'}, True),
+    ({}, False),
+    ({'DISPLAY': ':0', 'SSH_CONNECTION': '10.0.0.2 5000 10.0.0.1 22'}, False),
+])
+def test_desktop_sink_is_refused_without_a_local_display(monkeypatch, environment, available):
+    for name in ('DISPLAY', 'WAYLAND_DISPLAY', 'SSH_CONNECTION', 'SSH_TTY'):
+        monkeypatch.delenv(name, raising=False)
+    for name, value in environment.items():
+        monkeypatch.setenv(name, value)
+    monkeypatch.setattr(dispatcher_module.sys, 'platform', 'linux')
+
+    sinks = dispatcher_module.build_sinks("desktop")
+    assert [sink.name for sink in sinks] == (["desktop"] if available else [])
+
+class FakeElector:
+    def __init__(self, leader):
+        self.leader = leader
+
+    def try_acquire(self):
+        return self.leader
+
+@pytest.mark.parametrize("leader, posted", [(True, 1), (False, 0)])
+def test_only_the_leading_replica_posts_webhooks(monkeypatch, leader, posted):
+    posts = []
+    response = type('Response', (), {'raise_for_status': lambda self: None})()
+    monkeypatch.setattr(dispatcher_module.requests, 'post', lambda url, json, timeout: posts.append(json) or response)
+    sink = dispatcher_module.WebhookSink("http://127.0.0.1:8809/notify", elector=FakeElector(leader))
+
+    item = {'kind': 'news', 'title': "Item 1", 'category': 'Test', 'date': datetime.now(timezone.utc)}
+    sink.deliver(dispatcher_module.NotificationBatch((item,), datetime.now(timezone.utc)))
+    assert len(posts) == posted
+
+def test_dispatcher_survives_a_cache_resource_clear(table, monkeypatch):
+    import streamlit as st
+
+    monkeypatch.setattr(dispatcher_module, '_dispatcher', None)
+    monkeypatch.setattr(dispatcher_module, 'build_sinks', lambda: [InAppSink()])
+    dispatcher = dispatcher_module.get_notification_dispatcher()
+    st.cache_resource.clear()
+    assert dispatcher_module.get_notification_dispatcher() is dispatcher
+    dispatcher_module.get_dataset_store().listeners.remove(dispatcher.dispatch_new_items)
@@ -0,0 +1,68 @@
+import time
+import utils.seen_index as seen_index_module
+from utils.seen_index import SeenIndex, BloomFilter, entry_key, entry_fingerprint
+
+SOURCE = {'name': 'Test Feed', 'category': 'Test'}
+
+def entry(number, title=None):
+    return {'id': f"guid-{number}", 'title': title or f"Entry {number}", 'link': f"https://example.com/{number}"}
+
+def test_bloom_filter_has_no_false_negatives():
+    bloom = BloomFilter(capacity=100)
+    items = [f"item-{index}".encode() for index in range(100)]
+    for item in items:
+        bloom.add(item)
+    assert all(item in bloom for item in items)
+
+def test_unchanged_entries_are_skipped_and_changed_ones_are_not(tmp_path):
+    index = SeenIndex(str(tmp_path / "seen.sqlite3"))
+    index.mark_seen([token for _, token in index.filter_unseen(SOURCE, [entry(1), entry(2)])])
+
+    unseen = index.filter_unseen(SOURCE, [entry(1), entry(2, title="Edited"), entry(3)])
+    assert [item['id'] for item, _ in unseen] == ["guid-2", "guid-3"]
+
+def test_bloom_false_positive_falls_back_to_exact_index(tmp_path):
+    index = SeenIndex(str(tmp_path / "seen.sqlite3"))
+    new_entry = entry(1)
+    # Pretend the filter collides for an entry that was never stored
+    index.bloom.add(entry_key(SOURCE, new_entry) + entry_fingerprint(SOURCE, new_entry))
+
+    assert [item for item, _ in index.filter_unseen(SOURCE, [new_entry])] == [new_entry]
+
+def test_marks_survive_reopening(tmp_path):
+    path = str(tmp_path / "seen.sqlite3")
+    index = SeenIndex(path)
+    index.mark_seen([token for _, token in index.filter_unseen(SOURCE, [entry(1)])])
+    index.close()
+
+    assert SeenIndex(path).filter_unseen(SOURCE, [entry(1)]) == []
+
+def test_entries_gone_from_their_feed_expire(tmp_path):
+    path = str(tmp_path / "seen.sqlite3")
+    index = SeenIndex(path)
+    index.mark_seen([token for _, token in index.filter_unseen(SOURCE, [entry(1)])])
+    index.conn.execute("UPDATE seen SET last_seen = ?", (time.time() - 91 * 86400,))
+    index.close()
+
+    assert len(SeenIndex(path, retention_days=90).filter_unseen(SOURCE, [entry(1)])) == 1
+
+def test_skipping_an_entry_keeps_it_from_expiring(tmp_path):
+    path = str(tmp_path / "seen.sqlite3")
+    index = SeenIndex(path)
+    index.mark_seen([token for _, token in index.filter_unseen(SOURCE, [entry(1)])])
+    index.conn.execute("UPDATE seen SET last_seen = ?", (time.time() - 89 * 86400,))
+
+    # Still in the feed on this poll
+    assert index.filter_unseen(SOURCE, [entry(1)]) == []
+    index.close()
+
+    assert SeenIndex(path, retention_days=90).filter_unseen(SOURCE, [entry(1)]) == []
+
+def test_recent_entries_are_not_rewritten_on_every_skip(tmp_path, monkeypatch):
+    index = SeenIndex(str(tmp_path / "seen.sqlite3"))
+    index.mark_seen([token for _, token in index.filter_unseen(SOURCE, [entry(1)])])
+    (last_seen,) = index.conn.execute("SELECT last_seen FROM seen").fetchone()
+
+    monkeypatch.setattr(seen_index_module.time, 'time', lambda: last_seen + 60)
+    index.filter_unseen(SOURCE, [entry(1)])
+    assert index.conn.execute("SELECT last_seen FROM seen").fetchone() == (last_seen,)
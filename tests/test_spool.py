@@ -0,0 +1,108 @@
+import time
+from datetime import datetime, timezone
+import psycopg2
+import pytest
+import utils.spool as spool_module
+from utils.db import count_run_outcomes
+from utils.spool import IngestSpool, SpoolFlusher
+
+def news(number, run_id="run-1"):
+    return {
+        'title': f"Entry {number}",
+        'date': datetime(2024, 6, 3, 10, number, tzinfo=timezone.utc),
+        'category': 'Test',
+        'source': 'Test Feed',
+        'run_id': run_id
+    }
+
+@pytest.fixture
+def spool(tmp_path):
+    spool = IngestSpool(str(tmp_path / "spool.sqlite3"))
+    yield spool
+    spool.close()
+
+class RecordingWriter:
+    def __init__(self, error=None):
+        self.batches = []
+        self.error = error
+
+    def __call__(self, items, runs=()):
+        if self.error is not None:
+            raise self.error
+        self.batches.append((list(items), list(runs)))
+        return len(items)
+
+def test_entries_round_trip_with_datetimes(spool):
+    run = {'run_id': "run-1", 'feed_name': 'Test Feed', 'started_at': datetime(2024, 6, 3, tzinfo=timezone.utc)}
+    spool.append([news(1)], [run])
+
+    assert [entry for _, entry in spool.claim()] == [news(1)]
+    assert [record for _, record in spool.claim(table='feed_runs')] == [run]
+
+def test_claimed_rows_are_hidden_from_other_flushers(spool):
+    other = IngestSpool(spool.path)
+    spool.append([news(number) for number in range(4)])
+
+    first = spool.claim(limit=3)
+    second = other.claim(limit=3)
+    assert [entry['title'] for _, entry in first] == ["Entry 0", "Entry 1", "Entry 2"]
+    assert [entry['title'] for _, entry in second] == ["Entry 3"]
+    assert other.claim() == []
+    other.close()
+
+def test_released_and_expired_claims_can_be_claimed_again(spool):
+    spool.append([news(1), news(2)])
+    [(first, _)] = spool.claim(limit=1, lease=0.01)
+    [(second, _)] = spool.claim(limit=1)
+    time.sleep(0.02)
+
+    # The first lease has run out; the second is given back
+    spool.release([second])
+    assert [row_id for row_id, _ in spool.claim()] == [first, second]
+
+def test_flush_writes_and_acknowledges(spool, monkeypatch):
+    writer = RecordingWriter()
+    monkeypatch.setattr(spool_module, 'save_news_batch', writer)
+    spool.append([news(1), news(2)], [{'run_id': "run-1", 'feed_name': 'Test Feed'}])
+
+    assert SpoolFlusher(spool).drain()
+    assert [len(items) for items, _ in writer.batches] == [2]
+    assert spool.pending_count() == 0
+
+def test_unavailable_database_leaves_batch_for_a_retry(spool, monkeypatch):
+    monkeypatch.setattr(spool_module, 'save_news_batch', RecordingWriter(psycopg2.OperationalError("down")))
+    spool.append([news(1)])
+
+    assert not SpoolFlusher(spool).drain()
+    assert spool.pending_count() == 1
+    # Released straight away rather than held until the lease runs out
+    assert len(spool.claim()) == 1
+
+def test_rejected_batch_is_retried_row_by_row(spool, monkeypatch):
+    written = []
+
+    def writer(items, runs=()):
+        if len(items) > 1 or any(item['title'] == "Entry 2" for item in items):
+            raise psycopg2.DataError("bad row")
+        written.extend(items)
+
+    monkeypatch.setattr(spool_module, 'save_news_batch', writer)
+    spool.append([news(1), news(2), news(3)])
+
+    assert SpoolFlusher(spool).drain()
+    assert [item['title'] for item in written] == ["Entry 1", "Entry 3"]
+    assert spool.pending_count() == 0
+
+def test_replayed_batch_gets_the_same_batch_id():
+    items = [news(1), news(2), news(3, run_id="run-2")]
+    unique_items = {(item['title'], item['source']): item for item in items}
+    written = [{'title': "Entry 1", 'source': 'Test Feed', 'inserted': True}]
+
+    first = count_run_outcomes(items, unique_items, written)
+    # On replay nothing is written any more and the entries may come back in another order
+    replay = count_run_outcomes(list(reversed(items)), unique_items, [])
+
+    assert first['run-1']['new'] == 1 and first['run-1']['duplicate'] == 1
+    assert {run_id: counts['batch_id'] for run_id, counts in first.items()} == \
+        {run_id: counts['batch_id'] for run_id, counts in replay.items()}
+    assert first['run-1']['batch_id'] != first['run-2']['batch_id']
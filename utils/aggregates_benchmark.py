@@ -0,0 +1,83 @@
+"""Compare Detailed Analysis on the pandas path and on the columnar aggregates.
+
+    python -m utils.aggregates_benchmark
+    python -m utils.aggregates_benchmark --sizes 1000 100000 --days 730
+
+Times the statistics, category trends and heatmap for synthetic datasets of
+each size, best of three runs, to pick ANALYTICS_AGGREGATE_MIN_EVENTS.
+"""
+import sys
+import time
+import random
+import argparse
+from datetime import datetime, timedelta, timezone
+from typing import List, Dict, Any, Callable, Optional
+import utils.event_aggregates as event_aggregates
+from utils import event_analyzer
+
+DEFAULT_SIZES = (10, 100, 1000, 2000, 5000, 10000, 50000, 200000)
+
+def sample_events(count: int, days: int) -> List[Dict[str, Any]]:
+    start = datetime.now(timezone.utc) - timedelta(days=days)
+    rng = random.Random(count)
+    return [
+        {
+            'date': start + timedelta(seconds=rng.randrange(days * event_aggregates.SECONDS_PER_DAY)),
+            'category': f"Category {rng.randrange(12)}",
+            'title': f"Event {index}"
+        }
+        for index in range(count)
+    ]
+
+def best_of(func: Callable[[], Any], repeat: int = 3) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+def detailed_analysis(events: List[Dict[str, Any]], aggregates: Optional[Dict[str, Any]] = None) -> None:
+    event_analyzer.generate_event_stats(events, aggregates)
+    event_analyzer.analyze_category_trends(events, aggregates)
+    event_analyzer.generate_event_heatmap(events, aggregates)
+
+def benchmark(sizes=DEFAULT_SIZES, days: int = 365) -> List[Dict[str, float]]:
+    """Time Detailed Analysis statistics, trends and heatmap with and without the aggregates"""
+    threshold = event_aggregates.AGGREGATE_MIN_EVENTS
+    results = []
+    try:
+        # Keep the analyzers on the pandas path unless handed aggregates
+        event_aggregates.AGGREGATE_MIN_EVENTS = sys.maxsize
+        for size in sizes:
+            events = sample_events(size, days)
+            results.append({
+                'events': size,
+                'pandas_ms': best_of(lambda: detailed_analysis(events)) * 1000,
+                'aggregates_ms': best_of(
+                    lambda: detailed_analysis(events, event_aggregates.compute_aggregates(events))
+                ) * 1000
+            })
+    finally:
+        event_aggregates.AGGREGATE_MIN_EVENTS = threshold
+    return results
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="python -m utils.aggregates_benchmark",
+        description="Time Detailed Analysis with and without the columnar aggregates."
+    )
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES),
+                        help="dataset sizes to time (default: 10 to 200000)")
+    parser.add_argument("--days", type=int, default=365, help="days the events are spread over (default: 365)")
+    return parser.parse_args(argv)
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    print(f"{'events':>8} {'pandas ms':>10} {'aggregates ms':>14}")
+    for row in benchmark(args.sizes, args.days):
+        print(f"{row['events']:>8} {row['pandas_ms']:>10.1f} {row['aggregates_ms']:>14.1f}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,104 +1,356 @@
 import os
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, Future
 from openai import OpenAI
 from datetime import datetime, timedelta, timezone
 import logging
 import time
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, NamedTuple, FrozenSet, Callable
 from tenacity import retry, stop_after_attempt, wait_exponential
+from utils.db import save_briefing, get_briefing, get_recent_briefings
+from utils.briefing_prompt import build_prompt_plan
+from utils.extractive_briefing import extractive_briefing
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+BRIEFING_MODEL = "gpt-4o"  # the newest OpenAI model is "gpt-4o" which was released May 13, 2024
+BRIEFING_WINDOW_HOURS = 24
+# A briefing is reused until at least this many of its events have come or
+# gone, or this share of them has, whichever is smaller
+BRIEFING_MIN_CHANGED_EVENTS = int(os.getenv('BRIEFING_MIN_CHANGED_EVENTS', '3'))
+BRIEFING_CHANGE_RATIO = float(os.getenv('BRIEFING_CHANGE_RATIO', '0.2'))
+# Any change at all triggers regeneration once the briefing is this old
+BRIEFING_MAX_AGE_HOURS = float(os.getenv('BRIEFING_MAX_AGE_HOURS', '6'))
+# Event sets this similar to a cached briefing show it while the new one is generated
+BRIEFING_STALE_SIMILARITY = 0.5
+BRIEFING_MEMORY_ENTRIES = 64
+BRIEFING_RETRY_SECONDS = 300
+# Point at any OpenAI-compatible server, e.g. utils.mock_completion_server
+OPENAI_BASE_URL = os.getenv('OPENAI_BASE_URL')
+BRIEFING_TIMEOUT_SECONDS = 60
+NO_EVENTS_MESSAGE = "No significant events in the last 24 hours."
+# 'ai' uses the model only, 'extractive' only the local summarizer, and
+# 'auto' the model when configured with the local summary shown until a
+# briefing is ready or in place of a failed one
+BRIEFING_MODE = os.getenv('BRIEFING_MODE', 'auto').lower()
+
+_client: Optional[OpenAI] = None
+_client_lock = threading.Lock()
+
 # Initialize OpenAI client with proper error handling
 def get_openai_client() -> Optional[OpenAI]:
-    """Get OpenAI client with error handling"""
-    api_key = os.environ.get("OPENAI_API_KEY")
-    if not api_key:
-        logger.error("OpenAI API key not found in environment variables")
-        return None
-    return OpenAI(api_key=api_key)
+    """Get the shared OpenAI client; its HTTP connection pool is reused across briefings"""
+    global _client
+    with _client_lock:
+        if _client is None:
+            api_key = os.environ.get("OPENAI_API_KEY")
+            if not api_key and OPENAI_BASE_URL:
+                # Local OpenAI-compatible servers don't check the key
+                api_key = "local"
+            if not api_key:
+                logger.error("OpenAI API key not found in environment variables")
+                return None
+            # tenacity handles retries, so the client shouldn't add its own
+            _client = OpenAI(api_key=api_key, base_url=OPENAI_BASE_URL,
+                             timeout=BRIEFING_TIMEOUT_SECONDS, max_retries=0)
+        return _client
+
+def ai_configured() -> bool:
+    """Check whether a model endpoint is configured at all"""
+    return bool(os.environ.get("OPENAI_API_KEY") or OPENAI_BASE_URL)
+
+def select_recent_events(events: List[Dict[str, Any]], hours: int = BRIEFING_WINDOW_HOURS) -> List[Dict[str, Any]]:
+    """Get the events from the last `hours` hours"""
+    # Ensure current time is timezone-aware
+    cutoff = datetime.now(timezone.utc) - timedelta(hours=hours)
+    return [event for event in events if event['date'] >= cutoff]
+
+def event_key(event: Dict[str, Any]) -> str:
+    """Identity of an event for briefing purposes"""
+    return hashlib.blake2b(f"{event['title']}\0{event['category']}".encode(), digest_size=8).hexdigest()
+
+def briefing_fingerprint(event_keys: FrozenSet[str]) -> str:
+    """Fingerprint of an event set, independent of order"""
+    return hashlib.sha256("\n".join(sorted(event_keys)).encode()).hexdigest()
+
+def is_material_change(previous: FrozenSet[str], current: FrozenSet[str],
+                       min_changed: int = BRIEFING_MIN_CHANGED_EVENTS,
+                       change_ratio: float = BRIEFING_CHANGE_RATIO) -> bool:
+    """Check whether enough events have come or gone to warrant a new briefing"""
+    changed = len(previous ^ current)
+    if not changed:
+        return False
+    return changed >= min_changed or changed >= change_ratio * len(previous | current)
+
+def describe_briefing_error(error: Exception) -> str:
+    """User-facing message for a failed briefing"""
+    error_msg = str(error)
+    if "insufficient_quota" in error_msg:
+        return ("Strategic briefing temporarily unavailable. "
+                "Please check back later.")
+    elif "rate_limit" in error_msg:
+        return ("Strategic briefing generation paused. "
+                "Please refresh in a few minutes.")
+    return ("Strategic briefing system encountered an issue. "
+            "Using static analysis mode.")
+
+BRIEFING_INSTRUCTION = "Generate a brief, strategic analysis of these Space Force related events from the last 24 hours:"
+MAP_INSTRUCTION = (
+    "Summarize the key developments in this share of the last 24 hours' Space Force "
+    "related events as a few short bullet points:"
+)
+REDUCE_INSTRUCTION = (
+    "These are summaries of different shares of the last 24 hours' Space Force related "
+    "events. Combine them into one brief, strategic analysis:"
+)
 
 @retry(
     stop=stop_after_attempt(3),
     wait=wait_exponential(multiplier=1, min=4, max=10),
     reraise=True
 )
-def generate_briefing(events: List[Dict[str, Any]]) -> str:
+def request_briefing(client: OpenAI, events_text: str,
+                     on_delta: Optional[Callable[[str], None]] = None,
+                     instruction: str = BRIEFING_INSTRUCTION, max_tokens: int = 500) -> str:
+    """Stream a briefing of the given event lines, passing the text so far to on_delta"""
+    stream = client.chat.completions.create(
+        model=BRIEFING_MODEL,
+        messages=[
+            {
+                "role": "system",
+                "content": (
+                    "You are a Space Force intelligence analyst providing "
+                    "concise, professional briefings. Focus on key developments, "
+                    "emerging patterns, and strategic implications. Use clear, "
+                    "military-style communication."
+                )
+            },
+            {
+                "role": "user",
+                "content": f"{instruction}\n\n{events_text}"
+            }
+        ],
+        temperature=0.7,
+        max_tokens=max_tokens,
+        stream=True
+    )
+    text = ""
+    for chunk in stream:
+        if chunk.choices and chunk.choices[0].delta.content:
+            text += chunk.choices[0].delta.content
+            if on_delta:
+                on_delta(text)
+    return text
+
+def compose_briefing(recent_events: List[Dict[str, Any]],
+                     on_delta: Optional[Callable[[str], None]] = None) -> str:
+    """Generate a briefing of already-selected recent events; raises if it can't be generated"""
+    client = get_openai_client()
+    if not client:
+        raise RuntimeError("AI Briefing unavailable: API configuration issue")
+
+    logger.info(f"Processing {len(recent_events)} events for briefing")
+    # Deduplicated, clustered and ranked event lines fitted to the token budget
+    plan = build_prompt_plan(recent_events)
+    if not plan.map_reduce:
+        briefing = request_briefing(client, plan.chunks[0], on_delta)
+    else:
+        # Busy day: summarize chunks in parallel, then stream the combined briefing,
+        # so latency is one chunk summary plus one reduce however many events there are
+        with ThreadPoolExecutor(max_workers=len(plan.chunks), thread_name_prefix='briefing-map') as executor:
+            summaries = list(executor.map(
+                lambda chunk: request_briefing(client, chunk, instruction=MAP_INSTRUCTION, max_tokens=300),
+                plan.chunks
+            ))
+        summaries_text = "\n\n".join(f"Summary {index}:\n{summary}" for index, summary in enumerate(summaries, 1))
+        briefing = request_briefing(client, summaries_text, on_delta, instruction=REDUCE_INSTRUCTION)
+    logger.info("Successfully generated briefing")
+    return briefing
+
+def generate_briefing(events: List[Dict[str, Any]], mode: str = BRIEFING_MODE) -> str:
     """Generate an AI briefing summary of recent events with robust error handling"""
+    recent_events = select_recent_events(events)
+    if not recent_events:
+        logger.info("No recent events found in the last 24 hours")
+        return NO_EVENTS_MESSAGE
+    if mode == 'extractive' or (mode == 'auto' and not ai_configured()):
+        return extractive_briefing(recent_events)
     try:
-        client = get_openai_client()
-        if not client:
-            return "AI Briefing unavailable: API configuration issue"
+        return compose_briefing(recent_events)
+    except Exception as e:
+        logger.error(f"Error generating AI briefing: {str(e)}", exc_info=not isinstance(e, RuntimeError))
+        if mode == 'auto':
+            return extractive_briefing(recent_events)
+        return str(e) if isinstance(e, RuntimeError) else describe_briefing_error(e)
 
-        # Ensure current time is timezone-aware
-        current_time = datetime.now(timezone.utc)
-        logger.info(f"Generating briefing at {current_time}")
+class Briefing(NamedTuple):
+    fingerprint: str
+    content: str
+    event_keys: FrozenSet[str]
+    created_at: datetime
 
-        # Sort events by date and get the last 24 hours
-        recent_events = [
-            event for event in events
-            if event['date'] >= current_time - timedelta(hours=24)
-        ]
+class BriefingState(NamedTuple):
+    """What the briefing section should show right now"""
+    content: Optional[str]
+    # 'ready', 'stale' (older briefing shown while updating), 'pending',
+    # 'streaming' (content is the partial text), 'empty' or 'error'
+    status: str
+    created_at: Optional[datetime] = None
+    error: Optional[str] = None
 
+def _similarity(a: FrozenSet[str], b: FrozenSet[str]) -> float:
+    return len(a & b) / len(a | b) if a or b else 1.0
+
+class BriefingService:
+    """Briefings cached by event-set fingerprint and generated in the background.
+
+    Lookups never wait on the model. A briefing is reused for any event set
+    that differs from it only immaterially; a material change queues one
+    generation, shared by every session asking for the same set, and the
+    result is persisted so other processes and restarts can reuse it. In
+    'auto' mode the local extractive summary stands in while there is no
+    model briefing to show; in 'extractive' mode it is the only source.
+    """
+
+    def __init__(self, compose: Callable[..., str] = compose_briefing, mode: str = BRIEFING_MODE,
+                 max_entries: int = BRIEFING_MEMORY_ENTRIES):
+        self.compose = compose
+        self.mode = mode
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        self.entries: "OrderedDict[str, Briefing]" = OrderedDict()
+        self.pending: Dict[str, Future] = {}
+        self.partials: Dict[str, str] = {}
+        self.extracts: "OrderedDict[str, str]" = OrderedDict()
+        self.failures: Dict[str, tuple] = {}
+        self.loaded = False
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='briefing')
+
+    def _remember(self, briefing: Briefing) -> None:
+        # Call with the lock held
+        self.entries[briefing.fingerprint] = briefing
+        self.entries.move_to_end(briefing.fingerprint)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    @staticmethod
+    def _from_row(row: Dict[str, Any]) -> Briefing:
+        event_keys = row['event_keys']
+        if isinstance(event_keys, str):
+            event_keys = json.loads(event_keys)
+        return Briefing(row['fingerprint'], row['content'], frozenset(event_keys), row['created_at'])
+
+    def _load(self) -> None:
+        """Seed the memory cache with the latest persisted briefings"""
+        rows = get_recent_briefings(self.max_entries)
+        with self.lock:
+            if self.loaded:
+                return
+            for row in reversed(rows):
+                self._remember(self._from_row(row))
+            self.loaded = True
+
+    def _extract(self, fingerprint: str, recent_events: List[Dict[str, Any]]) -> str:
+        """Local extractive summary of the event set, computed once per fingerprint"""
+        with self.lock:
+            summary = self.extracts.get(fingerprint)
+        if summary is None:
+            summary = extractive_briefing(recent_events)
+            with self.lock:
+                self.extracts[fingerprint] = summary
+                while len(self.extracts) > self.max_entries:
+                    self.extracts.popitem(last=False)
+        return summary
+
+    def _nearest(self, event_keys: FrozenSet[str]) -> Optional[Briefing]:
+        # Call with the lock held
+        return max(self.entries.values(), key=lambda briefing: _similarity(briefing.event_keys, event_keys),
+                   default=None)
+
+    def get(self, events: List[Dict[str, Any]]) -> BriefingState:
+        """Get the briefing for these events without blocking, queueing generation if needed"""
+        recent_events = select_recent_events(events)
         if not recent_events:
-            logger.info("No recent events found in the last 24 hours")
-            return "No significant events in the last 24 hours."
+            return BriefingState(NO_EVENTS_MESSAGE, 'empty')
+        event_keys = frozenset(event_key(event) for event in recent_events)
+        fingerprint = briefing_fingerprint(event_keys)
+        if self.mode == 'extractive' or (self.mode == 'auto' and not ai_configured()):
+            return BriefingState(self._extract(fingerprint, recent_events), 'ready')
+        if not self.loaded:
+            self._load()
+
+        with self.lock:
+            briefing = self.entries.get(fingerprint)
+            if briefing is not None:
+                self.entries.move_to_end(fingerprint)
+                return BriefingState(briefing.content, 'ready', briefing.created_at)
+
+            nearest = self._nearest(event_keys)
+            if nearest is not None:
+                age = datetime.now(timezone.utc) - nearest.created_at
+                if age < timedelta(hours=BRIEFING_MAX_AGE_HOURS) and not is_material_change(nearest.event_keys, event_keys):
+                    return BriefingState(nearest.content, 'ready', nearest.created_at)
+            if nearest is not None and _similarity(nearest.event_keys, event_keys) < BRIEFING_STALE_SIMILARITY:
+                nearest = None
 
-        # Prepare events data for the prompt
-        events_text = "\n".join([
-            f"- {event['title']} ({event['category']}) - {event['description'][:200]}..."
-            for event in recent_events
-        ])
+            failure = self.failures.get(fingerprint)
+            failed = failure is not None and time.monotonic() - failure[0] < BRIEFING_RETRY_SECONDS
+            if not failed and fingerprint not in self.pending:
+                self.pending[fingerprint] = self.executor.submit(
+                    self._generate, fingerprint, event_keys, recent_events
+                )
+            partial = self.partials.get(fingerprint)
 
-        logger.info(f"Processing {len(recent_events)} events for briefing")
+        if nearest is not None:
+            # Keep showing the whole earlier briefing rather than swapping in a partial one
+            status = 'error' if failed else 'stale'
+            return BriefingState(nearest.content, status, nearest.created_at, failure[1] if failed else None)
+        if partial and not failed:
+            return BriefingState(partial, 'streaming')
+        # In auto mode the local summary fills in until the model's briefing exists
+        fallback = self._extract(fingerprint, recent_events) if self.mode == 'auto' else None
+        if failed:
+            return BriefingState(fallback, 'error', error=failure[1])
+        return BriefingState(fallback, 'pending')
 
-        # Generate briefing using OpenAI with rate limiting
+    def _set_partial(self, fingerprint: str, text: str) -> None:
+        with self.lock:
+            self.partials[fingerprint] = text
+
+    def _generate(self, fingerprint: str, event_keys: FrozenSet[str], recent_events: List[Dict[str, Any]]) -> None:
         try:
-            response = client.chat.completions.create(
-                model="gpt-4o",  # the newest OpenAI model is "gpt-4o" which was released May 13, 2024
-                messages=[
-                    {
-                        "role": "system",
-                        "content": (
-                            "You are a Space Force intelligence analyst providing "
-                            "concise, professional briefings. Focus on key developments, "
-                            "emerging patterns, and strategic implications. Use clear, "
-                            "military-style communication."
-                        )
-                    },
-                    {
-                        "role": "user",
-                        "content": (
-                            f"Generate a brief, strategic analysis of these Space Force "
-                            f"related events from the last 24 hours:\n\n{events_text}"
-                        )
-                    }
-                ],
-                temperature=0.7,
-                max_tokens=500
-            )
-
-            briefing = response.choices[0].message.content
-            logger.info("Successfully generated briefing")
-            return briefing
-
-        except Exception as api_error:
-            error_msg = str(api_error)
-            logger.error(f"OpenAI API error: {error_msg}")
-
-            # Return a more user-friendly message based on the error type
-            if "insufficient_quota" in error_msg:
-                return ("Strategic briefing temporarily unavailable. "
-                       "Please check back later.")
-            elif "rate_limit" in error_msg:
-                return ("Strategic briefing generation paused. "
-                       "Please refresh in a few minutes.")
+            # Another dashboard process may already have generated this set
+            try:
+                row = get_briefing(fingerprint)
+            except Exception as e:
+                logger.warning(f"Could not look up stored briefing: {str(e)}")
+                row = None
+            if row is not None:
+                briefing = self._from_row(row)
             else:
-                return ("Strategic briefing system encountered an issue. "
-                       "Using static analysis mode.")
-
-    except Exception as e:
-        logger.error(f"Error generating AI briefing: {str(e)}", exc_info=True)
-        return ("Strategic briefing system encountered an error. "
-                "Using manual event tracking.")
\ No newline at end of file
+                started = time.monotonic()
+                content = self.compose(recent_events, lambda text: self._set_partial(fingerprint, text))
+                generation_ms = int((time.monotonic() - started) * 1000)
+                briefing = Briefing(fingerprint, content, event_keys, datetime.now(timezone.utc))
+                try:
+                    save_briefing(fingerprint, content, event_keys, BRIEFING_MODEL, generation_ms)
+                except Exception as e:
+                    logger.error(f"Error saving briefing: {str(e)}")
+                logger.info(f"Generated briefing for {len(event_keys)} events in {generation_ms} ms")
+            with self.lock:
+                self._remember(briefing)
+                self.failures.pop(fingerprint, None)
+        except Exception as e:
+            logger.error(f"Error generating AI briefing: {str(e)}", exc_info=not isinstance(e, RuntimeError))
+            message = str(e) if isinstance(e, RuntimeError) else describe_briefing_error(e)
+            with self.lock:
+                self.failures[fingerprint] = (time.monotonic(), message)
+        finally:
+            with self.lock:
+                self.pending.pop(fingerprint, None)
+                self.partials.pop(fingerprint, None)
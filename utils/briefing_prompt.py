@@ -0,0 +1,136 @@
+import os
+import re
+import math
+import logging
+from datetime import datetime, timezone
+from typing import List, Dict, Any, NamedTuple, FrozenSet
+
+logger = logging.getLogger(__name__)
+
+# Token budget for the event lines of one prompt
+BRIEFING_PROMPT_TOKENS = int(os.getenv('BRIEFING_PROMPT_TOKENS', '3000'))
+# Past this many tokens of ranked material, summarize chunks in parallel and
+# then combine the summaries instead of truncating to a single prompt
+BRIEFING_MAP_REDUCE_TOKENS = int(os.getenv('BRIEFING_MAP_REDUCE_TOKENS', '6000'))
+BRIEFING_MAX_CHUNKS = int(os.getenv('BRIEFING_MAX_CHUNKS', '4'))
+DESCRIPTION_CHARS = 200
+# Titles sharing this share of their words are the same story
+DUPLICATE_SIMILARITY = 0.8
+# ...and this share means related reports about one development
+CLUSTER_SIMILARITY = 0.35
+
+STOPWORDS = frozenset(
+    "the and for with from that this into over after about space force says will new its are has was "
+    "have been their more than amid".split()
+)
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count; about four characters per token for English prose"""
+    return math.ceil(len(text) / 4)
+
+def title_words(title: str) -> FrozenSet[str]:
+    return frozenset(
+        word for word in re.findall(r"[a-z0-9]+", title.lower())
+        if len(word) > 2 and word not in STOPWORDS
+    )
+
+def _similarity(a: FrozenSet[str], b: FrozenSet[str]) -> float:
+    return len(a & b) / len(a | b) if a and b else 0.0
+
+class EventCluster(NamedTuple):
+    lead: Dict[str, Any]
+    size: int
+    score: float
+
+def cluster_events(events: List[Dict[str, Any]]) -> List[EventCluster]:
+    """Group near-identical and related events, ranked most significant first.
+
+    Duplicates (syndicated copies of one story) are dropped outright; related
+    reports collapse into one cluster led by its most detailed event. A
+    cluster's score grows with its size and decays with the age of its
+    newest report.
+    """
+    now = datetime.now(timezone.utc)
+    groups: List[Dict[str, Any]] = []
+    # (category, word) -> indexes of groups whose titles use the word, so each
+    # event is only compared with groups it shares a word with
+    word_index: Dict[tuple, List[int]] = {}
+    for event in sorted(events, key=lambda event: event['date'], reverse=True):
+        words = title_words(event['title'])
+        candidates = {index for word in words for index in word_index.get((event['category'], word), ())}
+        best, best_similarity = None, 0.0
+        for index in candidates:
+            similarity = _similarity(words, groups[index]['words'])
+            if similarity > best_similarity:
+                best, best_similarity = index, similarity
+        if best is not None and best_similarity >= DUPLICATE_SIMILARITY:
+            continue
+        if best is not None and best_similarity >= CLUSTER_SIMILARITY:
+            group = groups[best]
+            group['events'].append(event)
+        else:
+            best = len(groups)
+            group = {'words': frozenset(), 'events': [event]}
+            groups.append(group)
+        for word in words - group['words']:
+            word_index.setdefault((event['category'], word), []).append(best)
+        group['words'] = group['words'] | words
+
+    clusters = []
+    for group in groups:
+        lead = max(group['events'], key=lambda event: len(event.get('description') or ''))
+        newest = group['events'][0]['date']
+        age_hours = max(0.0, (now - newest).total_seconds() / 3600)
+        score = 1 + math.log(len(group['events'])) + math.exp(-age_hours / 12)
+        clusters.append(EventCluster(lead, len(group['events']), score))
+    clusters.sort(key=lambda cluster: cluster.score, reverse=True)
+    return clusters
+
+def format_cluster(cluster: EventCluster) -> str:
+    """One prompt line for a cluster"""
+    event = cluster.lead
+    line = f"- {event['title']} ({event['category']}) - {(event.get('description') or '')[:DESCRIPTION_CHARS]}..."
+    if cluster.size > 1:
+        line += f" [{cluster.size - 1} related reports]"
+    return line
+
+class PromptPlan(NamedTuple):
+    """Event text for a briefing: one chunk for a single pass, several for map-reduce"""
+    chunks: List[str]
+    included: int
+    omitted: int
+
+    @property
+    def map_reduce(self) -> bool:
+        return len(self.chunks) > 1
+
+def build_prompt_plan(events: List[Dict[str, Any]], budget: int = BRIEFING_PROMPT_TOKENS,
+                      map_reduce_tokens: int = BRIEFING_MAP_REDUCE_TOKENS,
+                      max_chunks: int = BRIEFING_MAX_CHUNKS) -> PromptPlan:
+    """Deduplicate, cluster and rank events, then fit them to the token budget"""
+    lines = [format_cluster(cluster) for cluster in cluster_events(events)]
+    costs = [estimate_tokens(line) + 1 for line in lines]
+    total = sum(costs)
+    chunk_count = 1 if total <= map_reduce_tokens else max_chunks
+
+    chunks: List[List[str]] = [[]]
+    used = 0
+    included = 0
+    for line, cost in zip(lines, costs):
+        if used + cost > budget and chunks[-1]:
+            if len(chunks) == chunk_count:
+                break
+            chunks.append([])
+            used = 0
+        chunks[-1].append(line)
+        used += cost
+        included += 1
+
+    omitted = len(lines) - included
+    if omitted:
+        chunks[-1].append(f"(+{omitted} lower-priority items omitted)")
+    logger.info(
+        f"Briefing prompt: {len(events)} events in {len(lines)} clusters (~{total} tokens), "
+        f"{included} included in {len(chunks)} chunk(s)"
+    )
+    return PromptPlan(["\n".join(chunk) for chunk in chunks], included, omitted)
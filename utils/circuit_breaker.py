@@ -0,0 +1,74 @@
+import os
+import logging
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Any, Optional
+
+logger = logging.getLogger(__name__)
+
+FAILURE_THRESHOLD = int(os.getenv('FEED_BREAKER_THRESHOLD', '3'))  # consecutive failures before a feed is skipped
+BASE_COOLDOWN_SECONDS = int(os.getenv('FEED_BREAKER_COOLDOWN_SECONDS', '300'))
+MAX_COOLDOWN_SECONDS = 6 * 3600
+
+def cooldown_seconds(failures: int, base: float = BASE_COOLDOWN_SECONDS,
+                     threshold: int = FAILURE_THRESHOLD, maximum: float = MAX_COOLDOWN_SECONDS) -> float:
+    """Cooldown after `failures` consecutive failures, doubling with each failure past the threshold"""
+    if failures < threshold:
+        return 0.0
+    return min(maximum, base * 2 ** (failures - threshold))
+
+class CircuitBreaker:
+    """Per-feed circuit breaker.
+
+    After FAILURE_THRESHOLD consecutive failures a feed's circuit opens and
+    it is skipped until the cooldown passes. The next poll is a trial: success
+    closes the circuit, failure reopens it with twice the cooldown.
+    """
+
+    def __init__(self, threshold: int = FAILURE_THRESHOLD, base_cooldown: float = BASE_COOLDOWN_SECONDS,
+                 max_cooldown: float = MAX_COOLDOWN_SECONDS):
+        self.threshold = threshold
+        self.base_cooldown = base_cooldown
+        self.max_cooldown = max_cooldown
+        self.lock = threading.Lock()
+        self.states: Dict[str, Dict[str, Any]] = {}
+
+    def _state(self, name: str) -> Dict[str, Any]:
+        return self.states.setdefault(name, {'failures': 0, 'open_until': None, 'last_error': None})
+
+    def restore(self, name: str, failures: int, open_until: Optional[datetime],
+                last_error: Optional[str] = None) -> None:
+        """Load state persisted by another process or an earlier run"""
+        with self.lock:
+            self.states[name] = {'failures': failures or 0, 'open_until': open_until, 'last_error': last_error}
+
+    def allow(self, name: str) -> bool:
+        """Check whether the feed may be fetched now"""
+        with self.lock:
+            open_until = self._state(name)['open_until']
+        return open_until is None or datetime.now(timezone.utc) >= open_until
+
+    def record_success(self, name: str) -> bool:
+        """Close the feed's circuit; returns True if it had been failing"""
+        with self.lock:
+            state = self._state(name)
+            was_failing = state['failures'] > 0
+            state.update(failures=0, open_until=None, last_error=None)
+        if was_failing:
+            logger.info(f"Circuit closed for {name}")
+        return was_failing
+
+    def record_failure(self, name: str, error: str) -> Dict[str, Any]:
+        """Count a failure, opening the circuit once the threshold is reached"""
+        with self.lock:
+            state = self._state(name)
+            state['failures'] += 1
+            state['last_error'] = error
+            cooldown = cooldown_seconds(state['failures'], self.base_cooldown, self.threshold, self.max_cooldown)
+            if cooldown:
+                state['open_until'] = datetime.now(timezone.utc) + timedelta(seconds=cooldown)
+                logger.warning(
+                    f"Circuit open for {name} after {state['failures']} consecutive failures; "
+                    f"skipping it for {cooldown / 60:.0f} min"
+                )
+            return dict(state)
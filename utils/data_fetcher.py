@@ -1,18 +1,28 @@
-import streamlit as st
 import requests
+import urllib3
 import feedparser
 import time
+import uuid
+import itertools
+import xml.etree.ElementTree as ET
+import functools
+import email.utils
 from datetime import datetime, timezone
 import logging
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Callable, Tuple, NamedTuple, Iterator
 from urllib.robotparser import RobotFileParser
 from dateutil import parser as date_parser
 import threading
 from html import unescape
 import re
 from bs4 import BeautifulSoup
-from utils.db import save_news, save_event, get_news, get_events
+from utils.db import save_news_batch, save_event, get_news, get_events, record_feed_health, get_feed_health
+from utils.circuit_breaker import CircuitBreaker
+from utils.seen_index import SeenIndex
+from utils.feed_stream import CountingReader, iter_feed_entries
 from utils.fallback_illustrations import get_fallback_image_url
+from utils.image_proxy import image_proxy
+from utils.metrics import observe, inc
 import concurrent.futures
 from dotenv import load_dotenv
 import os
@@ -115,68 +125,287 @@ def process_html_content(content: str, source_name: str, category: str) -> Dict[
             'image_url': None
         }
 
-def fetch_feed(source: Dict[str, str]) -> List[Dict[str, Any]]:
-    """Fetch and process a single RSS feed"""
+# Per-request limits so one hung host can't pin a fetch worker
+FEED_CONNECT_TIMEOUT = float(os.getenv('FEED_CONNECT_TIMEOUT', '5'))
+FEED_READ_TIMEOUT = float(os.getenv('FEED_READ_TIMEOUT', '15'))
+# A refresh returns whatever has arrived once this many seconds pass
+REFRESH_DEADLINE_SECONDS = float(os.getenv('FEED_REFRESH_DEADLINE_SECONDS', '60'))
+FETCH_WORKERS = 5
+# Feeds larger than this (or marked 'streaming' in NEWS_SOURCES) are parsed
+# incrementally instead of being loaded whole into feedparser
+FEED_STREAM_THRESHOLD_BYTES = int(os.getenv('FEED_STREAM_THRESHOLD_BYTES', str(5 * 1024 * 1024)))
+FEED_MAX_ENTRIES_PER_RUN = int(os.getenv('FEED_MAX_ENTRIES_PER_RUN', '500'))
+PROCESS_CHUNK_SIZE = 100  # entries processed and handed to the sink at a time
+USER_AGENT = 'SpaceForceDataFeed/1.0'
+# Warm the card thumbnail cache as entries are ingested; turn off when the
+# worker doesn't share the dashboard's static directory
+IMAGE_PREFETCH = os.getenv('IMAGE_PROXY_PREFETCH', '1') == '1'
+
+class FeedFetchError(Exception):
+    """Raised when a feed could not be downloaded or parsed at all"""
+
+    def __init__(self, message: str, http_status: Optional[int] = None):
+        super().__init__(message)
+        self.http_status = http_status
+
+class FeedCircuitOpenError(FeedFetchError):
+    """Raised instead of fetching a feed whose circuit breaker is open"""
+
+feed_breaker = CircuitBreaker()
+
+def persist_breaker_state(source: Dict[str, str], failures: int,
+                          open_until: Optional[datetime], last_error: Optional[str]) -> None:
+    """Store a feed's breaker state for the dashboard; never fails the fetch"""
     try:
-        if not check_robots_txt(source['url']):
-            logger.warning(f"Robots.txt disallows scraping {source['url']}")
-            return []
-
-        domain = '/'.join(source['url'].split('/')[:3])
-        rate_limiter.wait(domain)
-
-        logger.info(f"Fetching feed from {source['name']} ({source['url']})")
-        feed = feedparser.parse(source['url'])
-        news_items = []
-
-        for entry in feed.entries:
-            try:
-                # Get publication date
-                pub_date = entry.get('published', entry.get('updated', None))
-                if pub_date:
-                    parsed_date = parse_date(pub_date)
-                else:
-                    parsed_date = datetime.now(timezone.utc)
-
-                # Get description and process content
-                description = entry.get('summary', entry.get('description', ''))
-                processed_content = process_html_content(description, source['name'], source['category'])
-
-                # Try to get image URL in order of preference:
-                # 1. Featured image from feed metadata
-                # 2. Image from HTML content
-                # 3. Fallback category-based image
-                image_url = get_featured_image_url(entry)
-                if not image_url:
-                    image_url = processed_content['image_url']
-                if not image_url:
-                    image_url = get_fallback_image_url(source['category'])
-
-                news_data = {
-                    'title': clean_html_content(entry.get('title', '')),
-                    'date': parsed_date,
-                    'description': processed_content['text'],
-                    'link': entry.get('link', ''),
-                    'category': source['category'],
-                    'source': source['name'],
-                    'image_url': image_url
-                }
-
-                save_news(news_data)
-                news_items.append(news_data)
-                logger.debug(f"Successfully processed entry: {news_data['title']}")
-
-            except Exception as e:
-                logger.error(f"Error processing entry from {source['name']}: {str(e)}")
-                continue
+        record_feed_health(source, failures, open_until, last_error)
+    except Exception as e:
+        logger.error(f"Error recording feed health for {source['name']}: {str(e)}")
 
-        logger.info(f"Successfully fetched {len(news_items)} items from {source['name']}")
-        return news_items
+def restore_breaker_states() -> None:
+    """Resume circuit breakers from the state persisted by earlier runs"""
+    for row in get_feed_health():
+        feed_breaker.restore(
+            row['name'], row['consecutive_failures'], row['circuit_open_until'], row['last_error']
+        )
 
+def download_feed(url: str) -> requests.Response:
+    """Start downloading a feed with connect and read timeouts; the body is read lazily"""
+    try:
+        response = requests.get(
+            url,
+            timeout=(FEED_CONNECT_TIMEOUT, FEED_READ_TIMEOUT),
+            headers={'User-Agent': USER_AGENT},
+            stream=True
+        )
+    except requests.RequestException as e:
+        raise FeedFetchError(str(e)) from e
+    if response.status_code >= 400:
+        response.close()
+        raise FeedFetchError(f"HTTP {response.status_code}", response.status_code)
+    return response
+
+def should_stream(source: Dict[str, str], response: requests.Response) -> bool:
+    """Decide whether to parse a feed incrementally rather than with feedparser"""
+    if source.get('streaming'):
+        return True
+    content_length = response.headers.get('Content-Length', '')
+    return content_length.isdigit() and int(content_length) > FEED_STREAM_THRESHOLD_BYTES
+
+def parse_feed(response: requests.Response) -> feedparser.FeedParserDict:
+    """Parse a whole downloaded feed, raising FeedFetchError if nothing usable came back"""
+    # Headers let feedparser pick the right character encoding
+    feed = feedparser.parse(
+        response.content,
+        response_headers={key.lower(): value for key, value in response.headers.items()}
+    )
+    if feed.get('bozo') and not feed.entries:
+        raise FeedFetchError(str(feed.get('bozo_exception', 'unreadable feed')), response.status_code)
+    return feed
+
+def elapsed_ms(started: float) -> int:
+    return int((time.monotonic() - started) * 1000)
+
+# Receives each feed's normalized entries and its feed_runs record in one call,
+# e.g. save_news_batch or IngestSpool.append
+EntrySink = Callable[[List[Dict[str, Any]], List[Dict[str, Any]]], Any]
+
+class FeedResult(NamedTuple):
+    """Outcome of fetching one feed"""
+    items: List[Dict[str, Any]]  # Processed entries that were new or changed
+    entry_dates: List[datetime]  # Publication dates of every entry, for scheduling
+
+def fetch_feed(source: Dict[str, str], sink: EntrySink = save_news_batch) -> List[Dict[str, Any]]:
+    """Fetch and process a single RSS feed"""
+    try:
+        return fetch_feed_entries(source, sink).items
     except Exception as e:
         logger.error(f"Error fetching feed from {source['name']}: {str(e)}")
         return []
 
+def read_entries(source: Dict[str, str], response: requests.Response,
+                 run: Dict[str, Any]) -> Iterator[feedparser.FeedParserDict]:
+    """Yield a downloaded feed's entries, streaming large feeds; read errors become FeedFetchError"""
+    if not should_stream(source, response):
+        try:
+            run['bytes'] = len(response.content)
+        except requests.RequestException as e:
+            raise FeedFetchError(str(e), response.status_code) from e
+        yield from parse_feed(response).entries
+        return
+
+    response.raw.decode_content = True
+    reader = CountingReader(response.raw)
+    try:
+        yield from iter_feed_entries(reader)
+    except (ET.ParseError, requests.RequestException, urllib3.exceptions.HTTPError, OSError) as e:
+        raise FeedFetchError(f"Error streaming feed: {str(e)}", response.status_code) from e
+    finally:
+        run['bytes'] = reader.bytes_read
+
+def process_entry(source: Dict[str, str], entry: Dict[str, Any], run_id: str) -> Dict[str, Any]:
+    """Turn a raw feed entry into a news item"""
+    # Get publication date
+    parsed_date = get_entry_date(entry)
+
+    # Get description and process content
+    description = entry.get('summary', entry.get('description', ''))
+    processed_content = process_html_content(description, source['name'], source['category'])
+
+    # Try to get image URL in order of preference:
+    # 1. Featured image from feed metadata
+    # 2. Image from HTML content
+    # 3. Fallback category-based image
+    image_url = get_featured_image_url(entry)
+    if not image_url:
+        image_url = processed_content['image_url']
+    if not image_url:
+        image_url = get_fallback_image_url(source['category'])
+
+    return {
+        'title': clean_html_content(entry.get('title', '')),
+        'date': parsed_date,
+        'description': processed_content['text'],
+        'link': entry.get('link', ''),
+        'category': source['category'],
+        'source': source['name'],
+        'image_url': image_url,
+        'run_id': run_id
+    }
+
+def fetch_feed_entries(source: Dict[str, str], sink: EntrySink = save_news_batch,
+                       seen: Optional[SeenIndex] = None) -> FeedResult:
+    """Fetch and process a single RSS feed, raising FeedFetchError if the feed itself fails.
+
+    Entries are read, processed and handed to ``sink`` in chunks of
+    PROCESS_CHUNK_SIZE, so large feeds that are streamed never sit in memory
+    whole. A feed_runs record of how the fetch went follows the entries;
+    failed fetches still send theirs. With a seen index, entries that are
+    unchanged since an earlier poll are skipped before any processing, and
+    only new or changed entries count toward FEED_MAX_ENTRIES_PER_RUN, so a
+    feed longer than the cap works through its backlog over later polls.
+    Feeds whose circuit breaker is open raise FeedCircuitOpenError without a
+    request.
+    """
+    if not feed_breaker.allow(source['name']):
+        raise FeedCircuitOpenError(f"Circuit open for {source['name']}")
+
+    if not check_robots_txt(source['url']):
+        logger.warning(f"Robots.txt disallows scraping {source['url']}")
+        return FeedResult([], [])
+
+    run = {
+        'run_id': uuid.uuid4().hex,
+        'feed_name': source['name'],
+        'started_at': datetime.now(timezone.utc),
+        'entry_count': 0
+    }
+    started = time.monotonic()
+
+    domain = '/'.join(source['url'].split('/')[:3])
+    rate_limiter.wait(domain)
+
+    logger.info(f"Fetching feed from {source['name']} ({source['url']})")
+    news_items = []
+    entry_dates = []
+    skipped = 0
+    truncated = False
+    sink_seconds = 0.0
+    try:
+        fetch_started = time.monotonic()
+        response = download_feed(source['url'])
+        run.update(http_status=response.status_code, fetch_ms=elapsed_ms(fetch_started))
+        observe('feed_stage_seconds', time.monotonic() - fetch_started, stage='fetch')
+        parse_started = time.monotonic()
+        # Closing the response drops the connection when the entry cap stops reading early
+        with response:
+            reader = read_entries(source, response, run)
+            remaining = FEED_MAX_ENTRIES_PER_RUN
+            try:
+                while remaining > 0:
+                    chunk = list(itertools.islice(reader, PROCESS_CHUNK_SIZE))
+                    if not chunk:
+                        break
+                    entry_dates.extend(get_entry_date(entry) for entry in chunk)
+                    if seen is not None:
+                        unseen = seen.filter_unseen(source, chunk)
+                    else:
+                        unseen = [(entry, None) for entry in chunk]
+                    skipped += len(chunk) - len(unseen)
+                    # Entries past the cap stay unmarked and are picked up next run
+                    truncated = len(unseen) > remaining
+                    unseen = unseen[:remaining]
+                    remaining -= len(unseen)
+
+                    processed = []
+                    seen_tokens = []
+                    for entry, token in unseen:
+                        try:
+                            news_data = process_entry(source, entry, run['run_id'])
+                        except Exception as e:
+                            logger.error(f"Error processing entry from {source['name']}: {str(e)}")
+                            inc('feed_entry_errors_total', feed=source['name'])
+                            continue
+                        processed.append(news_data)
+                        seen_tokens.append(token)
+                        logger.debug(f"Successfully processed entry: {news_data['title']}")
+
+                    if processed:
+                        sink_started = time.monotonic()
+                        sink(processed, [])
+                        sink_seconds += time.monotonic() - sink_started
+                        observe('feed_stage_seconds', time.monotonic() - sink_started, stage='sink')
+                    # Only mark entries once the sink has durably stored them, so a
+                    # crash before this point means they are processed again rather than lost
+                    if seen is not None:
+                        seen.mark_seen(seen_tokens)
+                    if IMAGE_PREFETCH:
+                        image_proxy.prefetch(news_data['image_url'] for news_data in processed)
+                    news_items.extend(processed)
+                if remaining == 0 and not truncated:
+                    # The cap was met exactly; the run was cut short only if more entries follow
+                    truncated = next(reader, None) is not None
+            finally:
+                reader.close()
+    except FeedFetchError as e:
+        run.update(error=str(e), duration_ms=elapsed_ms(started), entry_count=len(entry_dates))
+        run.setdefault('http_status', e.http_status)
+        try:
+            sink([], [run])
+        except Exception as sink_error:
+            logger.error(f"Error recording failed run for {source['name']}: {str(sink_error)}")
+        observe('feed_fetch_seconds', time.monotonic() - started, feed=source['name'])
+        inc('feed_runs_total', feed=source['name'], outcome='error')
+        state = feed_breaker.record_failure(source['name'], str(e))
+        persist_breaker_state(source, state['failures'], state['open_until'], state['last_error'])
+        raise
+
+    if feed_breaker.record_success(source['name']):
+        persist_breaker_state(source, 0, None, None)
+    run.update(
+        parse_ms=int((time.monotonic() - parse_started - sink_seconds) * 1000),
+        entry_count=len(entry_dates),
+        skipped_count=skipped,
+        truncated=truncated,
+        duration_ms=elapsed_ms(started)
+    )
+    sink([], [run])
+    observe('feed_stage_seconds', run['parse_ms'] / 1000, stage='parse')
+    observe('feed_fetch_seconds', time.monotonic() - started, feed=source['name'])
+    inc('feed_runs_total', feed=source['name'], outcome='ok')
+    inc('feed_entries_total', len(news_items), outcome='processed')
+    inc('feed_entries_total', skipped, outcome='skipped')
+    if truncated:
+        inc('feed_runs_truncated_total', feed=source['name'])
+        logger.warning(
+            f"Stopped reading {source['name']} at the {FEED_MAX_ENTRIES_PER_RUN}-entry cap; "
+            f"the rest of the feed is picked up on later polls"
+        )
+    logger.info(
+        f"Successfully fetched {len(entry_dates)} items from {source['name']} "
+        f"({len(news_items)} new or changed)"
+    )
+    return FeedResult(news_items, entry_dates)
+
 class RateLimiter:
     def __init__(self, requests_per_minute: int = 30):
         self.delay = 60.0 / requests_per_minute
@@ -198,24 +427,67 @@ def check_robots_txt(url: str) -> bool:
     try:
         rp = RobotFileParser()
         domain = '/'.join(url.split('/')[:3])
-        rp.set_url(f"{domain}/robots.txt")
-        rp.read()
+        # RobotFileParser.read() has no timeout, so fetch the file ourselves
+        response = requests.get(
+            f"{domain}/robots.txt",
+            timeout=(FEED_CONNECT_TIMEOUT, FEED_READ_TIMEOUT),
+            headers={'User-Agent': USER_AGENT}
+        )
+        if response.status_code in (401, 403):
+            return False
+        if response.status_code >= 400:
+            return True
+        rp.parse(response.text.splitlines())
         return rp.can_fetch("*", url)
     except Exception as e:
         logging.warning(f"Could not check robots.txt for {url}: {str(e)}")
         return True
 
+# Feeds repeat the same timestamps on every poll, so parsed strings are memoized
+DATE_CACHE_SIZE = 4096
+
+def struct_to_datetime(parsed: time.struct_time) -> datetime:
+    """Convert one of feedparser's *_parsed structs, which are always in UTC"""
+    return datetime(*parsed[:6], tzinfo=timezone.utc)
+
+@functools.lru_cache(maxsize=DATE_CACHE_SIZE)
+def parse_date_string(date_str: str) -> datetime:
+    """Parse a timestamp, trying the formats feeds actually use before dateutil.
+
+    Raises on unparseable input; lru_cache doesn't cache exceptions, so only
+    successful parses are memoized.
+    """
+    try:
+        # RFC 822, used by RSS
+        dt = email.utils.parsedate_to_datetime(date_str)
+    except (TypeError, ValueError, IndexError):
+        try:
+            # ISO 8601, used by Atom
+            dt = datetime.fromisoformat(date_str)
+        except ValueError:
+            dt = date_parser.parse(date_str)
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt
+
 def parse_date(date_str: str) -> datetime:
     """Parse date string to timezone-aware datetime"""
     try:
-        dt = date_parser.parse(date_str)
-        if dt.tzinfo is None:
-            dt = dt.replace(tzinfo=timezone.utc)
-        return dt
+        return parse_date_string(date_str.strip())
     except Exception as e:
         logging.error(f"Error parsing date {date_str}: {str(e)}")
         return datetime.now(timezone.utc)
 
+def get_entry_date(entry: Dict[str, Any]) -> datetime:
+    """Get an entry's publication date, preferring the structs feedparser already parsed"""
+    for field in ('published', 'updated'):
+        parsed = entry.get(f'{field}_parsed')
+        if parsed:
+            return struct_to_datetime(parsed)
+        if entry.get(field):
+            return parse_date(entry[field])
+    return datetime.now(timezone.utc)
+
 
 NEWS_SOURCES = {
     'Military': [
@@ -268,31 +540,54 @@ NEWS_SOURCES = {
     ]
 }
 
-@st.cache_data(ttl=1800)  # Cache for 30 minutes
-def fetch_space_force_news() -> List[Dict[str, Any]]:
+def get_all_sources() -> List[Dict[str, str]]:
+    """Get every configured feed source as a flat list"""
+    return [source for sources in NEWS_SOURCES.values() for source in sources]
+
+def fetch_sources(sources: List[Dict[str, str]], sink: EntrySink = save_news_batch,
+                  deadline: float = REFRESH_DEADLINE_SECONDS, seen: Optional[SeenIndex] = None
+                  ) -> List[Tuple[Dict[str, str], FeedResult, Optional[Exception]]]:
+    """Fetch feeds concurrently, returning (source, result, error) for each.
+
+    Feeds still running when the deadline passes are reported as failed so the
+    caller gets partial results; they finish in the background and still reach
+    the sink.
+    """
+    executor = concurrent.futures.ThreadPoolExecutor(max_workers=FETCH_WORKERS)
+    future_to_source = {executor.submit(fetch_feed_entries, source, sink, seen): source for source in sources}
+    results = []
+    try:
+        for future in concurrent.futures.as_completed(list(future_to_source), timeout=deadline):
+            source = future_to_source.pop(future)
+            try:
+                results.append((source, future.result(), None))
+            except Exception as e:
+                results.append((source, FeedResult([], []), e))
+    except concurrent.futures.TimeoutError:
+        pending = [source['name'] for source in future_to_source.values()]
+        logger.warning(f"Refresh deadline of {deadline:.0f}s passed; still waiting on {', '.join(pending)}")
+        for source in future_to_source.values():
+            results.append((source, FeedResult([], []), FeedFetchError(f"Refresh deadline of {deadline:.0f}s exceeded")))
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+    return results
+
+def fetch_space_force_news(sink: EntrySink = save_news_batch, deadline: float = REFRESH_DEADLINE_SECONDS,
+                           seen: Optional[SeenIndex] = None) -> List[Dict[str, Any]]:
     """Fetch Space Force news from multiple sources"""
     all_news = []
 
-    with concurrent.futures.ThreadPoolExecutor(max_workers=5) as executor:
-        future_to_source = {}
+    for source, result, error in fetch_sources(get_all_sources(), sink, deadline, seen):
+        if isinstance(error, FeedCircuitOpenError):
+            logger.info(f"Skipping {source['name']}: circuit open")
+        elif error is not None:
+            logger.error(f"Error fetching feed from {source['name']}: {str(error)}")
+        else:
+            all_news.extend(result.items)
+            logger.info(f"Successfully fetched {len(result.items)} items from {source['name']}")
 
-        for category in NEWS_SOURCES.values():
-            for source in category:
-                future = executor.submit(fetch_feed, source)
-                future_to_source[future] = source['name']
+    return all_news
 
-        for future in concurrent.futures.as_completed(future_to_source):
-            source_name = future_to_source[future]
-            try:
-                news_items = future.result()
-                all_news.extend(news_items)
-                logger.info(f"Successfully fetched {len(news_items)} items from {source_name}")
-            except Exception as e:
-                logger.error(f"Error processing {source_name}: {str(e)}")
-
-    return get_news()
-
-@st.cache_data(ttl=3600)  # Cache for 1 hour
 def fetch_space_force_events() -> List[Dict[str, Any]]:
     """Fetch Space Force upcoming events"""
     try:
@@ -321,22 +616,3 @@ def fetch_space_force_events() -> List[Dict[str, Any]]:
     except Exception as e:
         logger.error(f"Error fetching events: {str(e)}")
         return []
-
-def init_background_scraping() -> None:
-    """Initialize background scraping thread"""
-    def scrape_periodically() -> None:
-        while True:
-            try:
-                fetch_space_force_news()
-                fetch_space_force_events()
-                logger.info("Background scraping completed successfully")
-            except Exception as e:
-                logger.error(f"Error in background scraping: {str(e)}")
-            time.sleep(1800)  # Wait 30 minutes
-
-    thread = threading.Thread(target=scrape_periodically, daemon=True)
-    thread.start()
-    logger.info("Background scraping initialized")
-
-# Initialize background scraping when the module is imported
-init_background_scraping()
\ No newline at end of file
@@ -1,7 +1,9 @@
 from datetime import datetime, timedelta, timezone
 import pandas as pd
 from utils.timezone_utils import convert_timezone, format_datetime
+from utils.metrics import timed
 
+@timed('processing_seconds', step='filter_by_date')
 def filter_events_by_date(events, start_date, end_date):
     """Filter events based on date range"""
     # Ensure start and end dates are timezone-aware
@@ -15,6 +17,7 @@ def filter_events_by_date(events, start_date, end_date):
         if start_date <= event['date'].replace(tzinfo=timezone.utc) <= end_date
     ]
 
+@timed('processing_seconds', step='filter_by_category')
 def filter_events_by_category(events, category):
     """Filter events by category"""
     if category == "All":
@@ -24,6 +27,7 @@ def filter_events_by_category(events, category):
         if event['category'] == category
     ]
 
+@timed('processing_seconds', step='search')
 def search_events(events, search_query):
     """Search events by title and description"""
     search_query = search_query.lower()
@@ -44,6 +48,7 @@ def format_date(date):
     """Format datetime object to string with timezone"""
     return format_datetime(date)
 
+@timed('processing_seconds', step='timeline_data')
 def prepare_timeline_data(events):
     """Prepare data for timeline visualization"""
     timeline_data = []
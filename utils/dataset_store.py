@@ -0,0 +1,141 @@
+import os
+import itertools
+import threading
+import logging
+from datetime import datetime, timezone
+from types import MappingProxyType
+from typing import List, Dict, Any, Optional, Tuple, Mapping, NamedTuple, Callable
+from utils.db import get_news, get_events
+
+logger = logging.getLogger(__name__)
+
+# Dashboards only read what the ingestion worker (utils.ingest) has stored,
+# so re-reading the database is cheap and can happen often
+DATASET_TTL_SECONDS = int(os.getenv('DATASET_TTL_SECONDS', '300'))
+
+class DatasetSnapshot(NamedTuple):
+    """Immutable, versioned view of the news and events lists"""
+    version: int
+    news: Tuple[Mapping[str, Any], ...]
+    events: Tuple[Mapping[str, Any], ...]
+    published_at: datetime
+    # When the newest item in the snapshot was stored by the ingest worker
+    latest_item_at: Optional[datetime] = None
+
+    def age_seconds(self) -> float:
+        """Seconds since this snapshot was published"""
+        return (datetime.now(timezone.utc) - self.published_at).total_seconds()
+
+    def data_age_seconds(self) -> Optional[float]:
+        """Seconds since the newest item was stored, or None for an empty dataset"""
+        if self.latest_item_at is None:
+            return None
+        return (datetime.now(timezone.utc) - self.latest_item_at).total_seconds()
+
+def freeze_items(items: List[Dict[str, Any]]) -> Tuple[Mapping[str, Any], ...]:
+    """Copy items into read-only mappings so sessions can share them safely"""
+    return tuple(MappingProxyType(dict(item)) for item in items)
+
+def latest_created_at(*item_lists: Tuple[Mapping[str, Any], ...]) -> Optional[datetime]:
+    """Newest created_at across the given items"""
+    return max(
+        (item['created_at'] for items in item_lists for item in items if item.get('created_at')),
+        default=None
+    )
+
+# Versions are unique across stores, so a result keyed on a version can
+# never be mistaken for one computed from other data
+_versions = itertools.count(1)
+
+class DatasetStore:
+    """Holds the current dataset snapshot once per process"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.snapshot: Optional[DatasetSnapshot] = None
+        self.listeners: List[Callable[[DatasetSnapshot], None]] = []
+
+    def add_listener(self, listener: Callable[[DatasetSnapshot], None]) -> None:
+        """Call listener with every snapshot published from now on"""
+        with self.lock:
+            self.listeners.append(listener)
+
+    def current(self) -> Optional[DatasetSnapshot]:
+        # Reading a single attribute is atomic; publishers swap the whole snapshot
+        return self.snapshot
+
+    def publish(self, news: List[Dict[str, Any]], events: List[Dict[str, Any]]) -> DatasetSnapshot:
+        """Publish a new snapshot version built from fresh news and events"""
+        frozen_news = freeze_items(news)
+        frozen_events = freeze_items(events)
+        with self.lock:
+            version = next(_versions)
+            snapshot = DatasetSnapshot(
+                version=version,
+                news=frozen_news,
+                events=frozen_events,
+                published_at=datetime.now(timezone.utc),
+                latest_item_at=latest_created_at(frozen_news, frozen_events)
+            )
+            self.snapshot = snapshot
+            listeners = list(self.listeners)
+        logger.info(f"Published dataset version {version} ({len(frozen_news)} news, {len(frozen_events)} events)")
+        for listener in listeners:
+            try:
+                listener(snapshot)
+            except Exception as e:
+                logger.error(f"Error in dataset listener: {str(e)}")
+        return snapshot
+
+# Held at module level rather than in st.cache_resource, which
+# optimize_cache() clears under memory pressure: that would force a blocking
+# cold reload and drop the dispatcher's listener
+_store = DatasetStore()
+
+def get_dataset_store() -> DatasetStore:
+    """Get the process-wide dataset store shared by all sessions"""
+    return _store
+
+# Serializes reloads so concurrent sessions don't query the same rows twice
+_refresh_lock = threading.Lock()
+_cold_start_lock = threading.Lock()
+
+def refresh_dataset() -> DatasetSnapshot:
+    """Reload news and events from the database and publish a new snapshot"""
+    with _refresh_lock:
+        return get_dataset_store().publish(get_news(), get_events())
+
+def is_refresh_in_progress() -> bool:
+    """Check whether a dataset refresh is currently running"""
+    return _refresh_lock.locked()
+
+def start_background_refresh() -> bool:
+    """Start a background refresh unless one is already running"""
+    # Non-blocking acquire deduplicates refreshes across all sessions
+    if not _refresh_lock.acquire(blocking=False):
+        return False
+
+    def run_refresh() -> None:
+        try:
+            get_dataset_store().publish(get_news(), get_events())
+        except Exception as e:
+            logger.error(f"Error in background dataset refresh: {str(e)}")
+        finally:
+            _refresh_lock.release()
+
+    threading.Thread(target=run_refresh, name="dataset-refresh", daemon=True).start()
+    logger.info("Started background dataset refresh")
+    return True
+
+def get_dataset_snapshot() -> DatasetSnapshot:
+    """Get the shared dataset snapshot immediately, revalidating it in the background when stale"""
+    store = get_dataset_store()
+    snapshot = store.current()
+    if snapshot is None:
+        with _cold_start_lock:
+            snapshot = store.current()
+            if snapshot is None:
+                snapshot = refresh_dataset()
+    elif snapshot.age_seconds() > DATASET_TTL_SECONDS:
+        start_background_refresh()
+    return snapshot
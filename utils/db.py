@@ -1,11 +1,13 @@
 import os
 import psycopg2
-from psycopg2.extras import RealDictCursor
+from psycopg2.extras import RealDictCursor, execute_values
 from datetime import datetime, timezone
 import hashlib
+import time
 import json
 from typing import Optional, Dict, Any
 import logging
+from utils.metrics import timed, inc
 
 # Configure logging
 logging.basicConfig(
@@ -14,13 +16,14 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-def get_db_connection():
+def get_db_connection(**kwargs):
     """Create a database connection"""
     print(os.getenv('DATABASE_URL'))  # Add this line to debug
     logger.info(f"DATABASE_URL: {os.getenv('DATABASE_URL')}")
     return psycopg2.connect(
         os.environ['DATABASE_URL'],
-        cursor_factory=RealDictCursor
+        cursor_factory=RealDictCursor,
+        **kwargs
     )
 
 def calculate_content_hash(content_dict: Dict[str, Any]) -> str:
@@ -56,6 +59,7 @@ def ensure_category(category_name: str) -> Optional[int]:
         return None
 
 # db.py
+@timed('db_query_seconds', query='save_event')
 def save_event(event_data):
     """Save an event to the database with deduplication"""
     logger.debug(f"Saving event: {event_data}")
@@ -116,6 +120,7 @@ def save_event(event_data):
                 return None
 
 # filepath: /Users/jono/Documents/GitHub/SpaceForceDataFeed/utils/db.py
+@timed('db_query_seconds', query='save_news')
 def save_news(news_data):
     """Save a news item to the database with deduplication"""
     logger.debug(f"Saving news: {news_data}")
@@ -175,6 +180,161 @@ def save_news(news_data):
                 conn.rollback()
                 return None
 
+def ensure_categories(cur, category_names):
+    """Ensure categories exist and return a name -> ID mapping"""
+    names = sorted(set(category_names))
+    execute_values(
+        cur,
+        "INSERT INTO categories (name) VALUES %s ON CONFLICT (name) DO NOTHING",
+        [(name,) for name in names]
+    )
+    cur.execute("SELECT id, name FROM categories WHERE name = ANY(%s)", (names,))
+    return {row['name']: row['id'] for row in cur.fetchall()}
+
+@timed('db_query_seconds', query='save_news_batch')
+def save_news_batch(news_items, runs=()):
+    """Upsert many news items in one round trip; safe to replay.
+
+    `runs` are feed_runs records for the fetches that produced the items. They
+    are written in the same transaction, along with each run's new, updated and
+    duplicate counts for this batch; a replayed batch keeps its first counts.
+    Returns the number of rows inserted or changed.
+    """
+    # A single INSERT can't update the same row twice, so keep the last copy
+    # of each (title, source) pair
+    unique_items = {}
+    for news_data in news_items:
+        unique_items[(news_data['title'], news_data.get('source', ''))] = news_data
+
+    with get_db_connection() as conn:
+        with conn.cursor() as cur:
+            if runs:
+                write_feed_runs(cur, runs)
+
+            written = []
+            started = time.monotonic()
+            if unique_items:
+                category_ids = ensure_categories(cur, [item['category'] for item in unique_items.values()])
+
+                rows = []
+                for news_data in unique_items.values():
+                    # Ensure date is timezone-aware
+                    news_date = news_data['date']
+                    if news_date.tzinfo is None:
+                        news_date = news_date.replace(tzinfo=timezone.utc)
+
+                    content_hash = calculate_content_hash({
+                        'title': news_data['title'],
+                        'description': news_data.get('description', ''),
+                        'source': news_data.get('source', ''),
+                        'category': news_data['category']
+                    })
+                    rows.append((
+                        news_data['title'],
+                        news_data.get('description', ''),
+                        news_date,
+                        news_data.get('source', ''),
+                        news_data.get('link', ''),
+                        category_ids[news_data['category']],
+                        content_hash,
+                        news_data.get('image_url')
+                    ))
+
+                # Unchanged rows are skipped rather than rewritten, so they come back
+                # from RETURNING only when inserted (xmax = 0) or actually updated
+                written = execute_values(cur, """
+                    INSERT INTO news (
+                        title, description, publication_date, source,
+                        link, category_id, content_hash, image_url
+                    )
+                    VALUES %s
+                    ON CONFLICT (title, source) DO UPDATE
+                    SET
+                        description = EXCLUDED.description,
+                        publication_date = EXCLUDED.publication_date,
+                        link = EXCLUDED.link,
+                        content_hash = EXCLUDED.content_hash,
+                        image_url = EXCLUDED.image_url,
+                        updated_at = CURRENT_TIMESTAMP
+                    WHERE (news.content_hash, news.publication_date, news.link, news.image_url)
+                        IS DISTINCT FROM (EXCLUDED.content_hash, EXCLUDED.publication_date, EXCLUDED.link, EXCLUDED.image_url)
+                    RETURNING title, source, (xmax = 0) AS inserted
+                """, rows, page_size=500, fetch=True)
+
+            run_counts = count_run_outcomes(news_items, unique_items, written)
+            if run_counts:
+                db_ms = (time.monotonic() - started) * 1000
+                record_feed_run_batches(cur, run_counts, db_ms, len(news_items))
+            conn.commit()
+            inc('db_news_rows_written_total', len(written))
+            logger.debug(f"Saved batch of {len(unique_items)} news items, {len(written)} new or changed")
+            return len(written)
+
+def count_run_outcomes(news_items, unique_items, written):
+    """Tally new, updated and duplicate entries per feed run"""
+    outcomes = {(row['title'], row['source']): 'new' if row['inserted'] else 'updated' for row in written}
+    run_counts = {}
+    for news_data in news_items:
+        run_id = news_data.get('run_id')
+        if not run_id:
+            continue
+        counts = run_counts.setdefault(run_id, {
+            'new': 0, 'updated': 0, 'duplicate': 0, 'entries': 0, 'keys': []
+        })
+        counts['entries'] += 1
+        key = (news_data['title'], news_data.get('source', ''))
+        counts['keys'].append(key)
+        # Only the copy that survived in-batch deduplication can have been written
+        if unique_items[key] is news_data and key in outcomes:
+            counts[outcomes[key]] += 1
+        else:
+            counts['duplicate'] += 1
+    for counts in run_counts.values():
+        counts['batch_id'] = batch_id(counts.pop('keys'))
+    return run_counts
+
+def batch_id(keys):
+    """Identify a run's share of a batch by its entries, so a replay maps to the same row"""
+    digest = hashlib.blake2b(digest_size=16)
+    for title, source in sorted(keys):
+        digest.update(f"{title}\0{source}\0".encode())
+    return digest.hexdigest()
+
+FEED_RUN_FIELDS = (
+    'run_id', 'feed_name', 'started_at', 'duration_ms', 'fetch_ms', 'parse_ms',
+    'bytes', 'http_status', 'entry_count', 'skipped_count', 'truncated', 'error'
+)
+
+def write_feed_runs(cur, runs):
+    """Upsert fetch measurements for feed runs"""
+    runs = [
+        dict(run, skipped_count=run.get('skipped_count') or 0, truncated=bool(run.get('truncated')))
+        for run in runs
+    ]
+    execute_values(cur, f"""
+        INSERT INTO feed_runs ({', '.join(FEED_RUN_FIELDS)})
+        VALUES %s
+        ON CONFLICT (run_id) DO UPDATE
+        SET {', '.join(f'{field} = EXCLUDED.{field}' for field in FEED_RUN_FIELDS[1:])}
+    """, [tuple(run.get(field) for field in FEED_RUN_FIELDS) for run in runs])
+
+def record_feed_run_batches(cur, run_counts, db_ms, total_entries):
+    """Store a batch's write outcomes per feed run, splitting DB time by entry share.
+
+    Each run's counts are kept per batch and summed when read, so a batch
+    written twice (e.g. replayed from the spool after a crash before it was
+    acknowledged) is counted once, with the outcome of its first write.
+    """
+    execute_values(cur, """
+        INSERT INTO feed_run_batches (run_id, batch_id, db_ms, new_count, updated_count, duplicate_count)
+        VALUES %s
+        ON CONFLICT (run_id, batch_id) DO NOTHING
+    """, [
+        (run_id, counts['batch_id'], int(db_ms * counts['entries'] / total_entries),
+         counts['new'], counts['updated'], counts['duplicate'])
+        for run_id, counts in run_counts.items()
+    ])
+
 def convert_to_dict(row):
     """Convert database row to dictionary with proper date field name"""
     if not row:
@@ -200,6 +360,7 @@ def convert_to_dict(row):
     
     return result
 
+@timed('db_query_seconds', query='get_events')
 def get_events(start_date=None, end_date=None, category=None):
     """Retrieve events from the database with optional filters"""
     with get_db_connection() as conn:
@@ -232,6 +393,7 @@ def get_events(start_date=None, end_date=None, category=None):
             results = cur.fetchall()
             return [convert_to_dict(row) for row in results]
 
+@timed('db_query_seconds', query='get_news')
 def get_news(start_date=None, end_date=None, category=None):
     """Retrieve news from the database with optional filters"""
     with get_db_connection() as conn:
@@ -262,4 +424,285 @@ def get_news(start_date=None, end_date=None, category=None):
             
             cur.execute(query, params)
             results = cur.fetchall()
-            return [convert_to_dict(row) for row in results]
\ No newline at end of file
+            return [convert_to_dict(row) for row in results]
+
+@timed('db_query_seconds', query='get_ingest_cursor')
+def get_ingest_cursor():
+    """Get the newest news and event ids, where new-item detection starts"""
+    with get_db_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute("""
+                SELECT
+                    (SELECT COALESCE(MAX(id), 0) FROM news) AS news_id,
+                    (SELECT COALESCE(MAX(id), 0) FROM events) AS event_id
+            """)
+            row = cur.fetchone()
+            return row['news_id'], row['event_id']
+
+@timed('db_query_seconds', query='get_items_since')
+def get_items_since(news_id, event_id, lag_seconds=0, limit=500):
+    """Get news and events ingested after the given ids, in ingest order per table.
+
+    Ids are handed out when a row is inserted, not when it commits, so a
+    concurrent writer can commit a lower id after a higher one was already
+    read. Rows at or below the ids that were created in the last
+    `lag_seconds` are returned again as well; callers drop the ones they
+    have already seen.
+    """
+    with get_db_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute("""
+                (SELECT 'news' AS kind, n.id, n.title, n.description, n.publication_date,
+                        n.link, c.name AS category
+                 FROM news n
+                 JOIN categories c ON n.category_id = c.id
+                 WHERE n.id > %(news_id)s
+                 ORDER BY n.id
+                 LIMIT %(limit)s)
+                UNION ALL
+                (SELECT 'news' AS kind, n.id, n.title, n.description, n.publication_date,
+                        n.link, c.name AS category
+                 FROM news n
+                 JOIN categories c ON n.category_id = c.id
+                 WHERE n.id <= %(news_id)s
+                   AND n.created_at >= CURRENT_TIMESTAMP - make_interval(secs => %(lag)s)
+                 ORDER BY n.id
+                 LIMIT %(limit)s)
+                UNION ALL
+                (SELECT 'event' AS kind, e.id, e.title, e.description, e.event_date,
+                        NULL, c.name AS category
+                 FROM events e
+                 JOIN categories c ON e.category_id = c.id
+                 WHERE e.id > %(event_id)s
+                 ORDER BY e.id
+                 LIMIT %(limit)s)
+                UNION ALL
+                (SELECT 'event' AS kind, e.id, e.title, e.description, e.event_date,
+                        NULL, c.name AS category
+                 FROM events e
+                 JOIN categories c ON e.category_id = c.id
+                 WHERE e.id <= %(event_id)s
+                   AND e.created_at >= CURRENT_TIMESTAMP - make_interval(secs => %(lag)s)
+                 ORDER BY e.id
+                 LIMIT %(limit)s)
+            """, {'news_id': news_id, 'event_id': event_id, 'lag': lag_seconds, 'limit': limit})
+            return [convert_to_dict(row) for row in cur.fetchall()]
+
+@timed('db_query_seconds', query='sync_feed_registry')
+def sync_feed_registry(sources):
+    """Register configured feed sources, keeping each feed's learned schedule"""
+    with get_db_connection() as conn:
+        with conn.cursor() as cur:
+            for source in sources:
+                cur.execute("""
+                    INSERT INTO feeds (name, url, category)
+                    VALUES (%s, %s, %s)
+                    ON CONFLICT (name) DO UPDATE
+                    SET
+                        url = EXCLUDED.url,
+                        category = EXCLUDED.category,
+                        updated_at = CURRENT_TIMESTAMP
+                """, (source['name'], source['url'], source['category']))
+            conn.commit()
+
+@timed('db_query_seconds', query='claim_due_feeds')
+def claim_due_feeds(worker_id, limit, lease_seconds):
+    """Lease up to `limit` due feeds to a worker; concurrent workers never get the same feed"""
+    with get_db_connection() as conn:
+        with conn.cursor() as cur:
+            # SKIP LOCKED lets workers claim disjoint batches without waiting on each other;
+            # an expired lease means its worker died and the feed is up for grabs again
+            cur.execute("""
+                UPDATE feeds
+                SET
+                    lease_owner = %s,
+                    lease_expires_at = CURRENT_TIMESTAMP + make_interval(secs => %s)
+                WHERE id IN (
+                    SELECT id FROM feeds
+                    WHERE enabled
+                      AND next_poll_at <= CURRENT_TIMESTAMP
+                      AND (lease_expires_at IS NULL OR lease_expires_at < CURRENT_TIMESTAMP)
+                      AND (circuit_open_until IS NULL OR circuit_open_until <= CURRENT_TIMESTAMP)
+                    ORDER BY next_poll_at
+                    LIMIT %s
+                    FOR UPDATE SKIP LOCKED
+                )
+                RETURNING id, name, url, category, poll_interval_seconds, newest_entry_at,
+                          consecutive_failures, circuit_open_until, last_error
+            """, (worker_id, lease_seconds, limit))
+            conn.commit()
+            return [dict(row) for row in cur.fetchall()]
+
+@timed('db_query_seconds', query='release_feed')
+def release_feed(feed_id, worker_id, poll_interval_seconds, next_poll_at, newest_entry_at):
+    """Release a leased feed and record when it should next be polled"""
+    with get_db_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute("""
+                UPDATE feeds
+                SET
+                    lease_owner = NULL,
+                    lease_expires_at = NULL,
+                    last_polled_at = CURRENT_TIMESTAMP,
+                    poll_interval_seconds = %s,
+                    next_poll_at = %s,
+                    newest_entry_at = COALESCE(%s, newest_entry_at),
+                    updated_at = CURRENT_TIMESTAMP
+                WHERE id = %s AND lease_owner = %s
+            """, (int(poll_interval_seconds), next_poll_at, newest_entry_at, feed_id, worker_id))
+            conn.commit()
+            return cur.rowcount > 0
+
+@timed('db_query_seconds', query='record_feed_health')
+def record_feed_health(source, consecutive_failures, circuit_open_until, last_error):
+    """Persist a feed's circuit breaker state so other processes and the dashboard can see it"""
+    succeeded = consecutive_failures == 0
+    with get_db_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute("""
+                INSERT INTO feeds (
+                    name, url, category, consecutive_failures, circuit_open_until,
+                    last_error, last_success_at, last_failure_at
+                )
+                VALUES (%s, %s, %s, %s, %s, %s,
+                        CASE WHEN %s THEN CURRENT_TIMESTAMP END,
+                        CASE WHEN %s THEN NULL ELSE CURRENT_TIMESTAMP END)
+                ON CONFLICT (name) DO UPDATE
+                SET
+                    consecutive_failures = EXCLUDED.consecutive_failures,
+                    circuit_open_until = EXCLUDED.circuit_open_until,
+                    last_error = EXCLUDED.last_error,
+                    last_success_at = COALESCE(EXCLUDED.last_success_at, feeds.last_success_at),
+                    last_failure_at = COALESCE(EXCLUDED.last_failure_at, feeds.last_failure_at),
+                    updated_at = CURRENT_TIMESTAMP
+            """, (
+                source['name'], source['url'], source['category'], consecutive_failures,
+                circuit_open_until, last_error, succeeded, succeeded
+            ))
+            conn.commit()
+
+@timed('db_query_seconds', query='get_feed_health')
+def get_feed_health():
+    """Get circuit breaker state for every registered feed"""
+    try:
+        with get_db_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute("""
+                    SELECT name, consecutive_failures, circuit_open_until, last_error,
+                           last_success_at, last_failure_at
+                    FROM feeds
+                    ORDER BY name
+                """)
+                return [dict(row) for row in cur.fetchall()]
+    except Exception as e:
+        logger.error(f"Error fetching feed health: {str(e)}")
+        return []
+
+@timed('db_query_seconds', query='get_feed_run_stats')
+def get_feed_run_stats(hours=24):
+    """Summarize recent feed runs per feed: latency percentiles, size and yield"""
+    try:
+        with get_db_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute("""
+                    SELECT
+                        feed_name,
+                        COUNT(*) AS runs,
+                        COUNT(*) FILTER (WHERE error IS NOT NULL) AS failures,
+                        percentile_cont(0.5) WITHIN GROUP (ORDER BY duration_ms) AS p50_ms,
+                        percentile_cont(0.95) WITHIN GROUP (ORDER BY duration_ms) AS p95_ms,
+                        AVG(fetch_ms)::float AS avg_fetch_ms,
+                        AVG(parse_ms)::float AS avg_parse_ms,
+                        AVG(COALESCE(b.db_ms, 0))::float AS avg_db_ms,
+                        AVG(bytes)::float AS avg_bytes,
+                        COALESCE(SUM(entry_count), 0) AS entries,
+                        COALESCE(SUM(b.new_count), 0)::bigint AS new_count,
+                        COALESCE(SUM(b.updated_count), 0)::bigint AS updated_count,
+                        COALESCE(SUM(b.duplicate_count), 0)::bigint AS duplicate_count,
+                        SUM(skipped_count) AS skipped_count,
+                        COUNT(*) FILTER (WHERE truncated) AS truncated_runs,
+                        MAX(started_at) AS last_run_at
+                    FROM feed_runs
+                    LEFT JOIN (
+                        -- A run's batches are all written after it started
+                        SELECT
+                            run_id,
+                            SUM(db_ms) AS db_ms,
+                            SUM(new_count) AS new_count,
+                            SUM(updated_count) AS updated_count,
+                            SUM(duplicate_count) AS duplicate_count
+                        FROM feed_run_batches
+                        WHERE created_at >= CURRENT_TIMESTAMP - make_interval(hours => %s)
+                        GROUP BY run_id
+                    ) b USING (run_id)
+                    WHERE started_at >= CURRENT_TIMESTAMP - make_interval(hours => %s)
+                    GROUP BY feed_name
+                    ORDER BY p95_ms DESC NULLS LAST
+                """, (hours, hours))
+                return [dict(row) for row in cur.fetchall()]
+    except Exception as e:
+        logger.error(f"Error fetching feed run stats: {str(e)}")
+        return []
+
+@timed('db_query_seconds', query='prune_feed_runs')
+def prune_feed_runs(retention_days):
+    """Delete feed run records older than the retention period"""
+    with get_db_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute(
+                "DELETE FROM feed_run_batches WHERE created_at < CURRENT_TIMESTAMP - make_interval(days => %s)",
+                (retention_days,)
+            )
+            cur.execute(
+                "DELETE FROM feed_runs WHERE started_at < CURRENT_TIMESTAMP - make_interval(days => %s)",
+                (retention_days,)
+            )
+            conn.commit()
+            return cur.rowcount
+
+@timed('db_query_seconds', query='save_briefing')
+def save_briefing(fingerprint, content, event_keys, model, generation_ms):
+    """Store a generated briefing under the fingerprint of the events it covers"""
+    with get_db_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute("""
+                INSERT INTO briefings (fingerprint, content, event_keys, event_count, model, generation_ms)
+                VALUES (%s, %s, %s, %s, %s, %s)
+                ON CONFLICT (fingerprint) DO UPDATE
+                SET
+                    content = EXCLUDED.content,
+                    model = EXCLUDED.model,
+                    generation_ms = EXCLUDED.generation_ms,
+                    created_at = CURRENT_TIMESTAMP
+            """, (fingerprint, content, json.dumps(sorted(event_keys)), len(event_keys), model, generation_ms))
+            conn.commit()
+
+@timed('db_query_seconds', query='get_briefing')
+def get_briefing(fingerprint):
+    """Get the stored briefing for an event-set fingerprint, if any"""
+    with get_db_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute("""
+                SELECT fingerprint, content, event_keys, model, created_at
+                FROM briefings
+                WHERE fingerprint = %s
+            """, (fingerprint,))
+            row = cur.fetchone()
+            return dict(row) if row else None
+
+@timed('db_query_seconds', query='get_recent_briefings')
+def get_recent_briefings(limit=20):
+    """Get the most recently generated briefings, newest first"""
+    try:
+        with get_db_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute("""
+                    SELECT fingerprint, content, event_keys, model, created_at
+                    FROM briefings
+                    ORDER BY created_at DESC
+                    LIMIT %s
+                """, (limit,))
+                return [dict(row) for row in cur.fetchall()]
+    except Exception as e:
+        logger.error(f"Error fetching briefings: {str(e)}")
+        return []
@@ -0,0 +1,99 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, Future
+from datetime import date, datetime, timezone
+from typing import List, Dict, Any, Tuple, Callable, Optional
+import numpy as np
+import pandas as pd
+
+SECONDS_PER_DAY = 86400
+
+# From this many events the statistics, trends and heatmap of Detailed
+# Analysis are computed from one set of columnar counts instead of three
+# separate pandas passes. `python -m utils.aggregates_benchmark` measures both;
+# the counts took a third of the pandas time or less at every size tried,
+# from 10 events to 200,000, so they are used throughout by default.
+AGGREGATE_MIN_EVENTS = int(os.getenv('ANALYTICS_AGGREGATE_MIN_EVENTS', '1'))
+# From this many events Detailed Analysis is computed on a worker thread, so
+# a long date range doesn't hold up the session's rerun
+BACKGROUND_MIN_EVENTS = int(os.getenv('ANALYTICS_BACKGROUND_MIN_EVENTS', '20000'))
+ANALYTICS_WORKERS = int(os.getenv('ANALYTICS_WORKERS', '2'))
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+def should_use_aggregates(events: List[Dict[str, Any]]) -> bool:
+    """Check whether a dataset is large enough for the columnar aggregates"""
+    return len(events) >= AGGREGATE_MIN_EVENTS
+
+def should_run_in_background(events: List[Dict[str, Any]]) -> bool:
+    """Check whether a dataset is large enough to analyze off the script thread"""
+    return len(events) >= BACKGROUND_MIN_EVENTS
+
+def submit_analysis(compute: Callable[[], Any]) -> Future:
+    """Run an analysis on the process-wide analytics workers"""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=ANALYTICS_WORKERS, thread_name_prefix='analytics')
+    return _executor.submit(compute)
+
+def encode_events(events: List[Dict[str, Any]]) -> Tuple[pd.DatetimeIndex, np.ndarray, np.ndarray, List[str]]:
+    """Encode events as their dates, wall-clock epoch seconds and category codes.
+
+    Days and hours are counted in each date's own timezone, as the pandas
+    path does; naive dates are taken as UTC. The conversion runs in pandas'
+    vectorized datetime parser rather than a Python loop per event.
+    """
+    categories = sorted({event['category'] for event in events})
+    category_codes = {category: code for code, category in enumerate(categories)}
+
+    dates = [event['date'] for event in events]
+    try:
+        index = pd.DatetimeIndex(pd.to_datetime(dates))
+    except (ValueError, TypeError):
+        # Mixed UTC offsets can't share one wall clock; fall back to UTC
+        index = pd.DatetimeIndex(pd.to_datetime(dates, utc=True))
+    if index.tz is None:
+        index = index.tz_localize(timezone.utc)
+    wall_clock = index.tz_localize(None).asi8 // 10**9
+    codes = np.fromiter((category_codes[event['category']] for event in events), dtype=np.int32, count=len(events))
+    return index, wall_clock, codes, categories
+
+def aggregate_arrays(wall_clock: np.ndarray, codes: np.ndarray, n_categories: int) -> Dict[str, Any]:
+    """Count encoded events per day and category, per category, and per weekday and hour"""
+    days = wall_clock // SECONDS_PER_DAY
+    first_day = int(days.min())
+    local_days = days - first_day
+    n_days = int(local_days.max()) + 1
+
+    # 1970-01-01 was a Thursday; shift so Monday is 0 like pandas day_name order
+    weekdays = (days + 3) % 7
+    hours = (wall_clock % SECONDS_PER_DAY) // 3600
+
+    return {
+        'first_day': first_day,
+        'category_counts': np.bincount(codes, minlength=n_categories),
+        'day_category_counts': np.bincount(
+            local_days * n_categories + codes,
+            minlength=n_days * n_categories
+        ).reshape(n_days, n_categories),
+        'weekday_hour_counts': np.bincount(weekdays * 24 + hours, minlength=7 * 24).reshape(7, 24)
+    }
+
+def compute_aggregates(events: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Compute the counts behind event statistics, category trends and the heatmap in one pass"""
+    dates, wall_clock, codes, categories = encode_events(events)
+    aggregates = aggregate_arrays(wall_clock, codes, len(categories))
+    aggregates['categories'] = categories
+    aggregates['first_date'] = dates.min()
+    aggregates['last_date'] = dates.max()
+    return aggregates
+
+def daily_totals(aggregates: Dict[str, Any]) -> np.ndarray:
+    """Get per-day event totals from the aggregates"""
+    return aggregates['day_category_counts'].sum(axis=1)
+
+def day_to_date(first_day: int, offset: int) -> date:
+    """Convert a day offset in the aggregates back to a calendar date in the events' timezone"""
+    return datetime.fromtimestamp((first_day + offset) * SECONDS_PER_DAY, tz=timezone.utc).date()
@@ -3,7 +3,10 @@ import pandas as pd
 import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
+from utils.metrics import timed
+from utils.event_aggregates import should_use_aggregates, compute_aggregates, daily_totals, day_to_date
 
+@timed('analytics_seconds', step='event_frequency')
 def analyze_event_frequency(events, time_window='D'):
     """Analyze event frequency over time"""
     end_date = datetime.now(timezone.utc)
@@ -43,8 +46,13 @@ def analyze_event_frequency(events, time_window='D'):
     
     return pd.DataFrame({'count': frequency})
 
-def analyze_category_trends(events):
-    """Analyze trends in event categories over time"""
+@timed('analytics_seconds', step='category_trends')
+def analyze_category_trends(events, aggregates=None):
+    """Analyze trends in event categories over time
+
+    Pass the result of compute_aggregates to reuse counts already taken
+    for the same events.
+    """
     end_date = datetime.now(timezone.utc)
     start_date = end_date - timedelta(days=30)
     
@@ -55,6 +63,11 @@ def analyze_category_trends(events):
             'count': [0] * 2
         })
     
+    if aggregates is None and should_use_aggregates(events):
+        aggregates = compute_aggregates(events)
+    if aggregates is not None:
+        return _category_trends_from_aggregates(aggregates, start_date, end_date)
+    
     df = pd.DataFrame(events)
     df['date'] = pd.to_datetime(df['date'])
     
@@ -62,34 +75,59 @@ def analyze_category_trends(events):
     if df['date'].dt.tz is None:
         df['date'] = df['date'].dt.tz_localize(timezone.utc)
     
-    # Create date range from min to max date
+    # Create date range from min to max date, in the events' timezone
+    tz = df['date'].dt.tz
     date_range = pd.date_range(
-        start=min(df['date'].min(), start_date),
-        end=max(df['date'].max(), end_date),
+        start=min(df['date'].min(), pd.Timestamp(start_date).tz_convert(tz)),
+        end=max(df['date'].max(), pd.Timestamp(end_date).tz_convert(tz)),
         freq='D'
     )
     categories = sorted(df['category'].unique())
     
     # Initialize empty DataFrame with all combinations
-    trends_df = pd.DataFrame([
-        {'date': date, 'category': cat, 'count': 0}
-        for date in date_range
-        for cat in categories
-    ])
-    
-    # Count events for each date-category combination
-    actual_counts = df.groupby([df['date'].dt.date, 'category']).size().reset_index()
-    actual_counts.columns = ['date', 'category', 'count']
+    trends_df = pd.DataFrame({
+        'date': np.repeat(date_range, len(categories)),
+        'category': np.tile(categories, len(date_range))
+    })
     
-    # Update counts in the full DataFrame
-    for _, row in actual_counts.iterrows():
-        mask = (trends_df['date'].dt.date == row['date']) & (trends_df['category'] == row['category'])
-        trends_df.loc[mask, 'count'] = row['count']
+    # Count events for each date-category combination and look the combinations up
+    actual_counts = df.groupby([df['date'].dt.date, 'category']).size()
+    combinations = pd.MultiIndex.from_arrays([trends_df['date'].dt.date, trends_df['category']])
+    trends_df['count'] = actual_counts.reindex(combinations, fill_value=0).to_numpy()
     
     return trends_df
 
-def generate_event_stats(events):
-    """Generate statistical insights about events"""
+def _category_trends_from_aggregates(aggregates, start_date, end_date):
+    """Build the category trends frame from event aggregates"""
+    min_date = aggregates['first_date']
+    max_date = aggregates['last_date']
+    date_range = pd.date_range(
+        start=min(min_date, pd.Timestamp(start_date).tz_convert(min_date.tz)),
+        end=max(max_date, pd.Timestamp(end_date).tz_convert(max_date.tz)),
+        freq='D'
+    )
+    categories = aggregates['categories']
+    day_counts = aggregates['day_category_counts']
+    
+    # Look up each local calendar day in the day x category matrix
+    offsets = (date_range.tz_localize(None).normalize().asi8 // 10**9 // 86400) - aggregates['first_day']
+    in_range = (offsets >= 0) & (offsets < day_counts.shape[0])
+    counts = np.zeros((len(date_range), len(categories)), dtype=np.int64)
+    counts[in_range] = day_counts[offsets[in_range]]
+    
+    return pd.DataFrame({
+        'date': np.repeat(date_range, len(categories)),
+        'category': np.tile(categories, len(date_range)),
+        'count': counts.ravel()
+    })
+
+@timed('analytics_seconds', step='event_stats')
+def generate_event_stats(events, aggregates=None):
+    """Generate statistical insights about events
+
+    Pass the result of compute_aggregates to reuse counts already taken
+    for the same events.
+    """
     if not events:
         return {
             'total_events': 0,
@@ -99,6 +137,11 @@ def generate_event_stats(events):
             'busiest_day': "N/A"
         }
     
+    if aggregates is None and should_use_aggregates(events):
+        aggregates = compute_aggregates(events)
+    if aggregates is not None:
+        return _event_stats_from_aggregates(aggregates, len(events))
+    
     df = pd.DataFrame(events)
     df['date'] = pd.to_datetime(df['date'])
     
@@ -119,6 +162,23 @@ def generate_event_stats(events):
     
     return stats_dict
 
+def _event_stats_from_aggregates(aggregates, total_events):
+    """Build the statistics dict from event aggregates"""
+    date_range = (aggregates['last_date'] - aggregates['first_date']).days + 1
+    avg_events = total_events / max(1, date_range)
+    
+    # argmax picks the first of tied maxima, matching pandas mode() ordering
+    category_counts = aggregates['category_counts']
+    busiest_offset = int(np.argmax(daily_totals(aggregates)))
+    
+    return {
+        'total_events': total_events,
+        'unique_categories': int(np.count_nonzero(category_counts)),
+        'most_common_category': aggregates['categories'][int(np.argmax(category_counts))],
+        'avg_events_per_day': round(avg_events, 1),
+        'busiest_day': day_to_date(aggregates['first_day'], busiest_offset)
+    }
+
 def calculate_timeline_height(categories):
     """Calculate timeline height based on number of categories"""
     base_height = 100  # Minimum height
@@ -127,6 +187,7 @@ def calculate_timeline_height(categories):
 
     return base_height + (len(categories) * height_per_category) + padding
 
+@timed('analytics_seconds', step='detailed_timeline')
 def create_detailed_timeline(events):
     """Create an enhanced timeline visualization with dynamic height"""
     end_date = datetime.now(timezone.utc)
@@ -211,8 +272,13 @@ def create_detailed_timeline(events):
 
     return fig
 
-def generate_event_heatmap(events):
-    """Generate a heatmap of event frequency by day and hour"""
+@timed('analytics_seconds', step='heatmap')
+def generate_event_heatmap(events, aggregates=None):
+    """Generate a heatmap of event frequency by day and hour
+
+    Pass the result of compute_aggregates to reuse counts already taken
+    for the same events.
+    """
     days = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
     hours = list(range(24))
     
@@ -227,41 +293,23 @@ def generate_event_heatmap(events):
             zmax=1  # Set default maximum for empty data
         ))
     else:
-        df = pd.DataFrame(events)
-        df['date'] = pd.to_datetime(df['date'])
-        
-        # Ensure dates are timezone-aware
-        if df['date'].dt.tz is None:
-            df['date'] = df['date'].dt.tz_localize(timezone.utc)
-        
-        df['day'] = df['date'].dt.day_name()
-        df['hour'] = df['date'].dt.hour
-        
-        # Create base DataFrame with all day-hour combinations
-        base_data = pd.DataFrame(
-            [(day, hour) for day in days for hour in hours],
-            columns=['day', 'hour']
-        )
-        
-        # Count events
-        counts = df.groupby(['day', 'hour']).size().reset_index(name='count')
-        
-        # Merge with base data to ensure all combinations exist
-        full_data = base_data.merge(counts, on=['day', 'hour'], how='left').fillna(0)
-        
-        # Pivot to create heatmap matrix
-        heatmap_data = full_data.pivot(index='day', columns='hour', values='count')
-        heatmap_data = heatmap_data.reindex(index=days)
+        if aggregates is None and should_use_aggregates(events):
+            aggregates = compute_aggregates(events)
+        if aggregates is not None:
+            # Rows are already Monday..Sunday by 24 hours
+            heatmap_values = aggregates['weekday_hour_counts']
+        else:
+            heatmap_values = _heatmap_values(events, days, hours)
         
         fig = go.Figure(data=go.Heatmap(
-            z=heatmap_data.values,
+            z=heatmap_values,
             x=hours,
             y=days,
             colorscale='Viridis',
             hoverongaps=False,
             hovertemplate="Day: %{y}<br>Hour: %{x}:00<br>Events: %{z}<extra></extra>",
             zmin=0,
-            zmax=max(1, heatmap_data.values.max())  # Ensure non-zero range
+            zmax=max(1, heatmap_values.max())  # Ensure non-zero range
         ))
     
     fig.update_layout(
@@ -279,4 +327,34 @@ def generate_event_heatmap(events):
         )
     )
     
-    return fig
\ No newline at end of file
+    return fig
+
+def _heatmap_values(events, days, hours):
+    """Count events by day of week and hour of day"""
+    df = pd.DataFrame(events)
+    df['date'] = pd.to_datetime(df['date'])
+    
+    # Ensure dates are timezone-aware
+    if df['date'].dt.tz is None:
+        df['date'] = df['date'].dt.tz_localize(timezone.utc)
+    
+    df['day'] = df['date'].dt.day_name()
+    df['hour'] = df['date'].dt.hour
+    
+    # Create base DataFrame with all day-hour combinations
+    base_data = pd.DataFrame(
+        [(day, hour) for day in days for hour in hours],
+        columns=['day', 'hour']
+    )
+    
+    # Count events
+    counts = df.groupby(['day', 'hour']).size().reset_index(name='count')
+    
+    # Merge with base data to ensure all combinations exist
+    full_data = base_data.merge(counts, on=['day', 'hour'], how='left').fillna(0)
+    
+    # Pivot to create heatmap matrix
+    heatmap_data = full_data.pivot(index='day', columns='hour', values='count')
+    heatmap_data = heatmap_data.reindex(index=days)
+    
+    return heatmap_data.values
\ No newline at end of file
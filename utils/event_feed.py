@@ -0,0 +1,140 @@
+import streamlit as st
+import html
+import threading
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional, Hashable, Tuple
+from utils.data_processor import format_date
+from utils.fallback_illustrations import resolve_image_url
+from utils.image_proxy import image_proxy
+
+FEED_PAGE_SIZE = 25
+CARD_CACHE_SIZE = 5000
+
+class RenderedCardCache:
+    """Bounded LRU cache of rendered card HTML shared by all sessions"""
+
+    def __init__(self, max_entries: int = CARD_CACHE_SIZE):
+        self.max_entries = max_entries
+        self.entries: "OrderedDict[Tuple, str]" = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key: Tuple) -> Optional[str]:
+        with self.lock:
+            card = self.entries.get(key)
+            if card is not None:
+                self.entries.move_to_end(key)
+            return card
+
+    def put(self, key: Tuple, card: str) -> None:
+        with self.lock:
+            self.entries[key] = card
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+@st.cache_resource
+def get_card_cache() -> RenderedCardCache:
+    """Get the process-wide rendered card cache"""
+    return RenderedCardCache()
+
+def card_cache_key(item: Dict[str, Any], is_new: bool, image_url: Optional[str] = None) -> Tuple:
+    """Build the cache key for a card from item identity, content, image source and display timezone"""
+    content_hash = item.get('content_hash')
+    if content_hash:
+        # content_hash does not cover the date, link or image, updated_at does
+        content_key = (content_hash, item.get('updated_at'))
+    else:
+        content_key = hash((
+            item['title'], item.get('description'), item['category'],
+            item['date'], item.get('link'), item.get('image_url')
+        ))
+    item_id = item.get('id', item['title'])
+    # The same item renders differently once its thumbnail has been cached
+    return (item_id, content_key, st.session_state.display_timezone, is_new, image_url)
+
+def render_event_card(item: Dict[str, Any], is_new: bool, image_url: Optional[str] = None) -> str:
+    """Render a single event card as HTML, showing image_url in place of the item's own image if given"""
+    title_prefix = "🔔 NEW! " if is_new else ""
+
+    # Sanitize text content; HTML collapses whitespace anyway, and a blank
+    # line in the text would end the markdown HTML block mid-card
+    title = html.escape(" ".join(item['title'].split()))
+    description = html.escape(" ".join(item.get('description', '')[:200].split())) + "..." if item.get('description') else ""
+    category = html.escape(item['category'])
+    if image_url is None:
+        image_url = resolve_image_url(item.get('image_url'), item['category'])
+    has_image = bool(image_url)
+
+    link = (
+        f'<div class="event-card-link"><a href="{item["link"]}" target="_blank">Read more →</a></div>'
+        if 'link' in item else ''
+    )
+    image = (
+        f'<div class="event-card-image"><img src="{image_url}" class="event-image" alt="Event image" loading="lazy" /></div>'
+        if has_image else ''
+    )
+    # Built without newlines so empty optional parts don't leave blank lines
+    # that would end the markdown HTML block in the middle of a batched page
+    return "".join([
+        f'<div class="event-card{" new-event" if is_new else ""}" id="article-{hash(item["title"])}">',
+        '<div class="event-card-header">',
+        f'<h3>{title_prefix}{title}</h3>',
+        '<div class="event-card-meta">',
+        f'<span>{format_date(item["date"])}</span>',
+        f'<span class="category-pill">{category}</span>',
+        '</div>',
+        '</div>',
+        f'<div class="event-card-content{" has-image" if has_image else ""}">',
+        '<div class="event-card-text">',
+        f'<p>{description}</p>',
+        link,
+        '</div>',
+        image,
+        '</div>',
+        '</div>',
+    ])
+
+def card_image_url(item: Dict[str, Any], thumbnails: Dict[str, str]) -> Optional[str]:
+    """Get the image a card shows: its cached thumbnail, else the stored or fallback image"""
+    image_url = item.get('image_url')
+    return thumbnails.get(image_url) or resolve_image_url(image_url, item['category'])
+
+def get_rendered_card(item: Dict[str, Any], is_new: bool, image_url: Optional[str] = None) -> str:
+    """Get card HTML from the shared cache, rendering it on a miss"""
+    cache = get_card_cache()
+    key = card_cache_key(item, is_new, image_url)
+    card = cache.get(key)
+    if card is None:
+        card = render_event_card(item, is_new, image_url)
+        cache.put(key, card)
+    return card
+
+def _load_more(visible_count: int) -> None:
+    """Extend the feed by another page before the next rerun"""
+    st.session_state.feed_visible_count = visible_count
+
+def render_event_feed(items: List[Dict[str, Any]], new_events: Optional[List[Dict[str, Any]]] = None,
+                      page_size: int = FEED_PAGE_SIZE, reset_key: Optional[Hashable] = None) -> None:
+    """Render items as a paginated feed, one HTML block per page"""
+    # Start over from the first page whenever the filters change
+    if st.session_state.get('feed_reset_key') != reset_key:
+        st.session_state.feed_reset_key = reset_key
+        st.session_state.feed_visible_count = page_size
+
+    visible_count = min(st.session_state.get('feed_visible_count', page_size), len(items))
+    new_titles = {new_event['title'] for new_event in (new_events or [])}
+
+    for page_start in range(0, visible_count, page_size):
+        page = items[page_start:min(page_start + page_size, visible_count)]
+        thumbnails = image_proxy.thumbnails_for(item.get('image_url') for item in page)
+        st.markdown(
+            "\n".join(
+                get_rendered_card(item, item['title'] in new_titles, card_image_url(item, thumbnails))
+                for item in page
+            ),
+            unsafe_allow_html=True
+        )
+
+    if visible_count < len(items):
+        st.caption(f"Showing {visible_count} of {len(items)} updates")
+        st.button("Load more", key="feed_load_more", on_click=_load_more, args=(visible_count + page_size,))
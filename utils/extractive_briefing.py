@@ -0,0 +1,128 @@
+import re
+import html
+import logging
+from collections import defaultdict
+from typing import List, Dict, Any, Tuple
+import numpy as np
+from scipy import sparse
+from utils.briefing_prompt import cluster_events, STOPWORDS
+
+logger = logging.getLogger(__name__)
+
+SENTENCES_PER_CATEGORY = 3
+MAX_CATEGORIES = 6
+# TextRank is quadratic in sentences; only the leading clusters are considered
+MAX_SENTENCES = 400
+# Sentences this similar to one already picked add nothing new
+REDUNDANCY_SIMILARITY = 0.5
+DAMPING = 0.85
+MIN_SENTENCE_WORDS = 5
+
+def split_sentences(text: str) -> List[str]:
+    text = html.unescape(re.sub(r"\s+", " ", text or "")).strip()
+    return [sentence.strip() for sentence in re.split(r"(?<=[.!?])\s+(?=[A-Z0-9\"'])", text) if sentence.strip()]
+
+def _tokens(sentence: str) -> List[str]:
+    return [word for word in re.findall(r"[a-z0-9]+", sentence.lower()) if len(word) > 2 and word not in STOPWORDS]
+
+def tfidf_matrix(sentences: List[str]) -> sparse.csr_matrix:
+    """L2-normalized TF-IDF rows, one per sentence"""
+    vocabulary: Dict[str, int] = {}
+    rows, cols, counts = [], [], []
+    for row, sentence in enumerate(sentences):
+        term_counts: Dict[int, int] = defaultdict(int)
+        for token in _tokens(sentence):
+            term_counts[vocabulary.setdefault(token, len(vocabulary))] += 1
+        for col, count in term_counts.items():
+            rows.append(row)
+            cols.append(col)
+            counts.append(count)
+    matrix = sparse.csr_matrix(
+        (np.array(counts, dtype=np.float64), (rows, cols)), shape=(len(sentences), max(1, len(vocabulary)))
+    )
+    document_frequency = np.bincount(matrix.indices, minlength=matrix.shape[1])
+    idf = np.log((1 + len(sentences)) / (1 + document_frequency)) + 1
+    matrix = matrix.multiply(idf).tocsr()
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+    norms[norms == 0] = 1
+    return sparse.diags(1 / norms) @ matrix
+
+def textrank(similarity: np.ndarray, iterations: int = 50, tolerance: float = 1e-6) -> np.ndarray:
+    """PageRank over the sentence similarity graph"""
+    count = similarity.shape[0]
+    weights = similarity.copy()
+    np.fill_diagonal(weights, 0)
+    out_weight = weights.sum(axis=1, keepdims=True)
+    # Isolated sentences link to every sentence equally
+    transition = np.where(out_weight > 0, weights / np.where(out_weight > 0, out_weight, 1), 1 / count)
+    scores = np.full(count, 1 / count)
+    for _ in range(iterations):
+        updated = (1 - DAMPING) / count + DAMPING * (transition.T @ scores)
+        if np.abs(updated - scores).sum() < tolerance:
+            return updated
+        scores = updated
+    return scores
+
+def rank_sentences(sentences: List[str]) -> List[int]:
+    """Indexes of the most central, mutually distinct sentences, best first"""
+    if not sentences:
+        return []
+    vectors = tfidf_matrix(sentences)
+    similarity = (vectors @ vectors.T).toarray()
+    scores = textrank(similarity)
+    # Stable tie-break on position keeps the output deterministic
+    order = sorted(range(len(sentences)), key=lambda index: (-round(scores[index], 12), index))
+    picked: List[int] = []
+    for index in order:
+        if all(similarity[index, chosen] < REDUNDANCY_SIMILARITY for chosen in picked):
+            picked.append(index)
+    return picked
+
+def candidate_sentences(events: List[Dict[str, Any]]) -> List[Tuple[str, int, str]]:
+    """(category, cluster number, sentence) triples from the leading event clusters"""
+    candidates = []
+    for cluster_number, cluster in enumerate(cluster_events(events)):
+        event = cluster.lead
+        sentences = [
+            sentence for sentence in split_sentences(event.get('description') or '')
+            if len(sentence.split()) >= MIN_SENTENCE_WORDS
+        ]
+        # A headline stands in for an event without a usable description
+        for sentence in sentences[:3] or [event['title'].strip()]:
+            candidates.append((event['category'], cluster_number, sentence))
+        if len(candidates) >= MAX_SENTENCES:
+            break
+    return candidates
+
+def extractive_briefing(events: List[Dict[str, Any]],
+                        sentences_per_category: int = SENTENCES_PER_CATEGORY) -> str:
+    """Summarize events locally by picking their most representative sentences per category"""
+    if not events:
+        return ""
+    candidates = candidate_sentences(events)
+    ranked = rank_sentences([sentence for _, _, sentence in candidates])
+
+    # Cover as many different stories as possible before taking a second
+    # sentence from any one of them
+    by_category: Dict[str, List[int]] = defaultdict(list)
+    for distinct_stories in (True, False):
+        for index in ranked:
+            category, cluster_number, _ = candidates[index]
+            picked = by_category[category]
+            if len(picked) >= sentences_per_category or index in picked:
+                continue
+            if distinct_stories and any(candidates[other][1] == cluster_number for other in picked):
+                continue
+            picked.append(index)
+
+    counts: Dict[str, int] = defaultdict(int)
+    for event in events:
+        counts[event['category']] += 1
+    categories = sorted(by_category, key=lambda category: (-counts[category], category))[:MAX_CATEGORIES]
+
+    sections = [f"**Automatic summary of {len(events)} updates from the last 24 hours**"]
+    for category in categories:
+        lines = "\n".join(f"- {html.escape(candidates[index][2])}" for index in by_category[category])
+        updates = f"{counts[category]} update{'s' if counts[category] != 1 else ''}"
+        sections.append(f"**{html.escape(category)}** ({updates})\n{lines}")
+    return "\n\n".join(sections)
@@ -1,8 +1,32 @@
 import hashlib
-from typing import Dict, Tuple
+import json
+import logging
+import math
+from functools import lru_cache
+from typing import Dict, Tuple, Optional
 import base64
 import os
 
+logger = logging.getLogger(__name__)
+
+# Fallback illustrations are rendered once to PNG files under Streamlit's
+# static directory and referenced by a short URL instead of an inline data URI
+STATIC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'static')
+FALLBACK_DIR = os.path.join(STATIC_DIR, 'fallback')
+FALLBACK_URL_PREFIX = 'app/static/fallback/'
+DEFAULT_IMAGE_PATH = 'assets/default_featured_image.png'
+
+# Bump when the renderer changes so every asset gets a new name and cached
+# copies in browsers are never stale
+RENDER_VERSION = 1
+# Rendered at twice the SVG's 120x90 viewBox so the cards stay sharp on HiDPI screens
+RENDER_SCALE = 2
+
+KNOWN_CATEGORIES = (
+    'Military Space', 'Space Industry', 'Space Science',
+    'Official Updates', 'Defense Updates', 'Space Technology'
+)
+
 def get_category_pattern(category: str) -> Dict[str, str]:
     """Generate pattern parameters based on category"""
     # Use category to generate consistent colors and patterns
@@ -51,6 +75,79 @@ def get_category_pattern(category: str) -> Dict[str, str]:
         'color2': secondary_color
     })
 
+# Each pattern's strokes in the 120x90 viewBox, shared by the SVG and PNG
+# renderers. Shapes are ('line', points), ('polygon', points),
+# ('rect', top_left, bottom_right), ('circle', center, radius, filled),
+# ('ellipse', center, (rx, ry)) and ('arc', center, radius, start, end),
+# with arc angles in degrees clockwise from 3 o'clock.
+PATTERN_SHAPES = {
+    'circuit': [
+        ('line', [(10, 10), (110, 10)]),
+        ('line', [(10, 45), (110, 45)]),
+        ('line', [(10, 80), (110, 80)]),
+        ('circle', (30, 10), 2, True),
+        ('circle', (80, 45), 2, True),
+        ('circle', (60, 80), 2, True),
+    ],
+    'constellation': [
+        ('circle', (30, 20), 1, True),
+        ('circle', (80, 40), 1, True),
+        ('circle', (50, 70), 1, True),
+        ('line', [(30, 20), (80, 40), (50, 70)]),
+    ],
+    'atoms': [
+        ('circle', (60, 45), 15, False),
+        ('ellipse', (60, 45), (25, 10)),
+    ],
+    'shield': [
+        ('polygon', [(60, 10), (90, 30), (80, 70), (60, 80), (40, 70), (30, 30)]),
+    ],
+    'radar': [
+        ('circle', (60, 45), 30, False),
+        ('line', [(60, 45), (90, 45)]),
+        ('arc', (60, 45), 30, 270, 360),
+    ],
+    'chip': [
+        ('rect', (30, 20), (90, 70)),
+        ('line', [(30, 35), (90, 35)]),
+        ('line', [(30, 55), (90, 55)]),
+    ],
+    'default': [
+        ('line', [(10, 10), (110, 80)]),
+        ('line', [(110, 10), (10, 80)]),
+    ],
+}
+STROKE_WIDTHS = {'constellation': 0.3}
+DEFAULT_STROKE_WIDTH = 0.5
+
+def _svg_shape(shape: tuple, color: str, stroke_width: float) -> str:
+    kind = shape[0]
+    stroke = f'stroke="{color}" stroke-width="{stroke_width}" fill="none" filter="url(#glow)"'
+    if kind in ('line', 'polygon'):
+        path = ' '.join(f"{'L' if index else 'M'}{x} {y}" for index, (x, y) in enumerate(shape[1]))
+        closing = ' Z' if kind == 'polygon' else ''
+        return f'<path d="{path}{closing}" {stroke}/>'
+    if kind == 'rect':
+        (x0, y0), (x1, y1) = shape[1], shape[2]
+        return f'<rect x="{x0}" y="{y0}" width="{x1 - x0}" height="{y1 - y0}" {stroke}/>'
+    if kind == 'circle':
+        (cx, cy), r, filled = shape[1], shape[2], shape[3]
+        if filled:
+            return f'<circle cx="{cx}" cy="{cy}" r="{r}" fill="{color}" filter="url(#glow)"/>'
+        return f'<circle cx="{cx}" cy="{cy}" r="{r}" {stroke}/>'
+    if kind == 'ellipse':
+        (cx, cy), (rx, ry) = shape[1], shape[2]
+        return f'<ellipse cx="{cx}" cy="{cy}" rx="{rx}" ry="{ry}" {stroke}/>'
+    if kind == 'arc':
+        (cx, cy), r, start, end = shape[1], shape[2], shape[3], shape[4]
+        (x0, y0), (x1, y1) = (
+            (round(cx + r * math.cos(math.radians(angle)), 3), round(cy + r * math.sin(math.radians(angle)), 3))
+            for angle in (start, end)
+        )
+        large_arc = 1 if (end - start) % 360 > 180 else 0
+        return f'<path d="M{x0:g} {y0:g} A{r} {r} 0 {large_arc} 1 {x1:g} {y1:g}" {stroke}/>'
+    raise ValueError(f"Unknown shape {kind!r}")
+
 def generate_fallback_svg(category: str, width: int = 120, height: int = 90) -> str:
     """Generate SVG fallback illustration based on category"""
     pattern_info = get_category_pattern(category)
@@ -81,80 +178,192 @@ def generate_fallback_svg(category: str, width: int = 120, height: int = 90) ->
     <rect width="100%" height="100%" fill="url(#bg)"/>
     '''
 
-    # Add pattern based on category
-    if pattern == 'circuit':
-        svg += f'''
-        <path d="M10 10 H110 M10 45 H110 M10 80 H110" 
-              stroke="{color1}" stroke-width="0.5" fill="none" filter="url(#glow)"/>
-        <circle cx="30" cy="10" r="2" fill="{color1}" filter="url(#glow)"/>
-        <circle cx="80" cy="45" r="2" fill="{color1}" filter="url(#glow)"/>
-        <circle cx="60" cy="80" r="2" fill="{color1}" filter="url(#glow)"/>
-        '''
-    elif pattern == 'constellation':
-        svg += f'''
-        <circle cx="30" cy="20" r="1" fill="{color1}" filter="url(#glow)"/>
-        <circle cx="80" cy="40" r="1" fill="{color1}" filter="url(#glow)"/>
-        <circle cx="50" cy="70" r="1" fill="{color1}" filter="url(#glow)"/>
-        <path d="M30 20 L80 40 L50 70" 
-              stroke="{color1}" stroke-width="0.3" fill="none" filter="url(#glow)"/>
-        '''
-    elif pattern == 'atoms':
-        svg += f'''
-        <circle cx="60" cy="45" r="15" 
-                stroke="{color1}" stroke-width="0.5" fill="none" filter="url(#glow)"/>
-        <ellipse cx="60" cy="45" rx="25" ry="10" 
-                 stroke="{color1}" stroke-width="0.5" fill="none" filter="url(#glow)"/>
-        '''
-    elif pattern == 'shield':
-        svg += f'''
-        <path d="M60 10 L90 30 L80 70 L60 80 L40 70 L30 30 Z" 
-              stroke="{color1}" stroke-width="0.5" fill="none" filter="url(#glow)"/>
-        '''
-    elif pattern == 'radar':
-        svg += f'''
-        <circle cx="60" cy="45" r="30" 
-                stroke="{color1}" stroke-width="0.5" fill="none" filter="url(#glow)"/>
-        <path d="M60 45 L90 45 A30 30 0 0 0 60 15" 
-              stroke="{color1}" stroke-width="0.5" fill="none" filter="url(#glow)"/>
-        '''
-    elif pattern == 'chip':
-        svg += f'''
-        <rect x="30" y="20" width="60" height="50" 
-              stroke="{color1}" stroke-width="0.5" fill="none" filter="url(#glow)"/>
-        <line x1="30" y1="35" x2="90" y2="35" 
-              stroke="{color1}" stroke-width="0.5" filter="url(#glow)"/>
-        <line x1="30" y1="55" x2="90" y2="55" 
-              stroke="{color1}" stroke-width="0.5" filter="url(#glow)"/>
-        '''
-    else:
-        # Default pattern
-        svg += f'''
-        <path d="M10 10 L110 80 M110 10 L10 80" 
-              stroke="{color1}" stroke-width="0.5" fill="none" filter="url(#glow)"/>
-        '''
-
-    svg += '</svg>'
+    stroke_width = STROKE_WIDTHS.get(pattern, DEFAULT_STROKE_WIDTH)
+    for shape in PATTERN_SHAPES.get(pattern, PATTERN_SHAPES['default']):
+        svg += f"\n    {_svg_shape(shape, color1, stroke_width)}"
+
+    svg += '\n</svg>'
     return svg
 
-def get_default_image_url() -> str:
-    """Get the default featured image as a data URL"""
+def _hex_to_rgb(color: str) -> Tuple[int, int, int]:
+    return tuple(int(color[i:i + 2], 16) for i in (1, 3, 5))
+
+def asset_name(category: str) -> str:
+    """Content-addressed file name of a category's fallback asset.
+
+    The hash covers everything the rendering depends on, so the ingest worker
+    and the dashboard derive the same name independently, and a changed
+    pattern or renderer always yields a new URL.
+    """
+    pattern_info = get_category_pattern(category)
+    spec = json.dumps({
+        **pattern_info,
+        'shapes': PATTERN_SHAPES.get(pattern_info['pattern'], PATTERN_SHAPES['default']),
+        'version': RENDER_VERSION,
+        'scale': RENDER_SCALE
+    }, sort_keys=True)
+    digest = hashlib.sha256(spec.encode()).hexdigest()[:16]
+    return f"{pattern_info['pattern']}-{digest}.png"
+
+def render_fallback_png(category: str, width: int = 120, height: int = 90) -> bytes:
+    """Render the category's fallback illustration as PNG from the same shapes as generate_fallback_svg"""
+    from io import BytesIO
+    from PIL import Image, ImageDraw, ImageFilter
+
+    pattern_info = get_category_pattern(category)
+    pattern = pattern_info['pattern']
+    color1 = _hex_to_rgb(pattern_info['color1'])
+    color2 = _hex_to_rgb(pattern_info['color2'])
+    s = RENDER_SCALE
+    size = (width * s, height * s)
+
+    # Diagonal gradient from color1 at 20% opacity to color2 at 10%
+    background = Image.new('RGBA', size)
+    pixels = background.load()
+    span = size[0] + size[1] - 2
+    for x in range(size[0]):
+        for y in range(size[1]):
+            t = (x + y) / span
+            pixels[x, y] = tuple(round(a + (b - a) * t) for a, b in zip(color1, color2)) + (round(51 - 25.5 * t),)
+
+    shapes = Image.new('RGBA', size, (0, 0, 0, 0))
+    draw = ImageDraw.Draw(shapes)
+    stroke = color1 + (255,)
+    line_width = max(1, round(STROKE_WIDTHS.get(pattern, DEFAULT_STROKE_WIDTH) * s))
+
+    def point(xy: Tuple[float, float]) -> Tuple[float, float]:
+        return (xy[0] * s, xy[1] * s)
+
+    def box(center: Tuple[float, float], rx: float, ry: float) -> list:
+        return [point((center[0] - rx, center[1] - ry)), point((center[0] + rx, center[1] + ry))]
+
+    for shape in PATTERN_SHAPES.get(pattern, PATTERN_SHAPES['default']):
+        kind = shape[0]
+        if kind == 'line':
+            draw.line([point(xy) for xy in shape[1]], fill=stroke, width=line_width)
+        elif kind == 'polygon':
+            draw.polygon([point(xy) for xy in shape[1]], outline=stroke, width=line_width)
+        elif kind == 'rect':
+            draw.rectangle([point(shape[1]), point(shape[2])], outline=stroke, width=line_width)
+        elif kind == 'circle':
+            if shape[3]:
+                draw.ellipse(box(shape[1], shape[2], shape[2]), fill=stroke)
+            else:
+                draw.ellipse(box(shape[1], shape[2], shape[2]), outline=stroke, width=line_width)
+        elif kind == 'ellipse':
+            draw.ellipse(box(shape[1], *shape[2]), outline=stroke, width=line_width)
+        elif kind == 'arc':
+            draw.arc(box(shape[1], shape[2], shape[2]), shape[3], shape[4], fill=stroke, width=line_width)
+
+    # Same glow as the SVG filter: the blurred shapes twice, then the shapes on top
+    glow = shapes.filter(ImageFilter.GaussianBlur(s))
+    image = Image.alpha_composite(background, glow)
+    image = Image.alpha_composite(image, glow)
+    image = Image.alpha_composite(image, shapes)
+
+    buffer = BytesIO()
+    image.save(buffer, format='PNG', optimize=True)
+    return buffer.getvalue()
+
+def _write_asset(name: str, data: bytes) -> None:
+    """Write an asset atomically so a concurrent reader never sees a partial file"""
+    os.makedirs(FALLBACK_DIR, exist_ok=True)
+    path = os.path.join(FALLBACK_DIR, name)
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, 'wb') as f:
+        f.write(data)
+    os.replace(temp_path, path)
+
+# Only successes are remembered, so a failed render (read-only tree, disk
+# full) is retried on the next call instead of sticking for the process
+_asset_urls: Dict[str, str] = {}
+_default_image_url: Optional[str] = None
+
+def ensure_fallback_asset(category: str) -> Optional[str]:
+    """Render the category's asset if it isn't on disk yet; returns its short URL, or None on failure"""
+    url = _asset_urls.get(category)
+    if url:
+        return url
+    name = asset_name(category)
     try:
-        with open('assets/default_featured_image.png', 'rb') as f:
+        if not os.path.exists(os.path.join(FALLBACK_DIR, name)):
+            _write_asset(name, render_fallback_png(category))
+            logger.info(f"Rendered fallback illustration {name} for {category!r}")
+    except Exception as e:
+        logger.warning(f"Could not build fallback asset for {category!r}: {str(e)}")
+        return None
+    url = _asset_urls[category] = FALLBACK_URL_PREFIX + name
+    return url
+
+def build_fallback_assets(categories=KNOWN_CATEGORIES) -> Dict[str, Optional[str]]:
+    """Build the asset set for the given categories; cheap once the files exist"""
+    assets = {category: ensure_fallback_asset(category) for category in categories}
+    get_default_image_url()
+    return assets
+
+def get_default_image_url() -> Optional[str]:
+    """Get the default featured image as a static URL, or as a data URL if it can't be published.
+
+    Returns None when the image itself can't be read.
+    """
+    global _default_image_url
+    if _default_image_url:
+        return _default_image_url
+    try:
+        with open(DEFAULT_IMAGE_PATH, 'rb') as f:
             image_data = f.read()
-            return f"data:image/png;base64,{base64.b64encode(image_data).decode()}"
     except Exception:
         return None
+    name = f"featured-{hashlib.sha256(image_data).hexdigest()[:16]}.png"
+    try:
+        if not os.path.exists(os.path.join(FALLBACK_DIR, name)):
+            _write_asset(name, image_data)
+    except OSError:
+        # Not cached, so a later call can still publish it as a static file
+        return f"data:image/png;base64,{base64.b64encode(image_data).decode()}"
+    _default_image_url = FALLBACK_URL_PREFIX + name
+    return _default_image_url
+
+@lru_cache(maxsize=256)
+def get_fallback_svg_url(category: str) -> str:
+    """Inline SVG data URL, used only when the static asset can't be built"""
+    svg = generate_fallback_svg(category)
+    return f"data:image/svg+xml;base64,{base64.b64encode(svg.encode()).decode()}"
 
-def get_fallback_image_url(category: str) -> str:
-    """Generate data URL for fallback image"""
+def get_fallback_image_url(category: str) -> Optional[str]:
+    """Get the URL of the category's fallback image"""
+    url = ensure_fallback_asset(category)
+    if url:
+        return url
     try:
-        # First try category-specific SVG
-        svg = generate_fallback_svg(category)
-        return f"data:image/svg+xml;base64,{base64.b64encode(svg.encode()).decode()}"
+        # Static assets unavailable (no Pillow or read-only tree), inline the SVG
+        return get_fallback_svg_url(category)
     except Exception:
         # If SVG generation fails, use default featured image
         default_image = get_default_image_url()
         if default_image:
             return default_image
         # If all fails, return None to let the UI handle it
-        return None
\ No newline at end of file
+        return None
+
+def resolve_image_url(image_url: Optional[str], category: str) -> Optional[str]:
+    """Map stored fallback images onto the current static assets.
+
+    Rows written before the static assets existed carry an inline SVG data
+    URI, and a dashboard on another host may not have rendered a category's
+    asset yet; both are served from the local asset set instead.
+    """
+    if not image_url:
+        return image_url
+    is_category_asset = image_url.startswith(FALLBACK_URL_PREFIX) and not image_url.startswith(
+        FALLBACK_URL_PREFIX + 'featured-'
+    )
+    if image_url.startswith('data:image/svg+xml') or is_category_asset:
+        return ensure_fallback_asset(category) or image_url
+    return image_url
+
+if __name__ == "__main__":
+    # Build step: python -m utils.fallback_illustrations
+    logging.basicConfig(level=logging.INFO)
+    for category, url in build_fallback_assets().items():
+        print(f"{category}: {url}")
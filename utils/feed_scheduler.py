@@ -0,0 +1,111 @@
+import os
+import time
+import random
+import logging
+import threading
+from datetime import datetime
+from statistics import median
+from typing import List, Dict, Any, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_POLL_INTERVAL = 1800  # seconds; where every feed starts before we learn its cadence
+MIN_POLL_INTERVAL = int(os.getenv('FEED_MIN_POLL_SECONDS', '300'))
+MAX_POLL_INTERVAL = int(os.getenv('FEED_MAX_POLL_SECONDS', '21600'))
+POLL_JITTER = 0.1  # +/- fraction applied to every scheduled poll
+BACKOFF_FACTOR = 1.5  # growth per poll that brings nothing new or fails
+SPEEDUP_FACTOR = 0.5  # shrink per productive poll when the cadence is unknown
+
+def estimate_publish_interval(entry_dates: List[datetime]) -> Optional[float]:
+    """Estimate a feed's publish interval as the median gap between entries"""
+    timestamps = sorted({date.timestamp() for date in entry_dates})
+    gaps = [later - earlier for earlier, later in zip(timestamps, timestamps[1:])]
+    gaps = [gap for gap in gaps if gap > 0]
+    return median(gaps) if gaps else None
+
+def count_new_entries(entry_dates: List[datetime], newest_seen: Optional[datetime]) -> int:
+    """Count entries published after the newest one seen on earlier polls"""
+    return len([date for date in entry_dates if newest_seen is None or date > newest_seen])
+
+def next_poll_interval(current: float, entry_dates: List[datetime], new_entries: int,
+                       failed: bool = False, min_interval: float = MIN_POLL_INTERVAL,
+                       max_interval: float = MAX_POLL_INTERVAL) -> float:
+    """Compute the next poll interval from the feed's cadence and the last poll's outcome"""
+    if failed or new_entries == 0:
+        interval = current * BACKOFF_FACTOR
+    else:
+        # Polling twice per publish interval keeps new items close to real time
+        publish_interval = estimate_publish_interval(entry_dates)
+        target = publish_interval / 2 if publish_interval else current * SPEEDUP_FACTOR
+        interval = (current + target) / 2
+    return max(min_interval, min(max_interval, interval))
+
+def with_jitter(interval: float, jitter: float = POLL_JITTER) -> float:
+    """Spread polls out so feeds that share a cadence don't fire together"""
+    return interval * random.uniform(1 - jitter, 1 + jitter)
+
+class FeedScheduler:
+    """Tracks when each feed is next due, adapting intervals to each feed's cadence"""
+
+    def __init__(self, sources: List[Dict[str, str]], default_interval: float = DEFAULT_POLL_INTERVAL,
+                 min_interval: float = MIN_POLL_INTERVAL, max_interval: float = MAX_POLL_INTERVAL):
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.lock = threading.Lock()
+        now = time.monotonic()
+        self.states: Dict[str, Dict[str, Any]] = {
+            # Everything is due on start-up; the first poll teaches us the cadence
+            source['name']: {
+                'source': source,
+                'interval': default_interval,
+                'next_poll': now,
+                'newest_entry': None
+            }
+            for source in sources
+        }
+
+    def due_sources(self) -> List[Dict[str, str]]:
+        """Get the sources whose next poll time has passed"""
+        now = time.monotonic()
+        with self.lock:
+            return [state['source'] for state in self.states.values() if state['next_poll'] <= now]
+
+    def seconds_until_next_poll(self) -> float:
+        """Seconds until the earliest scheduled poll"""
+        with self.lock:
+            if not self.states:
+                return self.max_interval
+            next_poll = min(state['next_poll'] for state in self.states.values())
+        return max(0.0, next_poll - time.monotonic())
+
+    def record_poll(self, source: Dict[str, str], entry_dates: List[datetime], failed: bool = False) -> float:
+        """Record a poll's outcome from the feed's entry dates and schedule its next poll"""
+        with self.lock:
+            state = self.states[source['name']]
+            newest_entry = state['newest_entry']
+            new_entries = count_new_entries(entry_dates, newest_entry)
+            if entry_dates:
+                state['newest_entry'] = max(entry_dates + ([newest_entry] if newest_entry else []))
+
+            state['interval'] = next_poll_interval(
+                state['interval'], entry_dates, new_entries, failed,
+                self.min_interval, self.max_interval
+            )
+            state['next_poll'] = time.monotonic() + with_jitter(state['interval'])
+
+        logger.info(
+            f"{source['name']}: {new_entries} new of {len(entry_dates)} entries"
+            f"{' (failed)' if failed else ''}, next poll in {state['interval'] / 60:.0f} min"
+        )
+        return state['interval']
+
+    def record_skip(self, source: Dict[str, str]) -> float:
+        """Reschedule a feed that wasn't fetched, e.g. because its circuit is open.
+
+        The interval is left alone: the circuit breaker already backs off on
+        its own, and compounding the two would stretch the feed's cadence.
+        """
+        with self.lock:
+            state = self.states[source['name']]
+            state['next_poll'] = time.monotonic() + with_jitter(state['interval'])
+        return state['interval']
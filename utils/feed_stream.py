@@ -0,0 +1,126 @@
+import xml.etree.ElementTree as ET
+from typing import Iterator, Optional, BinaryIO
+from feedparser import FeedParserDict
+
+ATOM = '{http://www.w3.org/2005/Atom}'
+RSS1 = '{http://purl.org/rss/1.0/}'
+CONTENT = '{http://purl.org/rss/1.0/modules/content/}'
+DC = '{http://purl.org/dc/elements/1.1/}'
+MEDIA = '{http://search.yahoo.com/mrss/}'
+
+ENTRY_TAGS = {'item', f'{RSS1}item', f'{ATOM}entry'}
+
+class CountingReader:
+    """File-like wrapper that counts the bytes read through it"""
+
+    def __init__(self, raw: BinaryIO):
+        self.raw = raw
+        self.bytes_read = 0
+
+    def read(self, size: int = -1) -> bytes:
+        data = self.raw.read(size)
+        self.bytes_read += len(data)
+        return data
+
+def _text(element: Optional[ET.Element]) -> Optional[str]:
+    if element is None or element.text is None:
+        return None
+    return element.text.strip()
+
+def _markup(element: Optional[ET.Element]) -> Optional[str]:
+    """Text of an element, or its serialized children for inline XHTML content"""
+    if element is None:
+        return None
+    if len(element):
+        # Drop the XHTML namespace so the markup reads like ordinary HTML
+        for descendant in element.iter():
+            descendant.tag = descendant.tag.rsplit('}', 1)[-1]
+        return ''.join(ET.tostring(child, encoding='unicode') for child in element).strip()
+    return _text(element)
+
+def _media(element: ET.Element, tag: str) -> list:
+    return [FeedParserDict(url=child.get('url')) for child in element.iter(f'{MEDIA}{tag}') if child.get('url')]
+
+def normalize_rss_item(item: ET.Element, ns: str = '') -> FeedParserDict:
+    """Map an RSS 2.0 or 1.0 <item> onto the FeedParserDict fields fetch_feed_entries reads"""
+    entry = FeedParserDict()
+    entry['title'] = _text(item.find(f'{ns}title')) or ''
+    link = _text(item.find(f'{ns}link'))
+    if link:
+        entry['link'] = link
+    guid = _text(item.find('guid')) or item.get('{http://www.w3.org/1999/02/22-rdf-syntax-ns#}about')
+    if guid:
+        entry['id'] = guid
+    description = _text(item.find(f'{ns}description')) or _text(item.find(f'{CONTENT}encoded'))
+    if description is not None:
+        entry['summary'] = description
+    published = _text(item.find('pubDate')) or _text(item.find(f'{DC}date'))
+    if published:
+        entry['published'] = published
+
+    links = []
+    for enclosure in item.iter('enclosure'):
+        if enclosure.get('url'):
+            links.append(FeedParserDict(href=enclosure.get('url'), type=enclosure.get('type', ''), rel='enclosure'))
+    if links:
+        entry['links'] = links
+    for tag, key in (('content', 'media_content'), ('thumbnail', 'media_thumbnail')):
+        media = _media(item, tag)
+        if media:
+            entry[key] = media
+    return entry
+
+def normalize_atom_entry(item: ET.Element) -> FeedParserDict:
+    """Map an Atom <entry> onto the FeedParserDict fields fetch_feed_entries reads"""
+    entry = FeedParserDict()
+    entry['title'] = _text(item.find(f'{ATOM}title')) or ''
+    entry_id = _text(item.find(f'{ATOM}id'))
+    if entry_id:
+        entry['id'] = entry_id
+
+    links = []
+    for link in item.findall(f'{ATOM}link'):
+        rel = link.get('rel', 'alternate')
+        if rel == 'alternate' and 'link' not in entry:
+            entry['link'] = link.get('href', '')
+        links.append(FeedParserDict(href=link.get('href', ''), type=link.get('type', ''), rel=rel))
+    if links:
+        entry['links'] = links
+
+    summary = _markup(item.find(f'{ATOM}summary')) or _markup(item.find(f'{ATOM}content'))
+    if summary is not None:
+        entry['summary'] = summary
+    for tag, key in (('published', 'published'), ('updated', 'updated')):
+        value = _text(item.find(f'{ATOM}{tag}'))
+        if value:
+            entry[key] = value
+    for tag, key in (('content', 'media_content'), ('thumbnail', 'media_thumbnail')):
+        media = _media(item, tag)
+        if media:
+            entry[key] = media
+    return entry
+
+def iter_feed_entries(stream: BinaryIO) -> Iterator[FeedParserDict]:
+    """Incrementally parse an RSS or Atom document, yielding one entry at a time.
+
+    Each entry's element is detached from the tree as soon as it has been
+    normalized, so memory stays flat no matter how long the document is.
+    Raises xml.etree.ElementTree.ParseError on malformed XML.
+    """
+    stack = []
+    for event, element in ET.iterparse(stream, events=('start', 'end')):
+        if event == 'start':
+            stack.append(element)
+            continue
+
+        stack.pop()
+        if element.tag not in ENTRY_TAGS:
+            continue
+        if element.tag == f'{ATOM}entry':
+            entry = normalize_atom_entry(element)
+        else:
+            entry = normalize_rss_item(element, RSS1 if element.tag.startswith(RSS1) else '')
+        element.clear()
+        if stack:
+            stack[-1].remove(element)
+        yield entry
@@ -0,0 +1,316 @@
+import os
+import socket
+import hashlib
+import ipaddress
+import logging
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, Future
+from io import BytesIO
+from typing import Dict, Iterable, List, Optional, Set
+from urllib.parse import urljoin, urlsplit
+import requests
+from requests.adapters import HTTPAdapter
+from utils.fallback_illustrations import STATIC_DIR
+
+logger = logging.getLogger(__name__)
+
+# Card images are fetched once, shrunk to the card's size and served from
+# Streamlit's static directory instead of being hot-linked at full size
+THUMB_DIR = os.path.join(STATIC_DIR, 'thumbs')
+THUMB_URL_PREFIX = 'app/static/thumbs/'
+# Twice the 120x90 card image box so thumbnails stay sharp on HiDPI screens
+THUMB_SIZE = (240, 180)
+THUMB_QUALITY = 70
+IMAGE_CACHE_MAX_BYTES = int(os.getenv('IMAGE_CACHE_MAX_MB', '200')) * 1024 * 1024
+# Source images larger than this are not downloaded at all
+IMAGE_MAX_SOURCE_BYTES = int(os.getenv('IMAGE_MAX_SOURCE_MB', '15')) * 1024 * 1024
+IMAGE_FETCH_TIMEOUT = (5, 15)
+IMAGE_MAX_REDIRECTS = 3
+IMAGE_PROXY_WORKERS = 4
+# The dashboard and the ingest worker both write to the cache directory, so
+# each process re-reads it from disk this often and before evicting
+INDEX_RESCAN_SECONDS = 60
+# Cache hits are written back to the files' mtimes in batches this often,
+# from the fetch threads rather than the render
+RECENCY_FLUSH_SECONDS = 30
+# Images that failed are retried after this long rather than on every render
+FAILURE_RETRY_SECONDS = 3600
+USER_AGENT = 'SpaceForceDataFeed/1.0'
+
+def check_public_url(url: str) -> str:
+    """Raise ValueError unless url is http(s) and its host resolves only to public addresses.
+
+    Image URLs come from third-party feeds, so they must not be able to
+    point the server at itself, the local network or a cloud metadata service.
+    Returns the checked address to connect to, so the host is not resolved
+    a second time (and possibly differently) by the download.
+    """
+    parts = urlsplit(url)
+    if parts.scheme not in ('http', 'https') or not parts.hostname:
+        raise ValueError(f"unsupported image URL {url}")
+    port = parts.port or (443 if parts.scheme == 'https' else 80)
+    try:
+        addresses = socket.getaddrinfo(parts.hostname, port, type=socket.SOCK_STREAM)
+    except socket.gaierror as e:
+        raise ValueError(f"cannot resolve {parts.hostname}: {str(e)}") from e
+    for *_, sockaddr in addresses:
+        address = ipaddress.ip_address(sockaddr[0].split('%')[0])
+        if address.version == 6 and address.ipv4_mapped:
+            address = address.ipv4_mapped
+        # Covers loopback, private, link-local (including 169.254.169.254),
+        # carrier-grade NAT, multicast and reserved ranges
+        if not address.is_global:
+            raise ValueError(f"{parts.hostname} resolves to non-public address {address}")
+    return addresses[0][4][0]
+
+class PinnedHostAdapter(HTTPAdapter):
+    """Transport for URLs whose host was replaced by an already-checked address.
+
+    TLS still uses the original hostname for SNI and certificate verification.
+    """
+
+    def __init__(self, hostname: str):
+        self.hostname = hostname
+        super().__init__()
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, server_hostname=self.hostname, assert_hostname=self.hostname, **kwargs)
+
+def get_pinned(session: requests.Session, url: str, address: str, **kwargs) -> requests.Response:
+    """GET url from `address` instead of whatever its host resolves to now"""
+    parts = urlsplit(url)
+    host = f"[{address}]" if ':' in address else address
+    if parts.port:
+        host = f"{host}:{parts.port}"
+    session.mount(f"{parts.scheme}://{host}/", PinnedHostAdapter(parts.hostname))
+    headers = {**kwargs.pop('headers', {}), 'Host': parts.netloc.rpartition('@')[2]}
+    return session.get(parts._replace(netloc=host).geturl(), headers=headers, **kwargs)
+
+def download_image(url: str, max_bytes: int = IMAGE_MAX_SOURCE_BYTES) -> bytes:
+    """Download an image, following a few redirects and checking every hop with check_public_url"""
+    with requests.Session() as session:
+        for _ in range(IMAGE_MAX_REDIRECTS + 1):
+            address = check_public_url(url)
+            response = get_pinned(session, url, address, timeout=IMAGE_FETCH_TIMEOUT, stream=True,
+                                  allow_redirects=False, headers={'User-Agent': USER_AGENT})
+            with response:
+                if response.is_redirect:
+                    url = urljoin(url, response.headers['location'])
+                    continue
+                response.raise_for_status()
+                data = bytearray()
+                for chunk in response.iter_content(64 * 1024):
+                    data.extend(chunk)
+                    if len(data) > max_bytes:
+                        raise ValueError(f"image larger than {max_bytes} bytes")
+                return bytes(data)
+        raise ValueError(f"more than {IMAGE_MAX_REDIRECTS} redirects")
+
+def _thumb_format() -> str:
+    from PIL import features
+    return 'WEBP' if features.check('webp') else 'JPEG'
+
+def make_thumbnail(data: bytes, size=THUMB_SIZE, image_format: str = 'WEBP') -> bytes:
+    """Crop and scale an image to fill `size`, like the card's object-fit: cover"""
+    from PIL import Image, ImageOps
+
+    with Image.open(BytesIO(data)) as image:
+        # Let the JPEG decoder downscale while decoding instead of after
+        image.draft('RGB', (size[0] * 2, size[1] * 2))
+        image = ImageOps.exif_transpose(image)
+        if image.mode not in ('RGB', 'RGBA'):
+            image = image.convert('RGBA' if 'transparency' in image.info else 'RGB')
+        if image_format == 'JPEG' and image.mode == 'RGBA':
+            image = image.convert('RGB')
+        thumbnail = ImageOps.fit(image, size, method=Image.Resampling.LANCZOS)
+    buffer = BytesIO()
+    thumbnail.save(buffer, format=image_format, quality=THUMB_QUALITY, method=4 if image_format == 'WEBP' else 0)
+    return buffer.getvalue()
+
+class ImageProxy:
+    """Thumbnail cache for card images, bounded to max_bytes on disk.
+
+    Thumbnails are named after a hash of their source URL, so any process
+    sharing the static directory can find them. Least recently used files are
+    evicted first; hits are written back to the files' mtimes in batches so
+    recency is shared through the disk without a write per rendered card. The directory, not any one process, is the source of truth:
+    the in-memory index is rebuilt from it periodically and before evicting,
+    so processes sharing it enforce one budget.
+    """
+
+    def __init__(self, directory: str = THUMB_DIR, max_bytes: int = IMAGE_CACHE_MAX_BYTES,
+                 workers: int = IMAGE_PROXY_WORKERS):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.workers = workers
+        self.lock = threading.Lock()
+        self.index: Optional["OrderedDict[str, int]"] = None
+        self.indexed_at = 0.0
+        self.total_bytes = 0
+        self.failures: Dict[str, float] = {}
+        # Thumbnails shown since recency was last written to disk
+        self.touched: Set[str] = set()
+        self.flushed_at = time.monotonic()
+        self.pending: Dict[str, Future] = {}
+        self.executor: Optional[ThreadPoolExecutor] = None
+        self.extension = None
+
+    def _load_index(self) -> None:
+        """Build the LRU index from the files on disk, oldest first"""
+        os.makedirs(self.directory, exist_ok=True)
+        self.extension = '.webp' if _thumb_format() == 'WEBP' else '.jpg'
+        files = []
+        for entry in os.scandir(self.directory):
+            if entry.is_file() and not entry.name.endswith('.tmp'):
+                stat = entry.stat()
+                files.append((stat.st_mtime, entry.name, stat.st_size))
+        self.index = OrderedDict((name, size) for _, name, size in sorted(files))
+        # Hits not yet written to disk are still the most recent
+        for name in self.touched:
+            if name in self.index:
+                self.index.move_to_end(name)
+        self.total_bytes = sum(self.index.values())
+        self.indexed_at = time.monotonic()
+        logger.debug(f"Image cache holds {len(self.index)} thumbnails ({self.total_bytes / 1024 / 1024:.1f} MB)")
+
+    def _ensure_ready(self) -> None:
+        with self.lock:
+            if self.index is None or time.monotonic() - self.indexed_at > INDEX_RESCAN_SECONDS:
+                self._load_index()
+            if self.executor is None:
+                self.executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='image-proxy')
+
+    def thumbnail_name(self, url: str) -> str:
+        return hashlib.sha256(url.encode()).hexdigest()[:32] + self.extension
+
+    @staticmethod
+    def is_proxyable(url: Optional[str]) -> bool:
+        return bool(url) and url.startswith(('http://', 'https://'))
+
+    def cached_url(self, url: str) -> Optional[str]:
+        """Get the thumbnail URL if it is already cached, marking it recently used"""
+        self._ensure_ready()
+        name = self.thumbnail_name(url)
+        with self.lock:
+            if name not in self.index:
+                return None
+            self.index.move_to_end(name)
+            self.touched.add(name)
+            if time.monotonic() - self.flushed_at > RECENCY_FLUSH_SECONDS:
+                self.flushed_at = time.monotonic()
+                self.executor.submit(self.flush_recency)
+        return THUMB_URL_PREFIX + name
+
+    def _write_recency(self, names: Iterable[str]) -> List[str]:
+        """Touch the given thumbnails' mtimes; returns the ones that no longer exist"""
+        missing = []
+        for name in names:
+            try:
+                os.utime(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                # Evicted by another process sharing the directory
+                missing.append(name)
+        return missing
+
+    def _forget(self, names: Iterable[str]) -> None:
+        """Drop thumbnails from the index; call with the lock held"""
+        for name in names:
+            self.total_bytes -= self.index.pop(name, 0)
+
+    def flush_recency(self) -> None:
+        """Write the thumbnails shown since the last flush back to disk"""
+        with self.lock:
+            touched, self.touched = self.touched, set()
+        missing = self._write_recency(touched)
+        with self.lock:
+            self._forget(missing)
+
+    def _fetch(self, url: str) -> Optional[str]:
+        """Download an image and store its thumbnail; returns the thumbnail URL"""
+        name = self.thumbnail_name(url)
+        path = os.path.join(self.directory, name)
+        try:
+            if not os.path.exists(path):
+                data = download_image(url)
+                thumbnail = make_thumbnail(data, image_format='WEBP' if self.extension == '.webp' else 'JPEG')
+                temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+                with open(temp_path, 'wb') as f:
+                    f.write(thumbnail)
+                os.replace(temp_path, path)
+                logger.debug(f"Cached {len(data)} byte image {url} as {len(thumbnail)} byte thumbnail")
+            size = os.path.getsize(path)
+        except Exception as e:
+            logger.warning(f"Could not create thumbnail for {url}: {str(e)}")
+            with self.lock:
+                self.failures[url] = time.monotonic()
+            return None
+
+        with self.lock:
+            self.total_bytes += size - self.index.pop(name, 0)
+            self.index[name] = size
+            self._evict()
+        return THUMB_URL_PREFIX + name
+
+    def _evict(self) -> None:
+        """Delete least recently used thumbnails until the cache fits; call with the lock held"""
+        if self.total_bytes > self.max_bytes:
+            # Count what other processes have written and touched since the
+            # last scan, without losing this process's own recent hits
+            touched, self.touched = self.touched, set()
+            self._forget(self._write_recency(touched))
+            self._load_index()
+        while self.total_bytes > self.max_bytes and len(self.index) > 1:
+            name, size = self.index.popitem(last=False)
+            self.total_bytes -= size
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                pass
+
+    def _finished(self, url: str, future: Future) -> None:
+        with self.lock:
+            self.pending.pop(url, None)
+
+    def request(self, url: str) -> Optional[Future]:
+        """Start fetching a thumbnail in the background unless it is cached, pending or recently failed"""
+        self._ensure_ready()
+        with self.lock:
+            if url in self.pending:
+                return self.pending[url]
+            failed_at = self.failures.get(url)
+            if failed_at is not None and time.monotonic() - failed_at < FAILURE_RETRY_SECONDS:
+                return None
+            if self.thumbnail_name(url) in self.index:
+                return None
+            future = self.executor.submit(self._fetch, url)
+            self.pending[url] = future
+        future.add_done_callback(lambda done, url=url: self._finished(url, done))
+        return future
+
+    def prefetch(self, urls: Iterable[Optional[str]]) -> None:
+        """Queue thumbnails for the given image URLs without waiting for them"""
+        for url in urls:
+            if self.is_proxyable(url):
+                self.request(url)
+
+    def thumbnails_for(self, urls: Iterable[Optional[str]]) -> Dict[str, str]:
+        """Map image URLs to the thumbnails already cached, queueing the rest.
+
+        Never waits on a download: images without a thumbnail yet are left out,
+        so the card shows the original, and are served from the cache next time.
+        """
+        thumbnails = {}
+        for url in urls:
+            if not self.is_proxyable(url) or url in thumbnails:
+                continue
+            cached = self.cached_url(url)
+            if cached:
+                thumbnails[url] = cached
+            else:
+                self.request(url)
+        return thumbnails
+
+# Shared by the dashboard's sessions and the ingest worker's fetch threads
+image_proxy = ImageProxy()
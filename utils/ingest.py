@@ -0,0 +1,409 @@
+"""Standalone ingestion service.
+
+Scrapes all configured feeds into the database so dashboard processes only
+read. Fetched entries are first appended to a local SQLite spool
+(``utils.spool``) and a background flusher writes them to Postgres in
+batches, so fetching never waits on, or loses data to, the database.
+
+Run one cycle with ``python -m utils.ingest --once`` or keep it running
+with ``python -m utils.ingest``, which polls each feed on its own schedule
+learned from how often it publishes.
+"""
+import argparse
+import logging
+import os
+import signal
+import socket
+import sys
+import threading
+import time
+import concurrent.futures
+from datetime import datetime, timedelta, timezone
+from typing import List, Dict, Any, Optional
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from utils.data_fetcher import (
+    EntrySink,
+    FeedCircuitOpenError,
+    FeedResult,
+    FETCH_WORKERS,
+    REFRESH_DEADLINE_SECONDS,
+    fetch_space_force_events,
+    fetch_feed_entries,
+    fetch_sources,
+    feed_breaker,
+    get_all_sources,
+    restore_breaker_states
+)
+from utils.feed_scheduler import (
+    FeedScheduler,
+    MIN_POLL_INTERVAL,
+    MAX_POLL_INTERVAL,
+    count_new_entries,
+    next_poll_interval,
+    with_jitter
+)
+from utils.db import sync_feed_registry, claim_due_feeds, release_feed, prune_feed_runs
+from utils.leader_election import LeaderElector
+from utils.spool import IngestSpool, SpoolFlusher, SPOOL_PATH
+from utils.seen_index import SeenIndex, SEEN_INDEX_PATH
+from utils.fallback_illustrations import build_fallback_assets
+from utils.metrics import start_metrics_server
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_INTERVAL_SECONDS = 1800  # 30 minutes, the previous in-dashboard cadence
+DEFAULT_CLAIM_BATCH = 10  # feeds leased per claim in sharded mode
+DEFAULT_LEASE_SECONDS = 600  # a crashed worker's feeds become claimable after this
+DEFAULT_STANDBY_INTERVAL_SECONDS = 30  # How often followers check for a vanished leader
+FEED_RUN_RETENTION_DAYS = int(os.getenv('FEED_RUN_RETENTION_DAYS', '30'))
+# The worker's own Prometheus endpoint; it runs beside the dashboard, so it needs its own port
+INGEST_METRICS_PORT = int(os.getenv('INGEST_METRICS_PORT', '0'))
+
+# Exit statuses
+EXIT_OK = 0
+EXIT_CYCLE_FAILED = 1
+
+def log_feed_error(source: Dict[str, str], error: Exception) -> None:
+    if isinstance(error, FeedCircuitOpenError):
+        logger.info(f"Skipping {source['name']}: circuit open")
+    else:
+        logger.error(f"Error fetching feed from {source['name']}: {str(error)}")
+
+def run_ingestion_cycle(sink: EntrySink, deadline: float = REFRESH_DEADLINE_SECONDS,
+                        seen: Optional[SeenIndex] = None) -> bool:
+    """Scrape all sources once and report whether any feed could be fetched"""
+    started = time.monotonic()
+    try:
+        results = fetch_sources(get_all_sources(), sink, deadline, seen)
+        events = fetch_space_force_events()
+    except Exception as e:
+        logger.error(f"Ingestion cycle failed: {str(e)}", exc_info=True)
+        return False
+
+    fetched = 0
+    news_items = 0
+    for source, result, error in results:
+        if error is not None:
+            log_feed_error(source, error)
+            continue
+        fetched += 1
+        news_items += len(result.items)
+
+    logger.info(
+        f"Ingestion cycle finished in {time.monotonic() - started:.1f}s: "
+        f"{fetched}/{len(results)} feeds, {news_items} new or changed news items, {len(events)} events"
+    )
+    # With unchanged entries skipped, an empty cycle is normal; every feed
+    # failing usually means the network is down
+    return fetched > 0
+
+def run_periodic_tasks() -> None:
+    """Fetch events and prune old feed run records; runs once per --interval"""
+    try:
+        fetch_space_force_events()
+    except Exception as e:
+        logger.error(f"Error fetching events: {str(e)}")
+    try:
+        pruned = prune_feed_runs(FEED_RUN_RETENTION_DAYS)
+        if pruned:
+            logger.info(f"Pruned {pruned} feed runs older than {FEED_RUN_RETENTION_DAYS} days")
+    except Exception as e:
+        logger.error(f"Error pruning feed runs: {str(e)}")
+
+def poll_due_feeds(scheduler: FeedScheduler, sink: EntrySink,
+                   deadline: float = REFRESH_DEADLINE_SECONDS, seen: Optional[SeenIndex] = None) -> int:
+    """Fetch every feed that is due and reschedule each one from its result"""
+    due_sources = scheduler.due_sources()
+    if not due_sources:
+        return 0
+
+    ingested = 0
+    for source, result, error in fetch_sources(due_sources, sink, deadline, seen):
+        if error is not None:
+            log_feed_error(source, error)
+        if isinstance(error, FeedCircuitOpenError):
+            scheduler.record_skip(source)
+        else:
+            scheduler.record_poll(source, result.entry_dates, failed=error is not None)
+        ingested += len(result.items)
+    return ingested
+
+def run_daemon(interval: float, stop_event: threading.Event, sink: EntrySink,
+               elector: Optional[LeaderElector] = None,
+               standby_interval: float = DEFAULT_STANDBY_INTERVAL_SECONDS,
+               min_interval: float = MIN_POLL_INTERVAL,
+               max_interval: float = MAX_POLL_INTERVAL,
+               deadline: float = REFRESH_DEADLINE_SECONDS,
+               seen: Optional[SeenIndex] = None) -> int:
+    """Poll each feed on its own adaptive schedule until asked to stop"""
+    logger.info(f"Ingestion daemon started (initial feed interval {interval:.0f}s)")
+    scheduler = FeedScheduler(get_all_sources(), interval, min_interval, max_interval)
+    events_due = time.monotonic()
+    try:
+        while not stop_event.is_set():
+            if elector is not None and not elector.try_acquire():
+                logger.debug("Another node is ingesting; standing by")
+                stop_event.wait(standby_interval)
+                continue
+
+            poll_due_feeds(scheduler, sink, deadline, seen)
+
+            if time.monotonic() >= events_due:
+                run_periodic_tasks()
+                events_due = time.monotonic() + interval
+
+            # Sleep until the next feed is due, waking at least every standby
+            # interval so a lost lock is noticed; a shutdown signal wakes it at once
+            wait_seconds = min(
+                scheduler.seconds_until_next_poll(),
+                max(0.0, events_due - time.monotonic()),
+                standby_interval
+            )
+            stop_event.wait(wait_seconds)
+    finally:
+        if elector is not None:
+            elector.release()
+
+    logger.info("Ingestion daemon stopped")
+    return EXIT_OK
+
+def process_claimed_feed(feed: Dict[str, Any], worker_id: str, sink: EntrySink,
+                         min_interval: float, max_interval: float,
+                         seen: Optional[SeenIndex] = None) -> int:
+    """Fetch one leased feed and release it with its next poll time"""
+    # Another worker may have polled this feed last; pick up its breaker state
+    feed_breaker.restore(
+        feed['name'], feed['consecutive_failures'], feed['circuit_open_until'], feed['last_error']
+    )
+    failed = False
+    skipped = False
+    result = FeedResult([], [])
+    try:
+        result = fetch_feed_entries(feed, sink, seen)
+    except FeedCircuitOpenError as e:
+        log_feed_error(feed, e)
+        skipped = True
+    except Exception as e:
+        logger.error(f"Error fetching feed from {feed['name']}: {str(e)}")
+        failed = True
+
+    entry_dates = result.entry_dates
+    if skipped:
+        # The breaker backs off by itself; keep the cadence as it was
+        interval = feed['poll_interval_seconds']
+    else:
+        interval = next_poll_interval(
+            feed['poll_interval_seconds'], entry_dates,
+            count_new_entries(entry_dates, feed['newest_entry_at']),
+            failed, min_interval, max_interval
+        )
+    next_poll_at = datetime.now(timezone.utc) + timedelta(seconds=with_jitter(interval))
+    if not release_feed(feed['id'], worker_id, interval, next_poll_at, max(entry_dates, default=None)):
+        logger.warning(f"Lease on {feed['name']} expired before {worker_id} released it")
+    return len(result.items)
+
+def run_sharded_worker(stop_event: threading.Event, interval: float, sink: EntrySink,
+                       elector: Optional[LeaderElector] = None,
+                       standby_interval: float = DEFAULT_STANDBY_INTERVAL_SECONDS,
+                       min_interval: float = MIN_POLL_INTERVAL,
+                       max_interval: float = MAX_POLL_INTERVAL,
+                       batch_size: int = DEFAULT_CLAIM_BATCH,
+                       lease_seconds: int = DEFAULT_LEASE_SECONDS,
+                       seen: Optional[SeenIndex] = None) -> int:
+    """Claim due feeds from the shared registry until asked to stop.
+
+    Any number of workers on any number of hosts can run this loop; feed
+    leases in the ``feeds`` table keep them from fetching the same feed.
+    """
+    worker_id = f"{socket.gethostname()}:{os.getpid()}"
+    try:
+        sync_feed_registry(get_all_sources())
+    except Exception as e:
+        logger.error(f"Could not register feeds: {str(e)}")
+        return EXIT_CYCLE_FAILED
+    logger.info(f"Sharded ingestion worker {worker_id} started")
+    events_due = time.monotonic()
+    try:
+        with concurrent.futures.ThreadPoolExecutor(max_workers=FETCH_WORKERS) as executor:
+            while not stop_event.is_set():
+                # Events are not sharded; whichever worker holds the lock fetches them
+                if time.monotonic() >= events_due and (elector is None or elector.try_acquire()):
+                    run_periodic_tasks()
+                    events_due = time.monotonic() + interval
+
+                try:
+                    feeds = claim_due_feeds(worker_id, batch_size, lease_seconds)
+                except Exception as e:
+                    logger.error(f"Error claiming feeds: {str(e)}")
+                    feeds = []
+
+                if not feeds:
+                    stop_event.wait(standby_interval)
+                    continue
+
+                logger.info(f"{worker_id} claimed {len(feeds)} feeds")
+                futures = [
+                    executor.submit(process_claimed_feed, feed, worker_id, sink, min_interval, max_interval, seen)
+                    for feed in feeds
+                ]
+                for future in concurrent.futures.as_completed(futures):
+                    try:
+                        future.result()
+                    except Exception as e:
+                        logger.error(f"Error releasing feed: {str(e)}")
+    finally:
+        if elector is not None:
+            elector.release()
+
+    logger.info(f"Sharded ingestion worker {worker_id} stopped")
+    return EXIT_OK
+
+def install_signal_handlers(stop_event: threading.Event) -> None:
+    """Stop gracefully after the current cycle on SIGINT or SIGTERM"""
+    def handle_signal(signum, frame):
+        logger.info(f"Received signal {signum}, shutting down after the current cycle")
+        stop_event.set()
+
+    signal.signal(signal.SIGINT, handle_signal)
+    signal.signal(signal.SIGTERM, handle_signal)
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="python -m utils.ingest",
+        description="Scrape Space Force feeds into the database."
+    )
+    parser.add_argument(
+        "--once",
+        action="store_true",
+        help="run a single ingestion cycle and exit (non-zero status if no feed could be fetched)"
+    )
+    parser.add_argument(
+        "--interval",
+        type=float,
+        default=DEFAULT_INTERVAL_SECONDS,
+        help=f"initial per-feed poll interval in daemon mode (default {DEFAULT_INTERVAL_SECONDS})"
+    )
+    parser.add_argument(
+        "--min-interval",
+        type=float,
+        default=MIN_POLL_INTERVAL,
+        help=f"shortest adaptive poll interval for a feed (default {MIN_POLL_INTERVAL})"
+    )
+    parser.add_argument(
+        "--max-interval",
+        type=float,
+        default=MAX_POLL_INTERVAL,
+        help=f"longest adaptive poll interval for a feed (default {MAX_POLL_INTERVAL})"
+    )
+    parser.add_argument(
+        "--deadline",
+        type=float,
+        default=REFRESH_DEADLINE_SECONDS,
+        help=f"seconds a refresh waits for slow feeds before moving on (default {REFRESH_DEADLINE_SECONDS:.0f})"
+    )
+    parser.add_argument(
+        "--standby-interval",
+        type=float,
+        default=DEFAULT_STANDBY_INTERVAL_SECONDS,
+        help=f"seconds between leadership checks (default {DEFAULT_STANDBY_INTERVAL_SECONDS})"
+    )
+    parser.add_argument(
+        "--sharded",
+        action="store_true",
+        help="claim feeds from the shared feeds table so many workers can ingest in parallel"
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=DEFAULT_CLAIM_BATCH,
+        help=f"feeds to lease per claim in sharded mode (default {DEFAULT_CLAIM_BATCH})"
+    )
+    parser.add_argument(
+        "--lease-seconds",
+        type=int,
+        default=DEFAULT_LEASE_SECONDS,
+        help=f"how long a claimed feed stays leased (default {DEFAULT_LEASE_SECONDS})"
+    )
+    parser.add_argument(
+        "--spool-path",
+        default=SPOOL_PATH,
+        help=f"local spool file that buffers entries until they reach the database (default {SPOOL_PATH})"
+    )
+    parser.add_argument(
+        "--seen-index-path",
+        default=SEEN_INDEX_PATH,
+        help=f"local index of already-ingested entries, used to skip unchanged ones (default {SEEN_INDEX_PATH})"
+    )
+    parser.add_argument(
+        "--rescan",
+        action="store_true",
+        help="forget which entries were already ingested and process every entry again"
+    )
+    parser.add_argument(
+        "--metrics-port",
+        type=int,
+        default=INGEST_METRICS_PORT,
+        help="serve fetch, parse and database timings for Prometheus on this port (default: off)"
+    )
+    parser.add_argument(
+        "--no-leader-election",
+        action="store_true",
+        help="ingest even if another node holds the ingestion lock"
+    )
+    return parser.parse_args(argv)
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+
+    # Replicas may all run the worker; only the advisory-lock holder ingests
+    elector = None if args.no_leader_election else LeaderElector()
+    spool = IngestSpool(args.spool_path)
+    flusher = SpoolFlusher(spool)
+    seen = SeenIndex(args.seen_index_path)
+    if args.rescan:
+        seen.clear()
+    # Keep skipping feeds whose circuits were open when the last run stopped
+    restore_breaker_states()
+    build_fallback_assets()
+    start_metrics_server(args.metrics_port)
+
+    if args.once:
+        if elector is not None and not elector.try_acquire():
+            if elector.conn is None:
+                # The election itself failed, so the database is unreachable
+                return EXIT_CYCLE_FAILED
+            logger.info("Another node holds the ingestion lock; skipping this run")
+            return EXIT_OK
+        try:
+            ingested = run_ingestion_cycle(spool.append, args.deadline, seen)
+        finally:
+            if elector is not None:
+                elector.release()
+        # Whatever can't be flushed now stays spooled for the next run
+        flushed = flusher.drain()
+        return EXIT_OK if ingested and flushed else EXIT_CYCLE_FAILED
+
+    stop_event = threading.Event()
+    install_signal_handlers(stop_event)
+    flusher.start()
+
+    try:
+        if args.sharded:
+            return run_sharded_worker(
+                stop_event, args.interval, spool.append, elector, args.standby_interval,
+                args.min_interval, args.max_interval, args.batch_size, args.lease_seconds, seen
+            )
+        return run_daemon(
+            args.interval, stop_event, spool.append, elector, args.standby_interval,
+            args.min_interval, args.max_interval, args.deadline, seen
+        )
+    finally:
+        flusher.stop()
+        spool.close()
+        seen.close()
+
+if __name__ == "__main__":
+    sys.exit(main())
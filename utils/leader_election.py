@@ -0,0 +1,75 @@
+import logging
+from utils.db import get_db_connection
+
+logger = logging.getLogger(__name__)
+
+# Arbitrary application-wide key for pg_advisory_lock ("SFDF" in ASCII)
+INGEST_LEADER_LOCK_KEY = 0x53464446
+
+class LeaderElector:
+    """Elects a single leader using a Postgres session-level advisory lock.
+
+    The lock is held by an open connection, so when the leader process dies
+    or loses its database session Postgres releases it and the next follower
+    to poll takes over.
+    """
+
+    def __init__(self, lock_key: int = INGEST_LEADER_LOCK_KEY, role: str = "ingestion"):
+        self.lock_key = lock_key
+        self.role = role
+        self.conn = None
+        self.is_leader = False
+
+    def _connect(self):
+        # Keepalives make the server notice a vanished leader and drop its lock
+        conn = get_db_connection(keepalives=1, keepalives_idle=30, keepalives_interval=10, keepalives_count=3)
+        conn.autocommit = True
+        return conn
+
+    def _reset(self) -> None:
+        if self.conn is not None:
+            try:
+                self.conn.close()
+            except Exception:
+                pass
+        self.conn = None
+        self.is_leader = False
+
+    def try_acquire(self) -> bool:
+        """Become or remain leader; returns False while another node holds the lock"""
+        try:
+            if self.conn is None or self.conn.closed:
+                self._reset()
+                self.conn = self._connect()
+
+            with self.conn.cursor() as cur:
+                if self.is_leader:
+                    # Our lock lives as long as this session; make sure it still does
+                    cur.execute("SELECT 1")
+                    return True
+
+                cur.execute("SELECT pg_try_advisory_lock(%s) AS acquired", (self.lock_key,))
+                result = cur.fetchone()
+                self.is_leader = bool(result and result['acquired'])
+
+            if self.is_leader:
+                logger.info(f"Acquired {self.role} leadership")
+            return self.is_leader
+        except Exception as e:
+            was_leader = self.is_leader
+            logger.error(f"Leader election connection error: {str(e)}")
+            self._reset()
+            if was_leader:
+                logger.warning(f"Lost {self.role} leadership")
+            return False
+
+    def release(self) -> None:
+        """Give up leadership so a follower can take over immediately"""
+        if self.conn is not None and self.is_leader:
+            try:
+                with self.conn.cursor() as cur:
+                    cur.execute("SELECT pg_advisory_unlock(%s)", (self.lock_key,))
+                logger.info(f"Released {self.role} leadership")
+            except Exception as e:
+                logger.error(f"Error releasing {self.role} leadership: {str(e)}")
+        self._reset()
@@ -0,0 +1,233 @@
+import os
+import time
+import bisect
+import logging
+import functools
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from typing import List, Dict, Any, Optional, Tuple, Callable, Sequence
+
+logger = logging.getLogger(__name__)
+
+# Port of the Prometheus text endpoint; 0 leaves it off
+METRICS_PORT = int(os.getenv('METRICS_PORT', '0'))
+METRICS_HOST = os.getenv('METRICS_HOST', '127.0.0.1')
+# Bucket upper bounds in seconds, from a fast indexed query to a slow feed download
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+def _labels(labels: Dict[str, Any]) -> Labels:
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+def format_labels(labels: Labels, extra: Labels = ()) -> str:
+    """Prometheus label set, e.g. {stage="fetch"}"""
+    pairs = labels + extra
+    if not pairs:
+        return ""
+    escaped = (
+        key + '="' + value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') + '"'
+        for key, value in pairs
+    )
+    return "{" + ",".join(escaped) + "}"
+
+class Histogram:
+    """Latency distribution for one label set, bucketed like a Prometheus histogram"""
+
+    def __init__(self, buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        # One slot per bucket plus the +Inf overflow; not cumulative
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def quantile(self, q: float) -> float:
+        """Estimate a quantile by interpolating inside its bucket, as histogram_quantile does"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            if seen + bucket_count >= rank and bucket_count:
+                lower = self.buckets[index - 1] if index > 0 else 0.0
+                # The overflow bucket has no upper bound; the largest value seen stands in
+                upper = self.buckets[index] if index < len(self.buckets) else self.max
+                return min(lower + (upper - lower) * (rank - seen) / bucket_count, self.max)
+            seen += bucket_count
+        return self.max
+
+class MetricsRegistry:
+    """Process-wide counters, gauges and latency histograms"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counters: Dict[str, Dict[Labels, float]] = {}
+        self.gauges: Dict[str, Dict[Labels, float]] = {}
+        self.histograms: Dict[str, Dict[Labels, Histogram]] = {}
+
+    def inc(self, name: str, value: float = 1.0, **labels: Any) -> None:
+        key = _labels(labels)
+        with self.lock:
+            series = self.counters.setdefault(name, {})
+            series[key] = series.get(key, 0.0) + value
+
+    def set_gauge(self, name: str, value: float, **labels: Any) -> None:
+        with self.lock:
+            self.gauges.setdefault(name, {})[_labels(labels)] = value
+
+    def observe(self, name: str, value: float, **labels: Any) -> None:
+        key = _labels(labels)
+        with self.lock:
+            series = self.histograms.setdefault(name, {})
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = Histogram()
+            histogram.observe(value)
+
+    def render_prometheus(self) -> str:
+        """All metrics in the Prometheus text exposition format"""
+        lines: List[str] = []
+
+        with self.lock:
+            for kind, metrics in (('counter', self.counters), ('gauge', self.gauges)):
+                for name in sorted(metrics):
+                    lines.append(f"# TYPE {name} {kind}")
+                    for labels, value in sorted(metrics[name].items()):
+                        lines.append(f"{name}{format_labels(labels)} {value:g}")
+            for name in sorted(self.histograms):
+                lines.append(f"# TYPE {name} histogram")
+                for labels, histogram in sorted(self.histograms[name].items()):
+                    cumulative = 0
+                    for bound, bucket_count in zip(histogram.buckets + (float('inf'),), histogram.counts):
+                        cumulative += bucket_count
+                        le = "+Inf" if bound == float('inf') else f"{bound:g}"
+                        lines.append(f"{name}_bucket{format_labels(labels, (('le', le),))} {cumulative}")
+                    lines.append(f"{name}_sum{format_labels(labels)} {histogram.sum:.6f}")
+                    lines.append(f"{name}_count{format_labels(labels)} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+    def histogram_summary(self) -> List[Dict[str, Any]]:
+        """One row per histogram series with count and latency percentiles in milliseconds"""
+        with self.lock:
+            return [
+                {
+                    'metric': name,
+                    'labels': ", ".join(f"{key}={value}" for key, value in labels),
+                    'count': histogram.count,
+                    'mean_ms': histogram.sum / histogram.count * 1000 if histogram.count else 0.0,
+                    'p50_ms': histogram.quantile(0.5) * 1000,
+                    'p95_ms': histogram.quantile(0.95) * 1000,
+                    'p99_ms': histogram.quantile(0.99) * 1000,
+                    'max_ms': histogram.max * 1000
+                }
+                for name in sorted(self.histograms)
+                for labels, histogram in sorted(self.histograms[name].items())
+            ]
+
+    def counter_summary(self) -> List[Dict[str, Any]]:
+        """One row per counter and gauge series"""
+        with self.lock:
+            return [
+                {
+                    'metric': name,
+                    'labels': ", ".join(f"{key}={value}" for key, value in labels),
+                    'value': value
+                }
+                for metrics in (self.counters, self.gauges)
+                for name in sorted(metrics)
+                for labels, value in sorted(metrics[name].items())
+            ]
+
+registry = MetricsRegistry()
+
+def inc(name: str, value: float = 1.0, **labels: Any) -> None:
+    registry.inc(name, value, **labels)
+
+def set_gauge(name: str, value: float, **labels: Any) -> None:
+    registry.set_gauge(name, value, **labels)
+
+def observe(name: str, seconds: float, **labels: Any) -> None:
+    registry.observe(name, seconds, **labels)
+
+class timed:
+    """Record how long a block or each call of a function takes, in seconds.
+
+    Works as a context manager::
+
+        with timed('page_stage_seconds', stage='filter'):
+            ...
+
+    and as a decorator::
+
+        @timed('db_query_seconds', query='get_news')
+        def get_news(...):
+            ...
+
+    Calls that raise are still timed and also counted with the same labels,
+    in ``db_query_errors_total`` for ``db_query_seconds``. Exceptions outside
+    ``Exception``, such as the ones behind ``st.stop`` and ``st.rerun``, are
+    control flow and only timed.
+    """
+
+    def __init__(self, name: str, **labels: Any):
+        self.name = name
+        self.labels = labels
+        self.started = 0.0
+        base = name[:-len('_seconds')] if name.endswith('_seconds') else name
+        self.errors_name = f"{base}_errors_total"
+
+    def __enter__(self) -> "timed":
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, traceback) -> bool:
+        registry.observe(self.name, time.perf_counter() - self.started, **self.labels)
+        if exc_type is not None and issubclass(exc_type, Exception):
+            registry.inc(self.errors_name, **self.labels)
+        return False
+
+    def __call__(self, func: Callable) -> Callable:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            # A fresh timer per call keeps the decorator safe across threads
+            with timed(self.name, **self.labels):
+                return func(*args, **kwargs)
+        return wrapper
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    def log_message(self, format: str, *args) -> None:
+        logger.debug(format % args)
+
+    def do_GET(self) -> None:
+        if self.path.split('?')[0].rstrip('/') != '/metrics':
+            self.send_response(404)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        payload = registry.render_prometheus().encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+def start_metrics_server(port: int = METRICS_PORT, host: str = METRICS_HOST) -> Optional[ThreadingHTTPServer]:
+    """Serve /metrics on a background thread; None when the port is 0 or taken"""
+    if not port:
+        return None
+    try:
+        server = ThreadingHTTPServer((host, port), MetricsHandler)
+    except OSError as e:
+        logger.warning(f"Could not start metrics endpoint on {host}:{port}: {str(e)}")
+        return None
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name='metrics-endpoint', daemon=True).start()
+    logger.info(f"Serving metrics on http://{host}:{server.server_port}/metrics")
+    return server
@@ -0,0 +1,129 @@
+"""Local stand-in for the OpenAI chat completions API.
+
+Lets the briefing pipeline be exercised without an API key or network:
+
+    python -m utils.mock_completion_server --port 8808 --delay 0.05
+    OPENAI_BASE_URL=http://127.0.0.1:8808/v1 streamlit run main.py
+
+The reply summarizes the event lines in the prompt so output varies with
+the data. Streaming requests are answered with server-sent events one word
+at a time, `--delay` seconds apart.
+"""
+import sys
+import json
+import time
+import uuid
+import argparse
+import logging
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from typing import List, Dict, Any, Optional
+
+logger = logging.getLogger(__name__)
+
+def compose_reply(messages: List[Dict[str, Any]]) -> str:
+    """Build a deterministic briefing-like reply from the prompt's event lines"""
+    prompt = messages[-1]['content'] if messages else ''
+    events = [line[2:].split(' (')[0] for line in prompt.splitlines() if line.startswith('- ')]
+    if not events:
+        return "No reportable developments in the provided material."
+    lines = [f"**Situation summary:** {len(events)} reported developments."]
+    lines += [f"- {title}" for title in events[:5]]
+    if len(events) > 5:
+        lines.append(f"- ...and {len(events) - 5} more.")
+    lines.append("**Assessment:** Continue monitoring for follow-on activity.")
+    return "\n".join(lines)
+
+class CompletionHandler(BaseHTTPRequestHandler):
+    delay = 0.0
+
+    def log_message(self, format: str, *args) -> None:
+        logger.debug(format % args)
+
+    def _send_json(self, status: int, body: Dict[str, Any]) -> None:
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_POST(self) -> None:
+        if not self.path.rstrip('/').endswith('/chat/completions'):
+            self._send_json(404, {'error': {'message': f'Unknown path {self.path}', 'type': 'invalid_request_error'}})
+            return
+        request = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+        reply = compose_reply(request.get('messages', []))
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+        model = request.get('model', 'mock')
+        created = int(time.time())
+
+        if not request.get('stream'):
+            self._send_json(200, {
+                'id': completion_id, 'object': 'chat.completion', 'created': created, 'model': model,
+                'choices': [{'index': 0, 'message': {'role': 'assistant', 'content': reply}, 'finish_reason': 'stop'}],
+                'usage': {'prompt_tokens': 0, 'completion_tokens': len(reply.split()), 'total_tokens': len(reply.split())}
+            })
+            return
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Cache-Control', 'no-cache')
+        self.end_headers()
+
+        def send_chunk(delta: Dict[str, Any], finish_reason: Optional[str] = None) -> None:
+            chunk = {
+                'id': completion_id, 'object': 'chat.completion.chunk', 'created': created, 'model': model,
+                'choices': [{'index': 0, 'delta': delta, 'finish_reason': finish_reason}]
+            }
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+            self.wfile.flush()
+
+        send_chunk({'role': 'assistant', 'content': ''})
+        words = reply.split(' ')
+        for index, word in enumerate(words):
+            if self.delay:
+                time.sleep(self.delay)
+            send_chunk({'content': word if index == len(words) - 1 else word + ' '})
+        send_chunk({}, 'stop')
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.wfile.flush()
+
+def start_server(port: int = 0, delay: float = 0.0, host: str = '127.0.0.1') -> ThreadingHTTPServer:
+    """Start the mock server on a background thread; port 0 picks a free port"""
+    handler = type('ConfiguredCompletionHandler', (CompletionHandler,), {'delay': delay})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name='mock-completions', daemon=True).start()
+    logger.info(f"Mock completion server listening on http://{host}:{server.server_port}/v1")
+    return server
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="python -m utils.mock_completion_server",
+        description="Serve canned OpenAI-compatible chat completions for local testing."
+    )
+    parser.add_argument("--host", default="127.0.0.1", help="address to listen on (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=8808, help="port to listen on (default: 8808)")
+    parser.add_argument(
+        "--delay",
+        type=float,
+        default=0.05,
+        help="seconds between streamed words (default: 0.05)"
+    )
+    return parser.parse_args(argv)
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    logging.basicConfig(level=logging.INFO)
+    server = start_server(args.port, args.delay, args.host)
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.shutdown()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
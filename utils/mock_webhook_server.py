@@ -0,0 +1,78 @@
+"""Local stand-in for a notification webhook receiver.
+
+Lets the webhook notification sink be exercised without a real endpoint:
+
+    python -m utils.mock_webhook_server --port 8809
+    NOTIFICATION_SINKS=inapp,webhook NOTIFICATION_WEBHOOK_URL=http://127.0.0.1:8809/notify streamlit run main.py
+
+Every POSTed batch is logged and kept in memory, newest last. Use
+`--status` to answer with an error and check how the dashboard copes.
+"""
+import sys
+import json
+import argparse
+import logging
+import threading
+from collections import deque
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from typing import List, Optional
+
+logger = logging.getLogger(__name__)
+
+class WebhookHandler(BaseHTTPRequestHandler):
+    status = 204
+    received: deque = deque(maxlen=100)  # JSON payloads, newest last
+
+    def log_message(self, format: str, *args) -> None:
+        logger.debug(format % args)
+
+    def do_POST(self) -> None:
+        try:
+            payload = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+        except ValueError:
+            self.send_response(400)
+            self.end_headers()
+            return
+        self.received.append(payload)
+        titles = [item.get('title') for item in payload.get('items', [])]
+        logger.info(f"Received {payload.get('count', len(titles))} item(s) on {self.path}: {titles[:3]}")
+        self.send_response(self.status)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+def start_server(port: int = 0, status: int = 204, host: str = '127.0.0.1') -> ThreadingHTTPServer:
+    """Start the receiver on a background thread; port 0 picks a free port.
+
+    Received payloads are available as `server.RequestHandlerClass.received`.
+    """
+    handler = type('ConfiguredWebhookHandler', (WebhookHandler,), {'status': status, 'received': deque(maxlen=100)})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name='mock-webhook', daemon=True).start()
+    logger.info(f"Mock webhook receiver listening on http://{host}:{server.server_port}/")
+    return server
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="python -m utils.mock_webhook_server",
+        description="Accept and log notification webhook deliveries for local testing."
+    )
+    parser.add_argument("--host", default="127.0.0.1", help="address to listen on (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=8809, help="port to listen on (default: 8809)")
+    parser.add_argument("--status", type=int, default=204, help="HTTP status to answer with (default: 204)")
+    return parser.parse_args(argv)
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    logging.basicConfig(level=logging.INFO)
+    server = start_server(args.port, args.status, args.host)
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.shutdown()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,334 @@
+import os
+import abc
+import sys
+import logging
+import threading
+import time
+import weakref
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import List, Dict, Any, Optional, Tuple, Mapping, NamedTuple
+import requests
+from plyer import notification
+from utils.db import get_ingest_cursor, get_items_since
+from utils.dataset_store import DatasetSnapshot, freeze_items, get_dataset_store
+from utils.leader_election import LeaderElector
+
+logger = logging.getLogger(__name__)
+
+# Comma-separated sinks that receive new items: inapp, webhook, desktop
+NOTIFICATION_SINKS = os.getenv('NOTIFICATION_SINKS', 'inapp')
+NOTIFICATION_WEBHOOK_URL = os.getenv('NOTIFICATION_WEBHOOK_URL', '')
+NOTIFICATION_WEBHOOK_TIMEOUT = float(os.getenv('NOTIFICATION_WEBHOOK_TIMEOUT', '5'))
+# Every dashboard replica finds the same new items, so only the replica
+# holding this advisory lock ("SFWH" in ASCII) posts them to the webhook
+WEBHOOK_LEADER_LOCK_KEY = 0x53465748
+# Only items published this recently are announced
+NOTIFICATION_MAX_AGE = timedelta(hours=24)
+# Rows read per dispatch; anything beyond is picked up by the next one
+NOTIFICATION_BATCH = 500
+# Rows created this recently are read again on every dispatch, so one whose
+# insert committed after a higher id was already read is still announced
+NOTIFICATION_LAG_SECONDS = float(os.getenv('NOTIFICATION_LAG_SECONDS', '120'))
+# Batches a session holds until its next rerun; the oldest are dropped first
+INBOX_MAX_BATCHES = 20
+# Each session and each outside sink is notified at most this often; items
+# found in between are held and delivered together
+NOTIFICATION_MIN_INTERVAL = float(os.getenv('NOTIFICATION_MIN_INTERVAL_SECONDS', '300'))
+
+class NotificationBatch(NamedTuple):
+    """New items found by one dispatch, shared read-only by every sink"""
+    items: Tuple[Mapping[str, Any], ...]
+    created_at: datetime
+
+class SessionInbox:
+    """Batches waiting for one session"""
+
+    def __init__(self, min_interval: float = NOTIFICATION_MIN_INTERVAL):
+        # deque appends and pops are atomic, so no lock is needed
+        self.batches = deque(maxlen=INBOX_MAX_BATCHES)
+        self.min_interval = min_interval
+        self.last_drained: Optional[float] = None
+
+    def put(self, batch: NotificationBatch) -> None:
+        self.batches.append(batch)
+
+    def drain(self) -> List[Mapping[str, Any]]:
+        """Take every waiting item, oldest batch first.
+
+        Within min_interval of the last non-empty drain nothing is taken, so
+        a session gets one notification for everything found in between.
+        """
+        now = time.monotonic()
+        if self.last_drained is not None and now - self.last_drained < self.min_interval:
+            return []
+        items: List[Mapping[str, Any]] = []
+        while True:
+            try:
+                items.extend(self.batches.popleft().items)
+            except IndexError:
+                break
+        if items:
+            self.last_drained = now
+        return items
+
+    def clear(self) -> None:
+        """Drop every waiting batch"""
+        self.batches.clear()
+
+class NotificationSink(abc.ABC):
+    """Receives each batch of new items once per process"""
+    name = "sink"
+    # The dispatcher holds and merges batches that arrive sooner than this
+    # after the last delivery
+    min_interval = NOTIFICATION_MIN_INTERVAL
+
+    @abc.abstractmethod
+    def deliver(self, batch: NotificationBatch) -> None:
+        """Send one batch; may block, and raise on failure"""
+
+class InAppSink(NotificationSink):
+    """Hands batches to subscribed sessions, which show them as toasts"""
+    name = "inapp"
+    # Each session's inbox does its own throttling
+    min_interval = 0
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        # Inboxes live in session state; a closed session's inbox is
+        # garbage collected and drops out of the set on its own
+        self.inboxes: "weakref.WeakSet[SessionInbox]" = weakref.WeakSet()
+
+    def subscribe(self) -> SessionInbox:
+        inbox = SessionInbox()
+        with self.lock:
+            self.inboxes.add(inbox)
+        return inbox
+
+    def deliver(self, batch: NotificationBatch) -> None:
+        with self.lock:
+            inboxes = list(self.inboxes)
+        for inbox in inboxes:
+            inbox.put(batch)
+
+class WebhookSink(NotificationSink):
+    """POSTs each batch as JSON to a URL"""
+    name = "webhook"
+
+    def __init__(self, url: str, timeout: float = NOTIFICATION_WEBHOOK_TIMEOUT,
+                 elector: Optional[LeaderElector] = None):
+        self.url = url
+        self.timeout = timeout
+        # None sends from this process regardless of other replicas
+        self.elector = elector
+
+    def deliver(self, batch: NotificationBatch) -> None:
+        if self.elector is not None and not self.elector.try_acquire():
+            logger.debug(f"Another dashboard replica posts webhooks; skipping {len(batch.items)} item(s)")
+            return
+        payload = {
+            'count': len(batch.items),
+            'created_at': batch.created_at.isoformat(),
+            'items': [
+                {
+                    'kind': item['kind'],
+                    'title': item['title'],
+                    'category': item['category'],
+                    'date': item['date'].isoformat(),
+                    'link': item.get('link')
+                }
+                for item in batch.items
+            ]
+        }
+        response = requests.post(self.url, json=payload, timeout=self.timeout)
+        response.raise_for_status()
+
+def desktop_unavailable_reason() -> Optional[str]:
+    """Why desktop notifications can't reach anyone here, or None if they can"""
+    if os.getenv('SSH_CONNECTION') or os.getenv('SSH_TTY'):
+        return "the dashboard is running in a remote SSH session"
+    if sys.platform.startswith('linux') and not (os.getenv('DISPLAY') or os.getenv('WAYLAND_DISPLAY')):
+        return "there is no graphical display"
+    return None
+
+class DesktopSink(NotificationSink):
+    """Desktop notification on the machine running the dashboard, for local use"""
+    name = "desktop"
+
+    def deliver(self, batch: NotificationBatch) -> None:
+        notification.notify(
+            title="New Space Force Events",
+            message=f"{len(batch.items)} new event(s) available!\n{batch.items[0]['title']}",
+            app_icon=None,
+            timeout=10,
+        )
+
+def build_sinks(names: str = NOTIFICATION_SINKS,
+                webhook_url: str = NOTIFICATION_WEBHOOK_URL) -> List[NotificationSink]:
+    """Create the sinks named in a comma-separated list"""
+    sinks: List[NotificationSink] = []
+    for name in (name.strip().lower() for name in names.split(',')):
+        if not name:
+            continue
+        if name == InAppSink.name:
+            sinks.append(InAppSink())
+        elif name == WebhookSink.name:
+            if webhook_url:
+                sinks.append(WebhookSink(webhook_url, elector=LeaderElector(WEBHOOK_LEADER_LOCK_KEY, role="webhook")))
+            else:
+                logger.warning("Webhook notifications need NOTIFICATION_WEBHOOK_URL; skipping")
+        elif name == DesktopSink.name:
+            reason = desktop_unavailable_reason()
+            if reason:
+                # Notifications would pop up on a server nobody is looking at
+                logger.warning(f"Desktop notifications are disabled because {reason}")
+            else:
+                sinks.append(DesktopSink())
+        else:
+            logger.warning(f"Unknown notification sink '{name}'")
+    return sinks
+
+class NotificationDispatcher:
+    """Finds new items once per process and hands them to every sink.
+
+    The dispatcher keeps the highest news and event ids already announced.
+    Each dataset publish triggers one query for rows past them, plus rows
+    created in the last NOTIFICATION_LAG_SECONDS that committed out of id
+    order; rows already announced are dropped by id. The work grows with
+    the number of new items, not with the number of sessions.
+    """
+
+    def __init__(self, sinks: List[NotificationSink]):
+        self.sinks = sinks
+        self.in_app = next((sink for sink in sinks if isinstance(sink, InAppSink)), None)
+        self.lock = threading.Lock()
+        self.cursor: Optional[Tuple[int, int]] = None
+        # (kind, id) of rows read inside the lag window -> when they were first read
+        self.recent: Dict[Tuple[str, int], float] = {}
+        # Webhooks and desktop notifiers can be slow; they must not hold up
+        # the thread publishing the dataset
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="notify")
+        # Per outside sink: items held back by its min_interval, the time of
+        # its last delivery, and the timer that will release the held items
+        self.hold_lock = threading.Lock()
+        self.held: Dict[str, List[Mapping[str, Any]]] = {}
+        self.last_sent: Dict[str, float] = {}
+        self.timers: Dict[str, threading.Timer] = {}
+
+    def subscribe(self) -> Optional[SessionInbox]:
+        """Get an inbox for a new session, or None when in-app notifications are off"""
+        return self.in_app.subscribe() if self.in_app else None
+
+    def start(self) -> None:
+        """Set the cursor so only items ingested from now on are announced"""
+        with self.lock:
+            self._reset_cursor()
+
+    def _reset_cursor(self) -> None:
+        try:
+            self.cursor = get_ingest_cursor()
+            # Rows already in the lag window predate the cursor; don't announce them later
+            self._take_unseen(get_items_since(*self.cursor, NOTIFICATION_LAG_SECONDS, limit=NOTIFICATION_BATCH))
+        except Exception as e:
+            logger.error(f"Error reading ingest cursor: {str(e)}")
+            self.cursor = None
+
+    def _take_unseen(self, items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Drop rows already read, remember the rest and advance the cursor past them"""
+        now = time.monotonic()
+        # A row leaves the lag window NOTIFICATION_LAG_SECONDS after it was
+        # created; keep its id twice that long to be safe
+        self.recent = {
+            key: read_at for key, read_at in self.recent.items() if now - read_at < 2 * NOTIFICATION_LAG_SECONDS
+        }
+        news_id, event_id = self.cursor
+        unseen = []
+        for item in items:
+            key = (item['kind'], item['id'])
+            if key in self.recent:
+                continue
+            self.recent[key] = now
+            unseen.append(item)
+            if item['kind'] == 'news':
+                news_id = max(news_id, item['id'])
+            else:
+                event_id = max(event_id, item['id'])
+        self.cursor = (news_id, event_id)
+        return unseen
+
+    def dispatch_new_items(self, snapshot: Optional[DatasetSnapshot] = None) -> Optional[NotificationBatch]:
+        """Read items past the cursor and deliver the recent ones to every sink"""
+        with self.lock:
+            if self.cursor is None:
+                self._reset_cursor()
+                return None
+            try:
+                items = get_items_since(*self.cursor, NOTIFICATION_LAG_SECONDS, limit=NOTIFICATION_BATCH)
+            except Exception as e:
+                logger.error(f"Error checking for new items: {str(e)}")
+                return None
+            items = self._take_unseen(items)
+
+        now = datetime.now(timezone.utc)
+        # Backfilled archive items advance the cursor without being announced
+        fresh = [item for item in items if now - item['date'] <= NOTIFICATION_MAX_AGE]
+        if not fresh:
+            return None
+        batch = NotificationBatch(freeze_items(fresh), now)
+        for sink in self.sinks:
+            if sink is self.in_app:
+                sink.deliver(batch)
+            else:
+                self._offer(sink, batch)
+        logger.info(f"Dispatched {len(fresh)} new item(s) to {len(self.sinks)} sink(s)")
+        return batch
+
+    def _offer(self, sink: NotificationSink, batch: NotificationBatch) -> None:
+        """Deliver a batch now, or hold it with anything else found until the sink's interval has passed"""
+        with self.hold_lock:
+            held = self.held.setdefault(sink.name, [])
+            held.extend(batch.items)
+            # Keep the newest items if a sink stays throttled through a flood
+            del held[:-NOTIFICATION_BATCH]
+            wait = self.last_sent.get(sink.name, float('-inf')) + sink.min_interval - time.monotonic()
+            if wait > 0:
+                if sink.name not in self.timers:
+                    timer = threading.Timer(wait, self._release, (sink,))
+                    timer.daemon = True
+                    self.timers[sink.name] = timer
+                    timer.start()
+                return
+        self._release(sink)
+
+    def _release(self, sink: NotificationSink) -> None:
+        """Send everything held for a sink as one batch"""
+        with self.hold_lock:
+            self.timers.pop(sink.name, None)
+            items = self.held.pop(sink.name, [])
+            if not items:
+                return
+            self.last_sent[sink.name] = time.monotonic()
+        self.executor.submit(self._deliver, sink, NotificationBatch(tuple(items), datetime.now(timezone.utc)))
+
+    def _deliver(self, sink: NotificationSink, batch: NotificationBatch) -> None:
+        try:
+            sink.deliver(batch)
+        except Exception as e:
+            logger.error(f"Error delivering notifications to {sink.name}: {str(e)}")
+
+# Held at module level like the dataset store: a cache_resource clear would
+# start a second dispatcher while sessions stay subscribed to the first
+_dispatcher: Optional[NotificationDispatcher] = None
+_dispatcher_lock = threading.Lock()
+
+def get_notification_dispatcher() -> NotificationDispatcher:
+    """Get the process-wide notification dispatcher, fed by dataset publishes"""
+    global _dispatcher
+    with _dispatcher_lock:
+        if _dispatcher is None:
+            dispatcher = NotificationDispatcher(build_sinks())
+            dispatcher.start()
+            get_dataset_store().add_listener(dispatcher.dispatch_new_items)
+            _dispatcher = dispatcher
+        return _dispatcher
@@ -4,6 +4,7 @@ import logging
 import gc
 from typing import Dict, Any
 from datetime import datetime, timedelta
+from utils.metrics import set_gauge
 
 logger = logging.getLogger(__name__)
 
@@ -67,6 +68,8 @@ def monitor_performance() -> Dict[str, float]:
 
         # Monitor memory usage
         memory_usage = get_memory_usage()
+        set_gauge('process_resident_memory_bytes', memory_usage['rss'] * 1024 * 1024)
+        set_gauge('process_virtual_memory_bytes', memory_usage['vms'] * 1024 * 1024)
         st.session_state.performance_metrics['memory_usage'].append({
             'timestamp': current_time,
             'usage': memory_usage
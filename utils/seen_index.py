@@ -0,0 +1,150 @@
+import os
+import math
+import json
+import sqlite3
+import hashlib
+import logging
+import threading
+import time
+from typing import List, Dict, Any, Tuple, Iterable
+
+logger = logging.getLogger(__name__)
+
+SEEN_INDEX_PATH = os.getenv('SEEN_INDEX_PATH', os.path.join('data', 'seen_index.sqlite3'))
+SEEN_INDEX_CAPACITY = int(os.getenv('SEEN_INDEX_CAPACITY', '200000'))
+SEEN_INDEX_RETENTION_DAYS = int(os.getenv('SEEN_INDEX_RETENTION_DAYS', '90'))
+BLOOM_ERROR_RATE = 0.01
+# Skipped entries refresh their last_seen at most this often, so retention
+# counts from when an entry left its feed without a write on every poll
+TOUCH_INTERVAL_SECONDS = 86400
+
+# Raw feed fields that, if unchanged, mean the processed entry would be too
+FINGERPRINT_FIELDS = ('title', 'summary', 'description', 'link', 'published', 'updated')
+
+def entry_key(source: Dict[str, str], entry: Dict[str, Any]) -> bytes:
+    """Stable identity of an entry: its GUID, falling back to its link or title"""
+    identity = entry.get('id') or entry.get('link') or entry.get('title', '')
+    return hashlib.blake2b(f"{source['name']}\0{identity}".encode(), digest_size=16).digest()
+
+def entry_fingerprint(source: Dict[str, str], entry: Dict[str, Any]) -> bytes:
+    """Hash of everything that feeds into the processed news item"""
+    fields = {field: entry.get(field) for field in FINGERPRINT_FIELDS}
+    fields['category'] = source['category']
+    fields['media'] = [
+        media.get('url') for media in entry.get('media_content', []) + entry.get('media_thumbnail', [])
+    ]
+    return hashlib.blake2b(json.dumps(fields, sort_keys=True, default=str).encode(), digest_size=16).digest()
+
+class BloomFilter:
+    """Fixed-size Bloom filter: no false negatives, ~error_rate false positives at capacity"""
+
+    def __init__(self, capacity: int = SEEN_INDEX_CAPACITY, error_rate: float = BLOOM_ERROR_RATE):
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item: bytes) -> Iterable[int]:
+        # Double hashing derives all k positions from one digest
+        digest = hashlib.blake2b(item, digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hash_count))
+
+    def add(self, item: bytes) -> None:
+        for position in self._positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, item: bytes) -> bool:
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+class SeenIndex:
+    """Persistent record of ingested entries so unchanged ones can be skipped.
+
+    The Bloom filter answers "definitely not seen" without touching disk,
+    which is the common case for new entries; possible hits are confirmed
+    against the exact SQLite store.
+    """
+
+    def __init__(self, path: str = SEEN_INDEX_PATH, capacity: int = SEEN_INDEX_CAPACITY,
+                 retention_days: int = SEEN_INDEX_RETENTION_DAYS):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.capacity = capacity
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS seen (
+                key BLOB PRIMARY KEY,
+                fingerprint BLOB NOT NULL,
+                last_seen REAL NOT NULL
+            ) WITHOUT ROWID
+        """)
+        # Entries that dropped out of their feed long ago won't come back
+        self.conn.execute(
+            "DELETE FROM seen WHERE last_seen < ?", (time.time() - retention_days * 86400,)
+        )
+        self.bloom = BloomFilter(capacity)
+        count = 0
+        for key, fingerprint in self.conn.execute("SELECT key, fingerprint FROM seen"):
+            self.bloom.add(key + fingerprint)
+            count += 1
+        logger.info(f"Loaded {count} seen entries from {path}")
+
+    def filter_unseen(self, source: Dict[str, str], entries: List[Dict[str, Any]]
+                      ) -> List[Tuple[Dict[str, Any], Tuple[bytes, bytes]]]:
+        """Get the entries that are new or changed, each with the token to pass to mark_seen.
+
+        Entries found unchanged are skipped and their last_seen refreshed.
+        """
+        candidates = [
+            (entry, (entry_key(source, entry), entry_fingerprint(source, entry))) for entry in entries
+        ]
+        maybe_seen = [token for _, token in candidates if token[0] + token[1] in self.bloom]
+        confirmed = set()
+        if maybe_seen:
+            with self.lock:
+                for start in range(0, len(maybe_seen), 500):
+                    chunk = maybe_seen[start:start + 500]
+                    rows = self.conn.execute(
+                        f"SELECT key, fingerprint FROM seen WHERE key IN ({', '.join('?' * len(chunk))})",
+                        [key for key, _ in chunk]
+                    ).fetchall()
+                    confirmed.update((key, fingerprint) for key, fingerprint in rows)
+                unchanged = [token for token in maybe_seen if token in confirmed]
+                if unchanged:
+                    now = time.time()
+                    with self.conn:
+                        self.conn.execute("BEGIN IMMEDIATE")
+                        self.conn.executemany(
+                            "UPDATE seen SET last_seen = ? WHERE key = ? AND last_seen < ?",
+                            [(now, key, now - TOUCH_INTERVAL_SECONDS) for key, _ in unchanged]
+                        )
+        return [(entry, token) for entry, token in candidates if token not in confirmed]
+
+    def mark_seen(self, tokens: List[Tuple[bytes, bytes]]) -> None:
+        """Record entries as ingested; call only once they are durably stored"""
+        if not tokens:
+            return
+        now = time.time()
+        with self.lock:
+            with self.conn:
+                self.conn.execute("BEGIN IMMEDIATE")
+                self.conn.executemany(
+                    "INSERT OR REPLACE INTO seen (key, fingerprint, last_seen) VALUES (?, ?, ?)",
+                    [(key, fingerprint, now) for key, fingerprint in tokens]
+                )
+            for key, fingerprint in tokens:
+                self.bloom.add(key + fingerprint)
+
+    def clear(self) -> None:
+        """Forget every entry so the next poll reprocesses all of them"""
+        with self.lock:
+            self.conn.execute("DELETE FROM seen")
+            self.bloom = BloomFilter(self.capacity)
+
+    def close(self) -> None:
+        with self.lock:
+            self.conn.close()
@@ -0,0 +1,254 @@
+import os
+import json
+import sqlite3
+import logging
+import threading
+import time
+from datetime import datetime
+from typing import List, Dict, Any, Tuple, Optional
+import psycopg2
+from utils.db import save_news_batch
+
+logger = logging.getLogger(__name__)
+
+# Fetchers append here instead of writing to Postgres, so a slow or
+# unreachable database never blocks or loses a fetch
+SPOOL_PATH = os.getenv('INGEST_SPOOL_PATH', os.path.join('data', 'ingest_spool.sqlite3'))
+FLUSH_BATCH_SIZE = int(os.getenv('INGEST_FLUSH_BATCH_SIZE', '500'))
+FLUSH_INTERVAL_SECONDS = 2.0
+MAX_FLUSH_BACKOFF_SECONDS = 60.0
+# A claimed batch is reserved for one flusher this long; if that flusher dies
+# before acknowledging it, the rows become claimable again
+CLAIM_LEASE_SECONDS = float(os.getenv('INGEST_SPOOL_LEASE_SECONDS', '300'))
+
+# Errors that mean the database is unavailable rather than the rows are bad
+CONNECTION_ERRORS = (psycopg2.OperationalError, psycopg2.InterfaceError)
+
+# Fields restored to datetimes when reading the spool back
+DATETIME_FIELDS = ('date', 'started_at')
+
+def encode_entry(entry: Dict[str, Any]) -> str:
+    """Serialize a normalized news entry or feed run for the spool"""
+    return json.dumps({
+        key: value.isoformat() if isinstance(value, datetime) else value
+        for key, value in entry.items()
+    })
+
+def decode_entry(payload: str) -> Dict[str, Any]:
+    """Restore a news entry written by encode_entry"""
+    entry = json.loads(payload)
+    for field in DATETIME_FIELDS:
+        if entry.get(field):
+            entry[field] = datetime.fromisoformat(entry[field])
+    return entry
+
+class IngestSpool:
+    """Durable append-only queue of fetched entries backed by SQLite.
+
+    Rows stay in the spool until the flusher has written them to Postgres,
+    so delivery is at-least-once; the news upsert and per-batch run counts
+    make replays harmless. Flushers claim rows under a lease, so several
+    processes sharing a spool never write the same batch at once.
+    """
+
+    def __init__(self, path: str = SPOOL_PATH):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        # WAL lets appends and drains from several workers overlap; FULL sync
+        # means an acknowledged append survives a crash or power loss
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=FULL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS spool (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                payload TEXT NOT NULL,
+                enqueued_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+                claimed_until REAL
+            )
+        """)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS feed_runs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                payload TEXT NOT NULL,
+                claimed_until REAL
+            )
+        """)
+        # Spools written before claims existed lack the lease column
+        for table in ('spool', 'feed_runs'):
+            columns = [row[1] for row in self.conn.execute(f"PRAGMA table_info({table})")]
+            if 'claimed_until' not in columns:
+                self.conn.execute(f"ALTER TABLE {table} ADD COLUMN claimed_until REAL")
+
+    def append(self, entries: List[Dict[str, Any]], runs: List[Dict[str, Any]] = ()) -> int:
+        """Durably append entries and their feed runs; returns how many entries were written"""
+        if not entries and not runs:
+            return 0
+        payloads = [(encode_entry(entry),) for entry in entries]
+        with self.lock:
+            with self.conn:
+                self.conn.execute("BEGIN IMMEDIATE")
+                self.conn.executemany("INSERT INTO spool (payload) VALUES (?)", payloads)
+                self.conn.executemany(
+                    "INSERT INTO feed_runs (payload) VALUES (?)", [(encode_entry(run),) for run in runs]
+                )
+        logger.debug(f"Spooled {len(payloads)} entries")
+        return len(payloads)
+
+    def claim(self, limit: int = FLUSH_BATCH_SIZE, table: str = 'spool',
+              lease: float = CLAIM_LEASE_SECONDS) -> List[Tuple[int, Dict[str, Any]]]:
+        """Reserve the oldest unclaimed entries (or feed runs, with table='feed_runs').
+
+        Claimed rows stay in the spool, hidden from other flushers until they
+        are acknowledged, released, or the lease runs out.
+        """
+        now = time.time()
+        with self.lock:
+            with self.conn:
+                self.conn.execute("BEGIN IMMEDIATE")
+                rows = self.conn.execute(
+                    f"""
+                    SELECT id, payload FROM {table}
+                    WHERE claimed_until IS NULL OR claimed_until < ?
+                    ORDER BY id LIMIT ?
+                    """,
+                    (now, limit)
+                ).fetchall()
+                self.conn.executemany(
+                    f"UPDATE {table} SET claimed_until = ? WHERE id = ?", [(now + lease, row_id) for row_id, _ in rows]
+                )
+        return [(row_id, decode_entry(payload)) for row_id, payload in rows]
+
+    def release(self, row_ids: List[int], table: str = 'spool') -> None:
+        """Give claimed rows back so they can be claimed again straight away"""
+        if not row_ids:
+            return
+        with self.lock:
+            with self.conn:
+                self.conn.execute("BEGIN IMMEDIATE")
+                self.conn.executemany(
+                    f"UPDATE {table} SET claimed_until = NULL WHERE id = ?", [(row_id,) for row_id in row_ids]
+                )
+
+    def ack(self, row_ids: List[int], table: str = 'spool') -> None:
+        """Remove entries (or feed runs) that have been written to the database"""
+        if not row_ids:
+            return
+        with self.lock:
+            with self.conn:
+                self.conn.execute("BEGIN IMMEDIATE")
+                self.conn.executemany(f"DELETE FROM {table} WHERE id = ?", [(row_id,) for row_id in row_ids])
+
+    def pending_count(self) -> int:
+        """Number of entries waiting to be flushed"""
+        with self.lock:
+            return self.conn.execute("SELECT COUNT(*) FROM spool").fetchone()[0]
+
+    def close(self) -> None:
+        with self.lock:
+            self.conn.close()
+
+class SpoolFlusher:
+    """Drains the spool into Postgres in large batches on a background thread"""
+
+    def __init__(self, spool: IngestSpool, batch_size: int = FLUSH_BATCH_SIZE,
+                 interval: float = FLUSH_INTERVAL_SECONDS):
+        self.spool = spool
+        self.batch_size = batch_size
+        self.interval = interval
+        self.stop_event = threading.Event()
+        self.thread: Optional[threading.Thread] = None
+
+    def flush_batch(self) -> int:
+        """Write one batch to the database; returns the number of records removed from the spool.
+
+        Raises a psycopg2 connection error when the database is unavailable,
+        leaving the batch in the spool for the next attempt.
+        """
+        batch = self.spool.claim(self.batch_size)
+        runs = self.spool.claim(self.batch_size, table='feed_runs')
+        if not batch and not runs:
+            return 0
+
+        try:
+            return self.write_batch(batch, runs)
+        except Exception:
+            # Rows already acknowledged are gone; the rest go back for a retry
+            self.spool.release([row_id for row_id, _ in batch])
+            self.spool.release([row_id for row_id, _ in runs], table='feed_runs')
+            raise
+
+    def write_batch(self, batch: List[Tuple[int, Dict[str, Any]]], runs: List[Tuple[int, Dict[str, Any]]]) -> int:
+        """Write claimed entries and feed runs to the database and acknowledge them"""
+        try:
+            save_news_batch([entry for _, entry in batch], [run for _, run in runs])
+        except CONNECTION_ERRORS:
+            raise
+        except psycopg2.Error as e:
+            # One bad row fails the whole statement; retry row by row so it
+            # doesn't hold back the rest of the spool forever
+            logger.warning(f"Batch flush rejected ({str(e).strip()}); retrying entries individually")
+            for row_id, run in runs:
+                try:
+                    save_news_batch([], [run])
+                except CONNECTION_ERRORS:
+                    raise
+                except psycopg2.Error as row_error:
+                    logger.error(f"Dropping unwritable feed run for {run.get('feed_name')!r}: {str(row_error).strip()}")
+                self.spool.ack([row_id], table='feed_runs')
+            for row_id, entry in batch:
+                try:
+                    save_news_batch([entry])
+                except CONNECTION_ERRORS:
+                    raise
+                except psycopg2.Error as row_error:
+                    logger.error(f"Dropping unwritable spooled entry {entry.get('title')!r}: {str(row_error).strip()}")
+                self.spool.ack([row_id])
+            return len(batch) + len(runs)
+
+        self.spool.ack([row_id for row_id, _ in batch])
+        self.spool.ack([row_id for row_id, _ in runs], table='feed_runs')
+        return len(batch) + len(runs)
+
+    def drain(self) -> bool:
+        """Flush until the spool is empty; returns False if the database is unavailable"""
+        try:
+            while self.flush_batch():
+                pass
+            return True
+        except CONNECTION_ERRORS as e:
+            logger.error(f"Database unavailable, {self.spool.pending_count()} entries left in spool: {str(e).strip()}")
+            return False
+
+    def run(self) -> None:
+        backoff = self.interval
+        while not self.stop_event.is_set():
+            try:
+                flushed = self.flush_batch()
+                backoff = self.interval
+            except CONNECTION_ERRORS as e:
+                logger.error(f"Spool flush failed, retrying in {backoff:.0f}s: {str(e).strip()}")
+                self.stop_event.wait(backoff)
+                backoff = min(backoff * 2, MAX_FLUSH_BACKOFF_SECONDS)
+                continue
+            except Exception as e:
+                logger.error(f"Unexpected spool flush error: {str(e)}", exc_info=True)
+                flushed = 0
+            if flushed:
+                logger.info(f"Flushed {flushed} spooled records to the database")
+            else:
+                self.stop_event.wait(self.interval)
+
+    def start(self) -> None:
+        self.thread = threading.Thread(target=self.run, name="spool-flusher", daemon=True)
+        self.thread.start()
+
+    def stop(self) -> None:
+        """Stop the background thread, then make a final attempt to drain the spool"""
+        self.stop_event.set()
+        if self.thread is not None:
+            self.thread.join()
+        self.drain()